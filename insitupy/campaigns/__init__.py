@@ -1,5 +1,15 @@
+from .cache import ParseCache
 from .campaign import ProfileDataCollection
+from .assembler import PitAssembler
+from .shared import SharedCollections
+from .spatial import SpatialIndex
+from .temporal import TemporalIndex
 
 __all__ = [
-    "ProfileDataCollection"
+    "ParseCache",
+    "PitAssembler",
+    "ProfileDataCollection",
+    "SharedCollections",
+    "SpatialIndex",
+    "TemporalIndex",
 ]
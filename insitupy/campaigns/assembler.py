@@ -0,0 +1,205 @@
+import logging
+import re
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+from pathlib import Path
+from typing import Dict, List, Optional, Tuple, Union
+
+from insitupy.io.metadata import MetaDataParser
+from insitupy.io.yaml_codes import YamlCodes
+from .campaign import ProfileDataCollection
+
+LOG = logging.getLogger(__name__)
+
+
+class PitAssembler:
+    """
+    Assemble the files of a pit (density, LWC, temperature, site
+    description, ...) into one collection per pit. The metadata header
+    shared by the files of a pit is only parsed once and validated against
+    every other file of the pit. Every file is read with its own copy of
+    the metadata parser, so the units of one file do not leak into
+    another. Pits are assembled in parallel.
+    """
+    COLLECTION_CLASS = ProfileDataCollection
+    # File name stem shared by all files of a pit
+    STEM_PATTERN = re.compile(r"^(?P<stem>.+?)_(?:data_|site)", re.IGNORECASE)
+    # Header entries that have to agree for all files of a pit
+    SHARED_KEYS = [
+        YamlCodes.ID_NAME,
+        YamlCodes.DATE_TIME,
+        YamlCodes.DATE,
+        YamlCodes.TIME,
+        YamlCodes.LATITUDE,
+        YamlCodes.LONGITUDE,
+        YamlCodes.EASTING,
+        YamlCodes.NORTHING,
+        YamlCodes.UTM_ZONE,
+        YamlCodes.EPSG,
+    ]
+    GROUP_OPTIONS = ["stem", "pit_id"]
+    EXECUTOR_OPTIONS = ["thread", "process"]
+
+    def __init__(
+        self,
+        group_by: str = "stem",
+        n_workers: Optional[int] = None,
+        executor: str = "thread",
+        **parser_kwargs
+    ):
+        """
+        Args:
+            group_by: Group files by their file name 'stem' or the 'pit_id'
+                in the file header
+            n_workers: Number of pits to assemble in parallel. Defaults to
+                the executor default.
+            executor: Assemble pits on 'thread' or 'process' workers.
+                Processes parse in parallel without sharing the GIL, at the
+                cost of sending the collections back.
+            parser_kwargs: Arguments for the metadata parser. See
+                ProfileDataCollection.from_csv
+        """
+        if group_by not in self.GROUP_OPTIONS:
+            raise ValueError(
+                f"{group_by} is not a valid option. Options are:"
+                f" {self.GROUP_OPTIONS}"
+            )
+        if executor not in self.EXECUTOR_OPTIONS:
+            raise ValueError(
+                f"{executor} is not a valid option. Options are:"
+                f" {self.EXECUTOR_OPTIONS}"
+            )
+        self._group_by = group_by
+        self._n_workers = n_workers
+        self._executor = executor
+        self._parser_kwargs = parser_kwargs
+        self._template_parser = None
+
+    def _meta_parser(self) -> MetaDataParser:
+        """
+        Fresh metadata parser for one file, copied from a parser built once
+        """
+        if self._template_parser is None:
+            self._template_parser = self.COLLECTION_CLASS._build_meta_parser(
+                **self._parser_kwargs
+            )
+        return self._template_parser.copy()
+
+    def _stem(self, filename: Path) -> str:
+        match = self.STEM_PATTERN.match(filename.name)
+        return match.group("stem") if match else filename.stem
+
+    def _group(
+        self, filenames: List[Union[str, Path]]
+    ) -> Tuple[Dict[str, List[Path]], Dict[Path, MetaDataParser]]:
+        """
+        Group files by pit, see group. Also returns the parsers that read
+        the header of a file while grouping, so it is not read again.
+        """
+        groups = {}
+        parsers = {}
+        for filename in sorted(Path(f) for f in filenames):
+            if self._group_by == "stem":
+                key = self._stem(filename)
+            else:
+                meta_parser = self._meta_parser()
+                meta_parser.read_header(filename)
+                key = meta_parser.parse_id()
+                parsers[filename] = meta_parser
+            groups.setdefault(key, []).append(filename)
+        return groups, parsers
+
+    def group(
+        self, filenames: List[Union[str, Path]]
+    ) -> Dict[str, List[Path]]:
+        """
+        Group files by pit
+
+        Args:
+            filenames: files to group
+
+        Returns:
+            Map of the pit key to the sorted files of the pit
+        """
+        return self._group(filenames)[0]
+
+    def _validate(self, filename: Path, reference: dict, rough_obj: dict):
+        """
+        Check the shared header entries of a file against the entries of
+        the file the pit metadata was parsed from
+        """
+        for key in self.SHARED_KEYS:
+            if key in reference and key in rough_obj and \
+                    reference[key] != rough_obj[key]:
+                raise ValueError(
+                    f"{filename} does not share {key} with its pit:"
+                    f" {rough_obj[key]} != {reference[key]}"
+                )
+
+    def assemble_pit(
+        self,
+        filenames: List[Union[str, Path]],
+        parsers: Optional[Dict[Path, MetaDataParser]] = None
+    ) -> ProfileDataCollection:
+        """
+        Read all files of one pit into one collection
+
+        Args:
+            filenames: files of the pit
+            parsers: Optional parsers that just read the header of a file,
+                see MetaDataParser.read_header
+
+        Returns:
+            Collection with the profiles of all files and the pit metadata
+        """
+        parsers = parsers or {}
+        metadata = None
+        reference = None
+        profiles = []
+        for filename in filenames:
+            meta_parser = parsers.get(Path(filename)) or self._meta_parser()
+            file_profiles, file_metadata = self.COLLECTION_CLASS._read_csv(
+                filename, meta_parser, metadata=metadata
+            )
+            if metadata is None:
+                metadata = file_metadata
+                reference = meta_parser.rough_obj
+            else:
+                self._validate(filename, reference, meta_parser.rough_obj)
+            profiles += self.COLLECTION_CLASS._keep_profiles(file_profiles)
+
+        # Profiles without data only exist to carry the metadata
+        data_profiles = [p for p in profiles if p.df is not None]
+        if data_profiles:
+            profiles = data_profiles
+        else:
+            profiles = profiles[:1]
+
+        LOG.debug(
+            f"Assembled {len(profiles)} profiles from {len(filenames)} files"
+        )
+        return self.COLLECTION_CLASS(profiles, metadata)
+
+    def assemble(
+        self, filenames: List[Union[str, Path]]
+    ) -> Dict[str, ProfileDataCollection]:
+        """
+        Group the files by pit and assemble each pit in parallel
+
+        Args:
+            filenames: files of any number of pits
+
+        Returns:
+            Map of the pit key to the pit collection
+        """
+        groups, parsers = self._group(filenames)
+        pit_parsers = [
+            {f: parsers[f] for f in files if f in parsers}
+            for files in groups.values()
+        ]
+        executor_class = ThreadPoolExecutor if self._executor == "thread" \
+            else ProcessPoolExecutor
+        with executor_class(max_workers=self._n_workers) as executor:
+            collections = executor.map(
+                self.assemble_pit, groups.values(), pit_parsers
+            )
+            return dict(zip(groups.keys(), collections))
@@ -0,0 +1,241 @@
+import hashlib
+import logging
+import os
+import shutil
+import threading
+import uuid
+from collections import OrderedDict
+from pathlib import Path
+from typing import List, Optional, Union
+
+import insitupy
+from insitupy.io.files import file_hash
+from insitupy.io.metadata import MetaDataParser
+
+LOG = logging.getLogger(__name__)
+
+
+class ParseCache:
+    """
+    On disk cache of collections parsed from files. Entries are keyed by
+    the content of the file and the fingerprint of the parser
+    configuration, so any change to either misses the cache. Entries are
+    GeoParquet datasets, see ProfileDataCollection.write_parquet, and the
+    least recently used are removed once the cache exceeds its size. The
+    size of every entry is kept in an index, which is read from the
+    directory once, so storing an entry does not scan the cache.
+    """
+    DEFAULT_MAX_BYTES = 1 << 30
+    # Bump when the stored format changes
+    FORMAT_VERSION = 2
+    TEMP_PREFIX = ".tmp-"
+
+    def __init__(
+        self,
+        directory: Union[str, Path],
+        max_bytes: int = DEFAULT_MAX_BYTES
+    ):
+        """
+        Args:
+            directory: directory of the cache entries, created if needed
+            max_bytes: size of all entries before the least recently used
+                are removed
+        """
+        self._directory = Path(directory)
+        self._directory.mkdir(parents=True, exist_ok=True)
+        self._max_bytes = max_bytes
+        self._lock = threading.Lock()
+        self._hits = 0
+        self._misses = 0
+        # Size of every entry by name, least recently used first
+        self._index = None
+        self._total = 0
+
+    @property
+    def directory(self) -> Path:
+        return self._directory
+
+    def key(
+        self,
+        filename: Union[str, Path],
+        meta_parser: MetaDataParser,
+        collection_class: type,
+        variables: Optional[List[str]] = None,
+    ) -> str:
+        """
+        Cache key of a file read with a parser configuration
+
+        Args:
+            filename: path to the file
+            meta_parser: parser the file is read with
+            collection_class: collection class reading the file
+            variables: Optional variable codes that are read
+        """
+        parts = [
+            str(self.FORMAT_VERSION),
+            insitupy.__version__,
+            f"{collection_class.__module__}.{collection_class.__qualname__}",
+            meta_parser.fingerprint,
+            ",".join(sorted(variables)) if variables is not None else "*",
+            file_hash(filename),
+        ]
+        return hashlib.blake2b(
+            "|".join(parts).encode(), digest_size=16
+        ).hexdigest()
+
+    def _entry(self, key: str) -> Path:
+        return self._directory.joinpath(key)
+
+    def get(self, key: str, collection_class: type, **parser_kwargs):
+        """
+        Read a cached collection
+
+        Args:
+            key: cache key, see key
+            collection_class: class to read the collection with
+            parser_kwargs: Arguments for the metadata parser of the
+                profiles. See ProfileDataCollection.from_csv
+
+        Returns:
+            The collection or None when it is not cached
+        """
+        entry = self._entry(key)
+        result = []
+        if entry.is_dir():
+            try:
+                result = collection_class.from_parquet(entry, **parser_kwargs)
+                # Mark as recently used, for the index of later sessions
+                os.utime(entry)
+            except (OSError, ValueError) as e:
+                LOG.warning(f"Discarding unreadable cache entry {entry}: {e}")
+                shutil.rmtree(entry, ignore_errors=True)
+                self._forget(key)
+                result = []
+        with self._lock:
+            if result:
+                self._hits += 1
+                index = self._load_index()
+                if key in index:
+                    index.move_to_end(key)
+            else:
+                self._misses += 1
+        return result[0] if result else None
+
+    def put(self, key: str, collection):
+        """
+        Store a collection. Concurrent writers of the same key keep the
+        first complete entry. Failures to store are logged, so they never
+        fail the read of the collection.
+
+        Args:
+            key: cache key, see key
+            collection: collection to store
+        """
+        entry = self._entry(key)
+        temp = self._directory.joinpath(
+            f"{self.TEMP_PREFIX}{uuid.uuid4().hex}"
+        )
+        stored = False
+        try:
+            collection.to_parquet(temp)
+            size = self._size(temp)
+            os.rename(temp, entry)
+            stored = True
+        except Exception as e:
+            if entry.is_dir():
+                LOG.debug(f"Cache entry {key} was stored by another writer")
+            else:
+                LOG.warning(f"Could not store cache entry {key}: {e}")
+        finally:
+            if not stored:
+                shutil.rmtree(temp, ignore_errors=True)
+        if not stored:
+            return
+        with self._lock:
+            index = self._load_index()
+            self._total += size - index.get(key, 0)
+            index[key] = size
+            index.move_to_end(key)
+            self._evict()
+
+    @staticmethod
+    def _size(path: Path) -> int:
+        return sum(
+            f.stat().st_size for f in path.rglob("*") if f.is_file()
+        )
+
+    def _entries(self) -> List[Path]:
+        return [
+            p for p in self._directory.iterdir()
+            if p.is_dir() and not p.name.startswith(self.TEMP_PREFIX)
+        ]
+
+    def _load_index(self) -> OrderedDict:
+        """
+        Index of the entries, read from the directory on first use. Call
+        with the lock held.
+        """
+        if self._index is None:
+            entries = sorted(
+                (p.stat().st_mtime, p.name, self._size(p))
+                for p in self._entries()
+            )
+            self._index = OrderedDict(
+                (name, size) for _, name, size in entries
+            )
+            self._total = sum(self._index.values())
+        return self._index
+
+    def _forget(self, key: str):
+        with self._lock:
+            size = self._load_index().pop(key, None)
+            if size is not None:
+                self._total -= size
+
+    def _evict(self):
+        """
+        Remove the least recently used entries beyond the maximum size.
+        Call with the lock held.
+        """
+        index = self._load_index()
+        while index and self._total > self._max_bytes:
+            key, size = index.popitem(last=False)
+            LOG.debug(f"Evicting cache entry {key}")
+            shutil.rmtree(self._entry(key), ignore_errors=True)
+            self._total -= size
+
+    def __len__(self):
+        with self._lock:
+            return len(self._load_index())
+
+    @property
+    def size(self) -> int:
+        """
+        Bytes of all entries
+        """
+        with self._lock:
+            self._load_index()
+            return self._total
+
+    def clear(self):
+        for path in self._entries():
+            shutil.rmtree(path, ignore_errors=True)
+        with self._lock:
+            self._index = OrderedDict()
+            self._total = 0
+            self._hits = 0
+            self._misses = 0
+
+    @property
+    def stats(self) -> dict:
+        """
+        Hits, misses, entries and hit rate of the cache
+        """
+        with self._lock:
+            lookups = self._hits + self._misses
+            return {
+                "hits": self._hits,
+                "misses": self._misses,
+                "size": len(self._load_index()),
+                "hit_rate": self._hits / lookups if lookups else 0.0,
+            }
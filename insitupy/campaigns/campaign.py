@@ -2,12 +2,29 @@
 Point data from select manual measurement campaigns
 """
 import logging
-from typing import List, Tuple
+import shutil
+from dataclasses import fields
+from pathlib import Path
+from typing import TYPE_CHECKING, Callable, Dict, List, Optional, \
+    Sequence, Set, Tuple, Union
+
+import geopandas as gpd
+import numpy as np
+import pandas as pd
 
 from insitupy.io.metadata import MetaDataParser, ProfileMetaData
+from . import clustering, colocate, gridding, parquet, projection, \
+    timeseries
+from .cache import ParseCache
+from .lazy import CsvProfileLoader, ResidentProfiles
+from insitupy.profiles import windows
 from insitupy.profiles.base import ProfileData
 from insitupy.variables import MeasurementDescription
 
+if TYPE_CHECKING:
+    import pyarrow as pa
+    import xarray as xr
+
 LOG = logging.getLogger(__name__)
 
 
@@ -16,10 +33,13 @@ class ProfileDataCollection:
     This could be a collection of profiles
     """
     PROFILE_DATA_CLASS = ProfileData
+    # Optional on disk cache of parsed files used by from_csv
+    PARSE_CACHE: Optional[ParseCache] = None
 
     def __init__(self, profiles: List[ProfileData], metadata: ProfileMetaData):
         self._profiles = profiles
         self._metadata = metadata
+        self._site_id = None
 
     @property
     def SWE(self):
@@ -48,12 +68,23 @@ class ProfileDataCollection:
     def profiles(self) -> List[ProfileData]:
         return self._profiles
 
+    @property
+    def site_id(self) -> Optional[str]:
+        """
+        Id of the cluster of nearby pits this collection belongs to, set
+        by cluster_sites. Unlike the site name it is consistent across
+        campaigns.
+        """
+        return self._site_id
+
     @classmethod
     def _read_csv(
         cls,
         filename,
         meta_parser: MetaDataParser,
         shared_column_options=None,
+        metadata: ProfileMetaData = None,
+        variables: List[str] = None,
     ) -> Tuple[List[ProfileData], ProfileMetaData]:
         """
         Args:
@@ -62,6 +93,9 @@ class ProfileDataCollection:
             shared_column_options: shared columns that will be used
                 for data handling and storing. These come from primary
                 variables but are not the primary data themselves
+            metadata: Optional already parsed metadata shared with the file
+            variables: Optional variable codes to create profiles for. All
+                mapped variables are used when not given.
 
         Returns:
             a list of ProfileData objects
@@ -73,45 +107,58 @@ class ProfileDataCollection:
         all_profiles = cls.PROFILE_DATA_CLASS(
             variable=None, meta_parser=meta_parser
         )
-        all_profiles.from_csv(filename)
+        all_profiles.from_csv(
+            filename, metadata=metadata, variables=variables
+        )
 
         # columns that will be included in data, but are not the primary
         # data themselves
-        shared_column_options = shared_column_options or \
-            all_profiles.shared_column_options()
+        shared_column_options = set(
+            shared_column_options or all_profiles.shared_column_options()
+        )
         # Filter the shared columns
         shared_columns = [
             c for c, v in all_profiles.meta_columns_map.items()
             if v in shared_column_options
         ]
         # Variable columns are the remaining
+        shared_column_set = set(shared_columns)
         variable_columns = [
             c for c in all_profiles.meta_columns_map.keys()
-            if c not in shared_columns
+            if c not in shared_column_set
         ]
 
         # Create an object for each measurement
         for column in variable_columns:
+            variable = all_profiles.meta_columns_map[column]
             # Skip columns that are not mapped
-            if all_profiles.meta_columns_map[column] is None:
-                LOG.debug(f"Skipping column {column} because it is not mapped")
+            if variable is None:
+                LOG.debug(
+                    f"Skipping column {column} because it is not mapped"
+                )
+            elif variables is not None and variable.code not in variables:
+                LOG.debug(
+                    f"Skipping column {column} because it is not requested"
+                )
             else:
                 profile = cls.PROFILE_DATA_CLASS(
                     meta_parser=meta_parser,
-                    variable=all_profiles.meta_columns_map[column],
+                    variable=variable,
                 )
                 # IMPORTANT - Metadata needs to be set before assigning the
-                # dataframe as information from the metadata is used to format_df
-                # the information
+                # dataframe as information from the metadata is used to
+                # format_df the information
                 profile.metadata = all_profiles.metadata
-                profile.df = all_profiles.df.loc[:, shared_columns + [column]].copy()
+                profile.df = all_profiles.df.loc[
+                    :, shared_columns + [column]
+                ].copy()
                 # --------
                 result.append(profile)
         if not result and all_profiles.df.empty:
             # Add one profile if this is empty so we can keep the metadata
             profile = cls.PROFILE_DATA_CLASS(
                 meta_parser=meta_parser,
-                variable=MeasurementDescription(),
+                variable=MeasurementDescription.intern(),
             )
             profile.metadata = all_profiles.metadata
             result.append(profile)
@@ -128,7 +175,10 @@ class ProfileDataCollection:
         campaign_name=None,
         allow_map_failure=False,
         metadata_variable_file=None,
-        primary_variable_file=None
+        primary_variable_file=None,
+        variables=None,
+        cache: Optional[ParseCache] = None,
+        catalog=None
     ):
         """
         Find all profiles in a single csv file
@@ -145,11 +195,925 @@ class ProfileDataCollection:
             primary_variable_file:
                 Optional addition to the recognized primary variables defined
                 in a YAML file
+            variables: Optional list of variable codes to read. Only the
+                depth columns and these variables are parsed from the file.
+            cache: Optional cache of parsed files. Defaults to PARSE_CACHE.
+            catalog: Optional ProfileCatalog the collection is added to
         Returns:
             This class with a collection of profiles and metadata
         """
+        parser_kwargs = dict(
+            timezone=timezone,
+            header_sep=header_sep,
+            site_id=site_id,
+            campaign_name=campaign_name,
+            allow_map_failure=allow_map_failure,
+            metadata_variable_file=metadata_variable_file,
+            primary_variable_file=primary_variable_file,
+        )
+        meta_parser = cls._build_meta_parser(**parser_kwargs)
+
+        cache = cache if cache is not None else cls.PARSE_CACHE
+        if cache is not None:
+            key = cache.key(filename, meta_parser, cls, variables=variables)
+            result = cache.get(key, cls, **parser_kwargs)
+            if result is not None:
+                LOG.debug(f"Read {filename} from the parse cache")
+        if cache is None or result is None:
+            profiles, metadata = cls._read_csv(
+                filename, meta_parser,
+                variables=set(variables) if variables is not None else None
+            )
+            result = cls(cls._keep_profiles(profiles), metadata)
+            if cache is not None:
+                cache.put(key, result)
+
+        if catalog is not None:
+            catalog.add_collection(filename, result)
+        return result
+
+    @classmethod
+    def open_lazy(
+        cls,
+        filenames: List[Union[str, Path]],
+        max_resident: int = ResidentProfiles.DEFAULT_MAX_RESIDENT,
+        variables: Optional[List[str]] = None,
+        **parser_kwargs
+    ) -> List["ProfileDataCollection"]:
+        """
+        Open files without reading their data. Only the headers are parsed,
+        and the data of a profile, just its own columns, is read on the
+        first access of its df. At most max_resident profiles across all
+        returned collections keep their data loaded, the least recently used
+        are unloaded.
+
+        Args:
+            filenames: paths to the files
+            max_resident: maximum number of profiles with loaded data
+            variables: Optional variable codes to create profiles for
+            parser_kwargs: Arguments for the metadata parser. See from_csv
+
+        Returns:
+            One collection per file
+        """
+        template_parser = cls._build_meta_parser(**parser_kwargs)
+        resident = ResidentProfiles(max_resident)
+        shared_column_options = set(cls.PROFILE_DATA_CLASS(
+            variable=None, meta_parser=template_parser
+        ).shared_column_options())
+        result = []
+        for filename in filenames:
+            # The profiles of a file keep the units and location of its
+            # header in their own parser
+            meta_parser = template_parser.copy()
+            metadata, columns, columns_map, header_pos = meta_parser.parse(
+                filename, header_only=True
+            )
+            columns = columns or []
+            shared_positions = [
+                i for i, c in enumerate(columns)
+                if columns_map.get(c) in shared_column_options
+            ]
+            profiles = []
+            for i, column in enumerate(columns):
+                variable = columns_map.get(column)
+                if variable is None or variable in shared_column_options \
+                        or variable.code == "ignore":
+                    continue
+                if variables is not None and variable.code not in variables:
+                    continue
+                profile = cls.PROFILE_DATA_CLASS(
+                    meta_parser=meta_parser, variable=variable
+                )
+                profile.metadata = metadata
+                profile.set_loader(CsvProfileLoader(
+                    str(filename), columns, header_pos,
+                    shared_positions + [i], resident
+                ))
+                profiles.append(profile)
+
+            if not columns:
+                # Keep the metadata of files without data
+                profile = cls.PROFILE_DATA_CLASS(
+                    meta_parser=meta_parser,
+                    variable=MeasurementDescription.intern(),
+                )
+                profile.metadata = metadata
+                profiles.append(profile)
+            result.append(cls(profiles, metadata))
+        return result
+
+    @classmethod
+    def _filename_candidates(
+        cls,
+        filenames: List[Union[str, Path]],
+        variables: Optional[Set[str]] = None,
+        start: Optional[pd.Timestamp] = None,
+        end: Optional[pd.Timestamp] = None,
+    ) -> List[Union[str, Path]]:
+        """
+        Prune files that cannot match a query from their names alone.
+        Campaigns with known file naming override this, the default keeps
+        every file.
+
+        Args:
+            filenames: paths to the files
+            variables: requested variable codes
+            start: earliest profile time in UTC
+            end: latest profile time in UTC
+
+        Returns:
+            The files that may match
+        """
+        return list(filenames)
+
+    @staticmethod
+    def _metadata_matches(
+        metadata: ProfileMetaData,
+        start: Optional[pd.Timestamp] = None,
+        end: Optional[pd.Timestamp] = None,
+        bbox: Optional[Tuple[float, float, float, float]] = None,
+    ) -> bool:
+        if start is not None and metadata.date_time < start:
+            return False
+        if end is not None and metadata.date_time > end:
+            return False
+        if bbox is not None and not (
+            bbox[0] <= metadata.longitude <= bbox[2] and
+            bbox[1] <= metadata.latitude <= bbox[3]
+        ):
+            return False
+        return True
+
+    @classmethod
+    def query(
+        cls,
+        filenames: List[Union[str, Path]],
+        variables: Optional[List[str]] = None,
+        time: Optional[Tuple] = None,
+        bbox: Optional[Tuple[float, float, float, float]] = None,
+        **parser_kwargs
+    ) -> List["ProfileDataCollection"]:
+        """
+        Load only the profiles matching the query. Each predicate is
+        evaluated at the cheapest possible stage: the file names first,
+        then the file headers and last the data. Files that cannot match are
+        never fully read and profiles are only created for the requested
+        variables.
+
+        Args:
+            filenames: paths to the files
+            variables: variable codes to load. All variables when not given.
+            time: (start, end) of the profile times, inclusive. Either can be
+                None. Naive times are UTC.
+            bbox: (min longitude, min latitude, max longitude, max latitude)
+            parser_kwargs: Arguments for the metadata parser. See from_csv
+
+        Returns:
+            One collection per matching file
+        """
+        variables = set(variables) if variables is not None else None
+        start, end = [
+            cls._utc(t) for t in (time if time is not None else (None, None))
+        ]
+
+        candidates = cls._filename_candidates(
+            filenames, variables=variables, start=start, end=end
+        )
+        LOG.debug(
+            f"{len(candidates)} of {len(filenames)} files match by name"
+        )
+
+        template_parser = cls._build_meta_parser(**parser_kwargs)
+        result = []
+        for filename in candidates:
+            # The header read here is reused when reading the data
+            meta_parser = template_parser.copy()
+            metadata, _, columns_map, _ = meta_parser.parse(
+                filename, header_only=True
+            )
+            if not cls._metadata_matches(metadata, start, end, bbox):
+                continue
+            if variables is not None and not any(
+                v is not None and v.code in variables
+                for v in columns_map.values()
+            ):
+                continue
+
+            profiles, metadata = cls._read_csv(
+                filename, meta_parser, metadata=metadata, variables=variables
+            )
+            result.append(cls(cls._keep_profiles(profiles), metadata))
+
+        LOG.debug(f"{len(result)} of {len(filenames)} files match the query")
+        return result
+
+    @staticmethod
+    def _utc(value) -> Optional[pd.Timestamp]:
+        if value is None:
+            return None
+        value = pd.Timestamp(value)
+        if value.tz is None:
+            return value.tz_localize("UTC")
+        return value.tz_convert("UTC")
+
+    @classmethod
+    def scan_metadata(
+        cls,
+        filenames: List[Union[str, Path]],
+        **parser_kwargs
+    ) -> pd.DataFrame:
+        """
+        Catalog the metadata and variables of many files by only reading
+        the file headers. No data is read and no DataFrame is built per
+        file.
+
+        Args:
+            filenames: paths to the files
+            parser_kwargs: Arguments for the metadata parser. See from_csv
+
+        Returns:
+            One row per file with the filename, the ProfileMetaData fields and
+            the codes of the variables in the file
+        """
+        template_parser = cls._build_meta_parser(**parser_kwargs)
+        shared_column_options = set(cls.PROFILE_DATA_CLASS(
+            variable=None, meta_parser=template_parser
+        ).shared_column_options())
+        metadata_fields = [f.name for f in fields(ProfileMetaData)]
+
+        table = {
+            "filename": [],
+            **{name: [] for name in metadata_fields},
+            "variables": [],
+        }
+        for filename in filenames:
+            # A parser keeps the location of the file it parsed
+            metadata, _, columns_map, _ = template_parser.copy().parse(
+                filename, header_only=True
+            )
+            table["filename"].append(str(filename))
+            for name in metadata_fields:
+                table[name].append(getattr(metadata, name))
+            # Unique variable codes in column order
+            codes = {
+                v.code: None for v in columns_map.values()
+                if v is not None and v not in shared_column_options and
+                v.code != "ignore"
+            }
+            table["variables"].append(list(codes))
+
+        return pd.DataFrame(table)
+
+    @classmethod
+    def colocate_stations(
+        cls,
+        collections: List["ProfileDataCollection"],
+        stations: pd.DataFrame,
+        k: int = 1,
+        max_distance: Optional[float] = None,
+        tolerance: Optional[pd.Timedelta] = None,
+        variables: Optional[List[str]] = None
+    ) -> pd.DataFrame:
+        """
+        Pair every collection with its k nearest stations and the station
+        readings nearest in time. Stations are found with a KD-tree of
+        their earth centered coordinates and readings with one merge of
+        all pairs.
+
+        Args:
+            collections: collections to pair
+            stations: metloom style station data, e.g. from
+                point.get_daily_data, indexed by (datetime, site) with a
+                point geometry column
+            k: number of stations per collection
+            max_distance: Optional distance in meters beyond which
+                stations are not paired
+            tolerance: Optional largest time difference to a reading
+            variables: Optional station columns to join, all by default
+
+        Returns:
+            One row per collection and station, see colocate.colocate
+        """
+        return colocate.colocate(
+            collections, stations, k=k, max_distance=max_distance,
+            tolerance=tolerance, variables=variables
+        )
+
+    @classmethod
+    def projected_xy(
+        cls,
+        collections: List["ProfileDataCollection"],
+        crs: Optional[Union[str, int]] = None
+    ) -> pd.DataFrame:
+        """
+        Projected coordinates of collections. Collections are grouped by
+        target CRS and each unique location is transformed once with a
+        cached transformer.
+
+        Args:
+            collections: collections to locate
+            crs: Optional target CRS, e.g. 'EPSG:26912' or 26912. Defaults
+                to the UTM zone of each collection.
+
+        Returns:
+            One row per collection with the site, time, target CRS, x and y
+        """
+        return projection.project(
+            [c.metadata for c in collections], crs=crs
+        )
+
+    def to_crs(
+        self, crs: Optional[Union[str, int]] = None
+    ) -> List[gpd.GeoDataFrame]:
+        """
+        Data of the profiles with their geometry in another CRS. The
+        shared location is transformed once for all profiles.
+
+        Args:
+            crs: Optional target CRS. Defaults to the UTM zone of the
+                collection.
+
+        Returns:
+            GeoDataFrame of every profile, None for profiles without data
+
+        Raises:
+            ValueError: if the collection has no location or UTM zone
+        """
+        location = projection.project([self.metadata], crs=crs).iloc[0]
+        if location["crs"] is None or np.isnan(location["x"]):
+            raise ValueError(
+                f"Cannot project {self.metadata.site_name}, it has no"
+                f" location or CRS"
+            )
+        result = []
+        for profile in self.profiles:
+            df = profile.df
+            if df is None:
+                result.append(None)
+                continue
+            n = len(df)
+            result.append(df.set_geometry(gpd.points_from_xy(
+                np.full(n, location["x"]), np.full(n, location["y"]),
+                crs=location["crs"]
+            )))
+        return result
+
+    @classmethod
+    def cluster_sites(
+        cls,
+        collections: List["ProfileDataCollection"],
+        tolerance: float = 10.0
+    ) -> Dict[str, List["ProfileDataCollection"]]:
+        """
+        Group collections whose locations are within a tolerance of each
+        other, e.g. repeat visits and replicate pits. Locations are hashed
+        to cells of the tolerance size and only compared to locations in
+        neighboring cells. Sets the site_id of every collection.
+
+        Args:
+            collections: collections to group
+            tolerance: largest distance in meters between neighboring
+                pits of a site
+
+        Returns:
+            Collections by site id, collections without a location are
+            left out
+        """
+        ids = clustering.cluster_locations(
+            [c.metadata.latitude for c in collections],
+            [c.metadata.longitude for c in collections],
+            tolerance=tolerance
+        )
+        sites = {}
+        for collection, site_id in zip(collections, ids):
+            collection._site_id = site_id
+            if site_id is not None:
+                sites.setdefault(site_id, []).append(collection)
+        return sites
+
+    @classmethod
+    def time_series(
+        cls,
+        collections: List["ProfileDataCollection"],
+        values: Optional[Union[List, Dict[str, Union[str, Callable]]]] = None,
+        by: str = "site_name",
+        resample: Optional[str] = None,
+        how: str = "mean"
+    ) -> pd.DataFrame:
+        """
+        Time series per site of derived values, e.g. the mean density, SWE
+        and total depth of repeated pits. The values are computed once per
+        collection, then sorted and grouped by site and time in one pass.
+
+        Args:
+            collections: collections of the sites
+            values: Optional value names or column name to value mapping,
+                see timeseries.site_series. Defaults to density, swe and
+                total_depth.
+            by: 'site_name', 'site_id' after cluster_sites, or another
+                metadata field
+            resample: Optional pandas frequency of a regular cadence,
+                e.g. '7D'
+            how: aggregation of the values of a resampled period
+
+        Returns:
+            Frame indexed by site and UTC time with a column per value
+        """
+        return timeseries.site_series(
+            collections, values=values, by=by, resample=resample, how=how
+        )
+
+    @classmethod
+    def time_series_array(
+        cls,
+        collections: List["ProfileDataCollection"],
+        values: Optional[Union[List, Dict[str, Union[str, Callable]]]] = None,
+        by: str = "site_name",
+        resample: Optional[str] = None,
+        how: str = "mean"
+    ) -> "xr.Dataset":
+        """
+        Time series of time_series as a (site, time) array per value
+        """
+        return timeseries.site_time_array(cls.time_series(
+            collections, values=values, by=by, resample=resample, how=how
+        ))
+
+    @classmethod
+    def aggregate(
+        cls,
+        collections: List["ProfileDataCollection"],
+        code: str,
+        top: Union[float, np.ndarray],
+        bottom: Union[float, np.ndarray],
+        how: str = "mean",
+        depth_datum: str = "snow_height"
+    ) -> np.ndarray:
+        """
+        Statistic of a variable within a depth band for every collection,
+        see ProfileData.aggregate. The layers of all collections are
+        aggregated in one vectorized pass.
+
+        Args:
+            collections: collections to aggregate
+            code: variable code, the first profile of the variable with
+                data in each collection is used
+            top: top of the band, one for all collections or one per
+                collection
+            bottom: bottom of the band, one for all collections or one per
+                collection
+            how: one of windows.AGGREGATIONS
+            depth_datum: datum of the band depths, 'snow_height' or
+                'surface_datum'
+
+        Returns:
+            The statistic of every collection, NaN for collections without
+            the variable
+        """
+        n = len(collections)
+        top, bottom = np.broadcast_to(top, n), np.broadcast_to(bottom, n)
+        positions, profiles = [], []
+        for i, collection in enumerate(collections):
+            for profile in collection.profiles:
+                if profile.variable.code == code and \
+                        profile.df is not None and not profile.df.empty:
+                    positions.append(i)
+                    profiles.append(profile)
+                    break
+        result = np.full(n, np.nan)
+        result[positions] = windows.aggregate_profiles(
+            profiles, top[positions], bottom[positions], how=how,
+            depth_datum=depth_datum
+        )
+        return result
+
+    @staticmethod
+    def _pit_values(
+        collections: List["ProfileDataCollection"],
+        values: Union[str, Callable, Sequence[float]]
+    ) -> np.ndarray:
+        """
+        One value per collection from a value name, a function of the
+        collection or the values themselves. Names are those of
+        time_series, see timeseries.value_function.
+        """
+        if isinstance(values, str) or callable(values):
+            function = timeseries.value_function(values)
+            values = [function(c) for c in collections]
+        values = np.asarray(values, dtype=float)
+        if len(values) != len(collections):
+            raise ValueError(
+                f"Got {len(values)} values for {len(collections)} collections"
+            )
+        return values
+
+    @classmethod
+    def grid(
+        cls,
+        collections: List["ProfileDataCollection"],
+        values: Union[str, Callable, Sequence[float]],
+        crs: Union[str, int],
+        resolution: float,
+        how: str = "mean",
+        bounds: Optional[Tuple[float, float, float, float]] = None,
+        power: float = 2.0,
+        k: int = 8,
+        max_distance: Optional[float] = None
+    ) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+        """
+        Grid a value per collection, e.g. SWE, mean density or total
+        depth. Collections are projected to the CRS, then their values are
+        binned into cells or interpolated by inverse distance weighting.
+        For points that are not collections, see gridding.bin_points and
+        gridding.idw.
+
+        Args:
+            collections: collections to grid
+            values: 'swe', 'total_depth' or another name in
+                timeseries.DERIVED_VALUES, a variable code whose profile
+                mean is gridded, a function returning the value of a
+                collection or a value per collection
+            crs: CRS of the grid, e.g. 'EPSG:26912'
+            resolution: cell size in CRS units
+            how: 'idw' or one of gridding.GRID_STATISTICS
+            bounds: Optional (min x, min y, max x, max y) of the grid.
+                Defaults to the extent of the collections.
+            power: power of the inverse distance for 'idw'
+            k: number of nearest collections per cell for 'idw'
+            max_distance: Optional distance beyond which collections are
+                not used for 'idw'
+
+        Returns:
+            The grid with a row per y, and the x and y of the cell centers
+        """
+        values = cls._pit_values(collections, values)
+        xy = projection.project([c.metadata for c in collections], crs=crs)
+        x, y = xy["x"].to_numpy(), xy["y"].to_numpy()
+        if how != "idw":
+            return gridding.bin_points(
+                x, y, values, resolution, how=how, bounds=bounds
+            )
+        x_axis, y_axis = gridding.grid_axes(x, y, resolution, bounds=bounds)
+        return gridding.idw(
+            x, y, values, x_axis, y_axis, power=power, k=k,
+            max_distance=max_distance
+        ), x_axis, y_axis
+
+    def to_arrow(self, geometry_encoding: str = "WKB") -> "pa.Table":
+        """
+        Arrow table with a row per layer of every profile. The numeric data
+        columns share the memory of the profile DataFrames, see
+        ProfileData.to_arrow.
+
+        Args:
+            geometry_encoding: 'WKB' or 'geoarrow'
+
+        Returns:
+            The table, with the information to rebuild the collection in the
+            schema metadata
+        """
+        import pyarrow as pa
+        from insitupy.profiles import arrow
+
+        tables = [
+            p.to_arrow(geometry_encoding=geometry_encoding, profile_index=i)
+            for i, p in enumerate(self.profiles)
+        ]
+        descriptions = [
+            arrow.read_schema_metadata(t)[1][0] for t in tables
+        ]
+        # Profiles without a column, e.g. the bottom depth, get nulls
+        table = pa.concat_tables(tables, promote_options="permissive")
+        return arrow.with_schema_metadata(table, self.metadata, descriptions)
+
+    @classmethod
+    def from_arrow(
+        cls, table: "pa.Table", zero_copy: bool = False, **parser_kwargs
+    ):
+        """
+        Rebuild a collection from a table of to_arrow
+
+        Args:
+            table: table of the collection
+            zero_copy: Use read only views of the numeric table columns as
+                the profile data. See ProfileData.from_arrow
+            parser_kwargs: Arguments for the metadata parser of the
+                profiles. See from_csv
+
+        Returns:
+            This class with the profiles and metadata of the table
+        """
+        from insitupy.profiles import arrow
+
+        metadata, descriptions = arrow.read_schema_metadata(table)
+        meta_parser = cls._build_meta_parser(
+            units_map={
+                d["variable"]["code"]: d["unit"] for d in descriptions
+                if d["unit"] is not None
+            },
+            **parser_kwargs
+        )
+        profiles = [
+            cls.PROFILE_DATA_CLASS.from_arrow(
+                table, meta_parser=meta_parser, profile_index=i,
+                zero_copy=zero_copy
+            ) for i in range(len(descriptions))
+        ]
+        for profile in profiles:
+            # Share one metadata object like collections read from files
+            profile.metadata = metadata
+        return cls(profiles, metadata)
+
+    def to_xarray(
+        self,
+        depths: Optional[np.ndarray] = None,
+        depth_step: float = 1.0,
+        depth_datum: str = "snow_height"
+    ) -> "xr.Dataset":
+        """
+        Profiles of this collection on a common depth axis. See to_cube.
+        """
+        return self.to_cube(
+            [self], depths=depths, depth_step=depth_step,
+            depth_datum=depth_datum
+        )
+
+    @classmethod
+    def to_cube(
+        cls,
+        collections: List["ProfileDataCollection"],
+        depths: Optional[np.ndarray] = None,
+        depth_step: float = 1.0,
+        depth_datum: str = "snow_height"
+    ) -> "xr.Dataset":
+        """
+        Regrid the profiles of collections onto a common depth axis. The
+        'value' variable has a profile and a depth dimension. The site,
+        time (UTC), latitude, longitude, variable code and unit of each
+        profile are coordinates along the profile dimension, so a variable
+        is selected with ds.where(ds.variable == code, drop=True).
+        Profiles of layers take the value of the layer containing a depth,
+        point measurements are interpolated.
+
+        Args:
+            collections: collections to regrid
+            depths: Optional depth axis. Defaults to a regular axis with
+                depth_step spacing covering all profiles.
+            depth_step: spacing of the default depth axis
+            depth_datum: 'snow_height' or 'surface_datum', see
+                standardize_depth
+
+        Returns:
+            The profile cube
+        """
+        from . import cube
+
+        profiles = cube.cube_profiles(collections)
+        if depths is None:
+            depths = cube.common_depths(profiles, depth_step, depth_datum)
+        return cube.build_cube(profiles, depths, depth_datum=depth_datum)
+
+    @classmethod
+    def write_zarr(
+        cls,
+        collections: List["ProfileDataCollection"],
+        store: Union[str, Path],
+        chunks: Optional[Dict[str, int]] = None,
+        append: bool = False,
+        depths: Optional[np.ndarray] = None,
+        depth_step: float = 1.0,
+        depth_datum: str = "snow_height"
+    ):
+        """
+        Write the profile cube of collections to a chunked Zarr store. See
+        to_cube.
+
+        Args:
+            collections: collections to write
+            store: path of the Zarr store
+            chunks: chunk size per dimension, see cube.DEFAULT_CHUNKS
+            append: add the profiles to an existing store. The depth axis
+                and datum of the store are used and only the new profiles
+                are written.
+            depths: Optional depth axis of a new store
+            depth_step: spacing of the default depth axis of a new store
+            depth_datum: 'snow_height' or 'surface_datum' of a new store
+        """
+        from . import cube
+
+        existing = cube.store_depth_axis(store) if append else None
+        if existing is not None:
+            depths, depth_datum = existing
+        ds = cls.to_cube(
+            collections, depths=depths, depth_step=depth_step,
+            depth_datum=depth_datum
+        )
+        if existing is not None:
+            ds.to_zarr(store, append_dim=cube.PROFILE_DIM)
+        else:
+            ds.to_zarr(
+                store, mode="w", encoding=cube.chunk_encoding(ds, chunks)
+            )
+
+    @classmethod
+    def write_netcdf(
+        cls,
+        collections: List["ProfileDataCollection"],
+        path: Union[str, Path],
+        chunks: Optional[Dict[str, int]] = None,
+        depths: Optional[np.ndarray] = None,
+        depth_step: float = 1.0,
+        depth_datum: str = "snow_height"
+    ):
+        """
+        Write the profile cube of collections to a chunked NetCDF file with
+        an unlimited profile dimension. See to_cube and write_zarr.
+        """
+        from . import cube
+
+        ds = cls.to_cube(
+            collections, depths=depths, depth_step=depth_step,
+            depth_datum=depth_datum
+        )
+        ds.to_netcdf(
+            path,
+            encoding=cube.chunk_encoding(
+                ds, chunks, key="chunksizes", limit=True
+            ),
+            unlimited_dims=[cube.PROFILE_DIM]
+        )
+
+    def to_parquet(self, path: Union[str, Path], overwrite: bool = False):
+        """
+        Write this collection as a GeoParquet dataset. See write_parquet.
+        """
+        self.write_parquet([self], path, overwrite=overwrite)
+
+    @classmethod
+    def write_parquet(
+        cls,
+        collections: List["ProfileDataCollection"],
+        path: Union[str, Path],
+        overwrite: bool = False
+    ):
+        """
+        Write collections as a GeoParquet dataset. The layers of all
+        profiles are one long table, with a row per layer and the values of
+        the profile variable in one column. The table is partitioned by
+        campaign and variable. The metadata, variable and unit of each
+        profile are in a companion table, and the metadata and units map of
+        each collection in another.
+
+        Args:
+            collections: collections to write
+            path: directory of the dataset
+            overwrite: replace an existing dataset at path
+        """
+        path = Path(path)
+        if path.exists() and any(path.iterdir()):
+            if not overwrite:
+                raise FileExistsError(f"{path} already exists")
+            shutil.rmtree(path)
+        path.mkdir(parents=True, exist_ok=True)
+
+        records = []
+        collection_records = []
+        partitions = {}
+        for collection_id, collection in enumerate(collections):
+            collection_records.append(
+                parquet.collection_record(collection, collection_id)
+            )
+            for profile_index, profile in enumerate(collection.profiles):
+                profile_id = len(records)
+                record = parquet.profile_record(
+                    profile, profile_id, collection_id, profile_index
+                )
+                records.append(record)
+                if record["partition"] is not None:
+                    partitions.setdefault(record["partition"], []).append(
+                        parquet.profile_rows(profile, profile_id)
+                    )
+
+        for partition, frames in partitions.items():
+            filename = path.joinpath(partition)
+            filename.parent.mkdir(parents=True, exist_ok=True)
+            pd.concat(frames, ignore_index=True).to_parquet(
+                filename, index=False
+            )
+        pd.DataFrame(records, columns=parquet.RECORD_COLUMNS).to_parquet(
+            path.joinpath(parquet.PROFILE_TABLE), index=False
+        )
+        pd.DataFrame(
+            collection_records, columns=parquet.COLLECTION_COLUMNS
+        ).to_parquet(path.joinpath(parquet.COLLECTION_TABLE), index=False)
+        LOG.debug(
+            f"Wrote {len(records)} profiles in {len(partitions)} partitions"
+            f" to {path}"
+        )
+
+    @classmethod
+    def from_parquet(
+        cls,
+        path: Union[str, Path],
+        variables: Optional[List[str]] = None,
+        campaigns: Optional[List[str]] = None,
+        **parser_kwargs
+    ) -> List["ProfileDataCollection"]:
+        """
+        Read collections written with write_parquet. Only the partitions of
+        the requested campaigns and variables are read. Without a filter,
+        collections without profiles are read too.
+
+        Args:
+            path: directory of the dataset
+            variables: Optional variable codes to read
+            campaigns: Optional campaign names to read
+            parser_kwargs: Arguments for the metadata parser of the
+                profiles. See from_csv
+
+        Returns:
+            One collection per written collection with matching profiles
+        """
+        path = Path(path)
+        records = pd.read_parquet(path.joinpath(parquet.PROFILE_TABLE))
+        if variables is not None:
+            records = records[records["variable_code"].isin(variables)]
+        if campaigns is not None:
+            records = records[records["campaign_name"].isin(campaigns)]
+        records = records.sort_values(["collection_id", "profile_index"])
+        collections = pd.read_parquet(
+            path.joinpath(parquet.COLLECTION_TABLE)
+        ).sort_values("collection_id")
+        if variables is not None or campaigns is not None:
+            collections = collections[
+                collections["collection_id"].isin(records["collection_id"])
+            ]
+
+        rows = parquet.read_partitions(
+            path, records["partition"].dropna().unique().tolist()
+        )
+        rows_by_profile = dict(
+            tuple(rows.groupby(parquet.PROFILE_ID_COLUMN, sort=False))
+        )
+        records_by_collection = {
+            collection_id: group.to_dict("records")
+            for collection_id, group in records.groupby("collection_id")
+        }
+
+        result = []
+        for collection_record in collections.to_dict("records"):
+            meta_parser = cls._build_meta_parser(
+                units_map=parquet.units_from_record(collection_record),
+                **parser_kwargs
+            )
+            metadata = parquet.metadata_from_record(collection_record)
+            profiles = []
+            for record in records_by_collection.get(
+                collection_record["collection_id"], []
+            ):
+                variable = parquet.variable_from_record(record)
+                profile = cls.PROFILE_DATA_CLASS(
+                    meta_parser=meta_parser, variable=variable
+                )
+                if record["n_rows"] > 0:
+                    columns_map = {
+                        c.code: c for c in profile.shared_column_options()
+                    }
+                    columns_map[variable.code] = variable
+                    profile.from_dataframe(
+                        parquet.data_from_rows(
+                            rows_by_profile[record[parquet.PROFILE_ID_COLUMN]],
+                            record, variable
+                        ),
+                        metadata,
+                        {c: columns_map[c] for c in record["columns"]}
+                    )
+                else:
+                    profile.metadata = metadata
+                profiles.append(profile)
+            result.append(cls(profiles, metadata))
+        return result
+
+    @classmethod
+    def _build_meta_parser(
+        cls,
+        timezone="US/Mountain",
+        header_sep=PROFILE_DATA_CLASS.META_PARSER.DEFAULT_HEADER_SEPARATOR,
+        site_id=None,
+        campaign_name=None,
+        allow_map_failure=False,
+        metadata_variable_file=None,
+        primary_variable_file=None,
+        units_map=None
+    ) -> MetaDataParser:
+        """
+        Create the metadata parser for reading files of this collection.
+        See from_csv for the arguments, units_map is an optional map of
+        the variable codes to their units.
+        """
         # TODO: timezone here (mapped from site?)
-        meta_parser = cls.PROFILE_DATA_CLASS.META_PARSER(
+        return cls.PROFILE_DATA_CLASS.META_PARSER(
             timezone,
             primary_variable_file=primary_variable_file,
             metadata_variable_file=metadata_variable_file,
@@ -157,16 +1121,17 @@ class ProfileDataCollection:
             _id=site_id,
             campaign_name=campaign_name,
             allow_map_failures=allow_map_failure,
-            allow_split_lines=True
+            allow_split_lines=True,
+            units_map=units_map
         )
 
-        profiles, metadata = cls._read_csv(filename, meta_parser)
-
-        # ignore profiles with the name 'ignore'
-        profiles = [
+    @staticmethod
+    def _keep_profiles(profiles: List[ProfileData]) -> List[ProfileData]:
+        """
+        Drop the profiles of variables with the code 'ignore'
+        """
+        return [
             p for p in profiles if
             # Keep the profile if it is None because we need the metadata
             (p.variable is None or p.variable.code != "ignore")
         ]
-
-        return cls(profiles, metadata)
@@ -0,0 +1,114 @@
+import hashlib
+import logging
+from itertools import product
+from typing import List, Optional
+
+import numpy as np
+
+from .colocate import cartesian, distance_to_chord
+
+LOG = logging.getLogger(__name__)
+
+# Digits of the representative location hashed into a cluster id
+ID_PRECISION = 6
+
+
+def _find(parents: np.ndarray, i: int) -> int:
+    root = i
+    while parents[root] != root:
+        root = parents[root]
+    # Compress the path for later lookups
+    while parents[i] != root:
+        parents[i], i = root, parents[i]
+    return root
+
+
+def _link(
+    xyz: np.ndarray, tolerance: float
+) -> np.ndarray:
+    """
+    Cluster of every point, linking points within a chord length. Points
+    are hashed to cubic cells of that size, so only points in the same or
+    a neighboring cell are compared.
+    """
+    parents = np.arange(len(xyz))
+    if len(xyz) == 0:
+        return parents
+    cells = np.floor(xyz / tolerance).astype(np.int64)
+    occupied, inverse = np.unique(cells, axis=0, return_inverse=True)
+    inverse = np.asarray(inverse).reshape(-1)
+    order = np.argsort(inverse, kind="stable")
+    splits = np.cumsum(np.bincount(inverse))[:-1]
+    members = dict(zip(map(tuple, occupied), np.split(order, splits)))
+
+    # Half of the neighbors, so each pair of cells is compared once
+    offsets = [o for o in product((-1, 0, 1), repeat=3) if o >= (0, 0, 0)]
+    for cell, points in members.items():
+        for offset in offsets:
+            neighbor = (cell[0] + offset[0], cell[1] + offset[1],
+                        cell[2] + offset[2])
+            if neighbor not in members:
+                continue
+            others = members[neighbor]
+            distances = np.linalg.norm(
+                xyz[points][:, None, :] - xyz[others][None, :, :], axis=2
+            )
+            for i, j in zip(*np.nonzero(distances <= tolerance)):
+                a, b = _find(parents, points[i]), _find(parents, others[j])
+                if a != b:
+                    parents[max(a, b)] = min(a, b)
+    return np.array([_find(parents, i) for i in range(len(xyz))])
+
+
+def cluster_id(latitude: float, longitude: float) -> str:
+    """
+    Id of a cluster from its representative location
+    """
+    key = f"{latitude:.{ID_PRECISION}f},{longitude:.{ID_PRECISION}f}"
+    return hashlib.blake2b(key.encode(), digest_size=6).hexdigest()
+
+
+def cluster_locations(
+    latitudes: np.ndarray,
+    longitudes: np.ndarray,
+    tolerance: float = 10.0
+) -> List[Optional[str]]:
+    """
+    Cluster locations that are connected by steps within a distance. The
+    id of a cluster is derived from its southernmost, then westernmost
+    location, so it does not depend on the order of the locations and
+    does not change when unrelated locations are added.
+
+    Args:
+        latitudes: latitude of every item
+        longitudes: longitude of every item
+        tolerance: largest distance in meters between neighbors in a
+            cluster
+
+    Returns:
+        Cluster id of every item, None for items without a location
+    """
+    locations = np.column_stack([
+        np.asarray(latitudes, dtype=float),
+        np.asarray(longitudes, dtype=float)
+    ])
+    valid = ~np.isnan(locations).any(axis=1)
+    # Repeat visits at the same location are clustered once
+    unique, inverse = np.unique(
+        locations[valid], axis=0, return_inverse=True
+    )
+    inverse = np.asarray(inverse).reshape(-1)
+    roots = _link(
+        cartesian(unique[:, 0], unique[:, 1]), distance_to_chord(tolerance)
+    )
+    # unique is sorted by latitude then longitude, so the root of a
+    # cluster is its representative location
+    ids = [cluster_id(*unique[root]) for root in roots]
+    LOG.debug(
+        f"Clustered {len(unique)} locations into {len(set(ids))} sites"
+    )
+
+    result = [None] * len(locations)
+    for position, i in zip(np.flatnonzero(valid), inverse):
+        result[position] = ids[i]
+    return result
@@ -0,0 +1,209 @@
+import logging
+from typing import List, Optional
+
+import numpy as np
+import pandas as pd
+
+from .spatial import EARTH_RADIUS
+
+LOG = logging.getLogger(__name__)
+
+# Index levels of metloom station data
+STATION_INDEX = ["datetime", "site"]
+STATION_COLUMN = "station"
+# Columns metloom adds to the station data that are not readings
+STATION_METADATA_COLUMNS = ["geometry", "datasource", "measurementDate"]
+PIT_COLUMNS = ["site_name", "date_time", "latitude", "longitude"]
+
+
+def cartesian(latitudes: np.ndarray, longitudes: np.ndarray) -> np.ndarray:
+    """
+    Earth centered coordinates in meters of points on a spherical earth.
+    Euclidean distances between them increase with the great circle
+    distance, so nearest neighbors agree across UTM zones.
+    """
+    lat = np.radians(np.asarray(latitudes, dtype=float))
+    lon = np.radians(np.asarray(longitudes, dtype=float))
+    return EARTH_RADIUS * np.column_stack([
+        np.cos(lat) * np.cos(lon), np.cos(lat) * np.sin(lon), np.sin(lat)
+    ])
+
+
+def chord_to_distance(chord: np.ndarray) -> np.ndarray:
+    """
+    Great circle distances in meters of chord lengths from cartesian
+    """
+    return 2 * EARTH_RADIUS * np.arcsin(
+        np.clip(chord / (2 * EARTH_RADIUS), 0, 1)
+    )
+
+
+def distance_to_chord(distance: float) -> float:
+    return 2 * EARTH_RADIUS * np.sin(
+        min(distance, np.pi * EARTH_RADIUS) / (2 * EARTH_RADIUS)
+    )
+
+
+def station_readings(stations: pd.DataFrame) -> pd.DataFrame:
+    """
+    Readings of a metloom style station table with station and UTC
+    datetime columns. The table is indexed by (datetime, site) or has
+    those columns, and has a point geometry column or latitude and
+    longitude columns.
+
+    Raises:
+        ValueError: if the table has no station, time or location
+    """
+    df = stations
+    if any(name in STATION_INDEX for name in df.index.names):
+        df = df.reset_index()
+    missing = [c for c in STATION_INDEX if c not in df.columns]
+    if missing:
+        raise ValueError(f"Station table is missing {missing}")
+    df = pd.DataFrame(df).rename(columns={"site": STATION_COLUMN})
+    if "latitude" not in df.columns or "longitude" not in df.columns:
+        if "geometry" not in df.columns:
+            raise ValueError("Station table has no station locations")
+        df["latitude"] = [g.y for g in df["geometry"]]
+        df["longitude"] = [g.x for g in df["geometry"]]
+    df["datetime"] = pd.to_datetime(df["datetime"], utc=True)
+    return df.drop(
+        columns=[c for c in STATION_METADATA_COLUMNS if c in df.columns]
+    )
+
+
+def station_locations(readings: pd.DataFrame) -> pd.DataFrame:
+    """
+    Location of every station in readings from station_readings
+    """
+    return readings.groupby(STATION_COLUMN, sort=True)[
+        ["latitude", "longitude"]
+    ].first().reset_index()
+
+
+def pit_table(collections: list) -> pd.DataFrame:
+    """
+    Site, UTC time and location of every collection
+    """
+    df = pd.DataFrame(
+        [[getattr(c.metadata, name) for name in PIT_COLUMNS]
+         for c in collections],
+        columns=PIT_COLUMNS
+    )
+    df["date_time"] = pd.to_datetime(df["date_time"], utc=True)
+    return df
+
+
+def nearest_stations(
+    pits: pd.DataFrame,
+    locations: pd.DataFrame,
+    k: int = 1,
+    max_distance: Optional[float] = None
+) -> pd.DataFrame:
+    """
+    The k nearest stations of every pit from a KD-tree of the station
+    locations
+
+    Args:
+        pits: pits from pit_table
+        locations: stations from station_locations
+        k: number of stations per pit
+        max_distance: Optional distance in meters beyond which stations
+            are not paired
+
+    Returns:
+        One row per pair with the pit position, station, distance in
+        meters and rank of the station, nearest first
+    """
+    from scipy.spatial import cKDTree
+
+    located = pits[["latitude", "longitude"]].notna().all(axis=1).to_numpy()
+    k = min(k, len(locations))
+    if k < 1 or not located.any():
+        return pd.DataFrame({
+            "pit": np.array([], dtype=int),
+            STATION_COLUMN: np.array([], dtype=object),
+            "distance": np.array([], dtype=float),
+            "rank": np.array([], dtype=int),
+        })
+
+    tree = cKDTree(cartesian(locations["latitude"], locations["longitude"]))
+    upper_bound = np.inf if max_distance is None \
+        else distance_to_chord(max_distance) * (1 + 1e-9)
+    chords, stations = tree.query(
+        cartesian(pits["latitude"][located], pits["longitude"][located]),
+        k=k, distance_upper_bound=upper_bound
+    )
+    chords = np.asarray(chords).reshape(-1, k)
+    stations = np.asarray(stations).reshape(-1, k)
+    # Missing neighbors are at an infinite distance
+    found = np.isfinite(chords)
+    pairs = pd.DataFrame({
+        "pit": np.repeat(np.flatnonzero(located), k)[found.ravel()],
+        STATION_COLUMN: locations[STATION_COLUMN].to_numpy()[
+            stations[found]
+        ],
+        "distance": chord_to_distance(chords[found]),
+        "rank": np.tile(np.arange(1, k + 1), len(chords))[found.ravel()],
+    })
+    return pairs
+
+
+def colocate(
+    collections: list,
+    stations: pd.DataFrame,
+    k: int = 1,
+    max_distance: Optional[float] = None,
+    tolerance: Optional[pd.Timedelta] = None,
+    variables: Optional[List[str]] = None
+) -> pd.DataFrame:
+    """
+    Pair every pit with its nearest stations and the station readings
+    nearest in time to the pit
+
+    Args:
+        collections: pits to pair
+        stations: metloom style station table, see station_readings
+        k: number of stations per pit
+        max_distance: Optional distance in meters beyond which stations
+            are not paired
+        tolerance: Optional largest time difference to a reading. Pairs
+            without a reading within it have no values.
+        variables: Optional reading columns to join, all by default
+
+    Returns:
+        One row per pit and station, in pit order and nearest station
+        first, with the pit site, time and location, the pit position in
+        collections, the station, its distance in meters and rank, the
+        reading time and the readings
+    """
+    readings = station_readings(stations)
+    if variables is None:
+        variables = [
+            c for c in readings.columns
+            if c not in [STATION_COLUMN, "datetime", "latitude", "longitude"]
+        ]
+    pits = pit_table(collections)
+    pairs = nearest_stations(
+        pits, station_locations(readings), k=k, max_distance=max_distance
+    )
+    pits = pits.rename(columns={
+        "latitude": "pit_latitude", "longitude": "pit_longitude"
+    })
+    pairs = pits.iloc[pairs["pit"].to_numpy()].reset_index(drop=True).join(
+        pairs.reset_index(drop=True)
+    )
+
+    # Pairs without a pit time keep no reading
+    timed = pairs["date_time"].notna()
+    joined = pd.merge_asof(
+        pairs[timed].sort_values("date_time"),
+        readings[[STATION_COLUMN, "datetime"] + variables].dropna(
+            subset=["datetime"]
+        ).sort_values("datetime"),
+        left_on="date_time", right_on="datetime", by=STATION_COLUMN,
+        direction="nearest", tolerance=tolerance
+    )
+    result = pd.concat([joined, pairs[~timed]], ignore_index=True)
+    LOG.debug(f"Paired {len(pits)} pits with {len(result)} stations")
+    return result.sort_values(["pit", "rank"]).reset_index(drop=True)
@@ -0,0 +1,214 @@
+import logging
+from pathlib import Path
+from typing import Dict, List, Optional, Tuple, Union
+
+import numpy as np
+import pandas as pd
+import xarray as xr
+
+from insitupy.profiles.base import ProfileData
+
+LOG = logging.getLogger(__name__)
+
+PROFILE_DIM = "profile"
+DEPTH_DIM = "depth"
+VALUE_VARIABLE = "value"
+DEPTH_DATUMS = ["snow_height", "surface_datum"]
+# Chunk sizes along the cube dimensions
+DEFAULT_CHUNKS = {PROFILE_DIM: 256, DEPTH_DIM: 512}
+
+
+def regrid_profile(
+    profile: ProfileData, depths: np.ndarray, depth_datum: str = "snow_height"
+) -> np.ndarray:
+    """
+    Values of a profile on a depth axis. Layered profiles take the value of
+    the layer that contains a depth, profiles of point measurements are
+    linearly interpolated. Depths outside of the profile are NaN.
+
+    Args:
+        profile: profile with numeric values
+        depths: depth axis in the depth datum
+        depth_datum: 'snow_height' or 'surface_datum', see standardize_depth
+
+    Returns:
+        Array of the values at the depths
+    """
+    top, bottom = profile.layer_depths(depth_datum)
+    values = pd.to_numeric(
+        profile.df[profile.variable.code], errors="coerce"
+    ).to_numpy(dtype=float)
+    keep = ~np.isnan(top)
+    if bottom is not None:
+        keep &= ~np.isnan(bottom)
+
+    if bottom is None:
+        order = np.argsort(top[keep])
+        return np.interp(
+            depths, top[keep][order], values[keep][order],
+            left=np.nan, right=np.nan
+        )
+
+    lower = np.minimum(top, bottom)[keep]
+    upper = np.maximum(top, bottom)[keep]
+    values = values[keep]
+    order = np.argsort(lower)
+    lower, upper, values = lower[order], upper[order], values[order]
+    index = np.searchsorted(lower, depths, side="right") - 1
+    inside = index >= 0
+    index = np.clip(index, 0, None)
+    inside &= depths <= upper[index]
+    return np.where(inside, values[index], np.nan)
+
+
+def common_depths(
+    profiles: List[ProfileData],
+    depth_step: float = 1.0,
+    depth_datum: str = "snow_height"
+) -> np.ndarray:
+    """
+    Regular depth axis covering all profiles
+
+    Args:
+        profiles: profiles to cover
+        depth_step: spacing of the depths
+        depth_datum: 'snow_height' or 'surface_datum'
+    """
+    extents = []
+    for profile in profiles:
+        for depths in profile.layer_depths(depth_datum):
+            if depths is not None and not np.isnan(depths).all():
+                extents += [np.nanmin(depths), np.nanmax(depths)]
+    if not extents:
+        return np.array([], dtype=float)
+    start = np.floor(min(extents) / depth_step) * depth_step
+    return np.arange(start, max(extents) + depth_step / 2, depth_step)
+
+
+def _is_numeric(profile: ProfileData) -> bool:
+    return pd.api.types.is_numeric_dtype(profile.df[profile.variable.code])
+
+
+def build_cube(
+    profiles: List[ProfileData],
+    depths: np.ndarray,
+    depth_datum: str = "snow_height"
+) -> xr.Dataset:
+    """
+    Dataset of profile values on a common depth axis. The site, time,
+    location, variable and unit of each profile are coordinates along the
+    profile dimension.
+
+    Args:
+        profiles: profiles with numeric values
+        depths: common depth axis in the depth datum
+        depth_datum: 'snow_height' or 'surface_datum'
+    """
+    if depth_datum not in DEPTH_DATUMS:
+        raise ValueError(
+            f"{depth_datum} is not a valid depth datum. Options are:"
+            f" {DEPTH_DATUMS}"
+        )
+    values = np.full((len(profiles), len(depths)), np.nan)
+    for i, profile in enumerate(profiles):
+        values[i] = regrid_profile(profile, depths, depth_datum)
+
+    def _profile_coordinate(values):
+        return PROFILE_DIM, np.array(values, dtype=object)
+
+    times = pd.DatetimeIndex([
+        pd.Timestamp(p.metadata.date_time) for p in profiles
+    ])
+    if times.tz is not None:
+        times = times.tz_convert("UTC").tz_localize(None)
+
+    return xr.Dataset(
+        {VALUE_VARIABLE: ((PROFILE_DIM, DEPTH_DIM), values)},
+        coords={
+            DEPTH_DIM: (DEPTH_DIM, np.asarray(depths, dtype=float), {
+                "depth_datum": depth_datum
+            }),
+            "site": _profile_coordinate(
+                [p.metadata.site_name for p in profiles]
+            ),
+            "time": (PROFILE_DIM, times.to_numpy(), {"timezone": "UTC"}),
+            "latitude": (
+                PROFILE_DIM,
+                np.array([p.metadata.latitude for p in profiles], dtype=float)
+            ),
+            "longitude": (
+                PROFILE_DIM,
+                np.array([p.metadata.longitude for p in profiles], dtype=float)
+            ),
+            "variable": _profile_coordinate(
+                [p.variable.code for p in profiles]
+            ),
+            "unit": _profile_coordinate(
+                [p.units_map.get(p.variable.code) or "" for p in profiles]
+            ),
+        },
+        attrs={"depth_datum": depth_datum},
+    )
+
+
+def cube_profiles(collections: list) -> List[ProfileData]:
+    """
+    Profiles of collections that can be regridded. Profiles without data
+    and with non numeric values are skipped.
+    """
+    profiles = []
+    for collection in collections:
+        for profile in collection.profiles:
+            if profile.df is None or profile.df.empty:
+                continue
+            if not _is_numeric(profile):
+                LOG.warning(
+                    f"Skipping {profile.variable.code} of"
+                    f" {profile.metadata.site_name}, values are not numeric"
+                )
+                continue
+            profiles.append(profile)
+    return profiles
+
+
+def chunk_encoding(
+    ds: xr.Dataset,
+    chunks: Optional[Dict[str, int]] = None,
+    key: str = "chunks",
+    limit: bool = False
+) -> dict:
+    """
+    Encoding of the chunk sizes of all variables with dimensions
+
+    Args:
+        ds: dataset to encode
+        chunks: chunk size per dimension, DEFAULT_CHUNKS when not given
+        key: encoding key of the chunk sizes of the backend
+        limit: limit chunks to the dimension sizes
+    """
+    chunks = {**DEFAULT_CHUNKS, **(chunks or {})}
+    encoding = {}
+    for name, variable in ds.variables.items():
+        if not variable.dims:
+            continue
+        sizes = []
+        for dim in variable.dims:
+            size = chunks.get(dim, ds.sizes[dim])
+            if limit:
+                size = min(size, ds.sizes[dim])
+            sizes.append(max(size, 1))
+        encoding[name] = {key: tuple(sizes)}
+    return encoding
+
+
+def store_depth_axis(
+    store: Union[str, Path]
+) -> Optional[Tuple[np.ndarray, str]]:
+    """
+    Depth axis and depth datum of an existing Zarr store, None if there is
+    no store
+    """
+    if not Path(store).exists():
+        return None
+    with xr.open_zarr(store) as existing:
+        return existing[DEPTH_DIM].values, existing.attrs["depth_datum"]
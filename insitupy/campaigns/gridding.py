@@ -0,0 +1,210 @@
+import logging
+from typing import Optional, Tuple
+
+import numpy as np
+
+LOG = logging.getLogger(__name__)
+
+GRID_STATISTICS = ["mean", "median", "count", "sum"]
+
+# (min x, min y, max x, max y)
+Bounds = Tuple[float, float, float, float]
+
+
+def grid_axes(
+    x: np.ndarray,
+    y: np.ndarray,
+    resolution: float,
+    bounds: Optional[Bounds] = None
+) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Cell centers of a regular grid. The grid is aligned to multiples of
+    the resolution and covers the bounds, or all points when not given.
+
+    Args:
+        x: x coordinates of the points
+        y: y coordinates of the points
+        resolution: cell size in CRS units
+        bounds: Optional (min x, min y, max x, max y) of the grid
+
+    Returns:
+        x and y of the cell centers, increasing
+    """
+    if resolution <= 0:
+        raise ValueError("The resolution must be positive")
+    if bounds is None:
+        valid = ~(np.isnan(x) | np.isnan(y))
+        if not valid.any():
+            return np.array([], dtype=float), np.array([], dtype=float)
+        bounds = (
+            np.min(x[valid]), np.min(y[valid]),
+            np.max(x[valid]), np.max(y[valid])
+        )
+    min_x, min_y, max_x, max_y = bounds
+
+    def _axis(start, end):
+        start = np.floor(start / resolution) * resolution
+        n = max(int(np.floor((end - start) / resolution)) + 1, 1)
+        return start + resolution * (np.arange(n) + 0.5)
+
+    return _axis(min_x, max_x), _axis(min_y, max_y)
+
+
+def _cells(
+    x: np.ndarray, y: np.ndarray, x_axis: np.ndarray, y_axis: np.ndarray,
+    resolution: float
+) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Flat cell index of every point and whether it falls on the grid
+    """
+    if len(x_axis) == 0 or len(y_axis) == 0:
+        return np.array([], dtype=np.int64), np.zeros(len(x), dtype=bool)
+    columns = np.floor(
+        (x - (x_axis[0] - resolution / 2)) / resolution
+    )
+    rows = np.floor(
+        (y - (y_axis[0] - resolution / 2)) / resolution
+    )
+    inside = (columns >= 0) & (columns < len(x_axis)) & \
+        (rows >= 0) & (rows < len(y_axis))
+    cells = rows[inside].astype(np.int64) * len(x_axis) + \
+        columns[inside].astype(np.int64)
+    return cells, inside
+
+
+def _binned_median(
+    cells: np.ndarray, values: np.ndarray, n_cells: int
+) -> np.ndarray:
+    """
+    Median of the values of every cell from one sort of all points
+    """
+    result = np.full(n_cells, np.nan)
+    if len(cells) == 0:
+        return result
+    order = np.lexsort((values, cells))
+    cells, values = cells[order], values[order]
+    counts = np.bincount(cells, minlength=n_cells)
+    occupied = np.flatnonzero(counts)
+    starts = np.concatenate([[0], np.cumsum(counts)])[occupied]
+    counts = counts[occupied]
+    lower = values[starts + (counts - 1) // 2]
+    upper = values[starts + counts // 2]
+    result[occupied] = (lower + upper) / 2
+    return result
+
+
+def bin_points(
+    x: np.ndarray,
+    y: np.ndarray,
+    values: np.ndarray,
+    resolution: float,
+    how: str = "mean",
+    bounds: Optional[Bounds] = None
+) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """
+    Statistic of the point values in every grid cell, accumulated with
+    bincount. Points with a NaN coordinate or value are ignored, cells
+    without points are NaN except for the count.
+
+    Args:
+        x: x coordinates of the points
+        y: y coordinates of the points
+        values: value of every point
+        resolution: cell size in CRS units
+        how: one of GRID_STATISTICS
+        bounds: Optional (min x, min y, max x, max y) of the grid, see
+            grid_axes
+
+    Returns:
+        The grid with a row per y, and the x and y of the cell centers
+    """
+    if how not in GRID_STATISTICS:
+        raise ValueError(
+            f"{how} is not a valid statistic. Options are: {GRID_STATISTICS}"
+        )
+    x, y, values = [np.asarray(a, dtype=float) for a in (x, y, values)]
+    valid = ~(np.isnan(x) | np.isnan(y) | np.isnan(values))
+    x, y, values = x[valid], y[valid], values[valid]
+    x_axis, y_axis = grid_axes(x, y, resolution, bounds=bounds)
+    n_cells = len(x_axis) * len(y_axis)
+    cells, inside = _cells(x, y, x_axis, y_axis, resolution)
+    values = values[inside]
+
+    counts = np.bincount(cells, minlength=n_cells)
+    if how == "count":
+        grid = counts.astype(float)
+    elif how == "median":
+        grid = _binned_median(cells, values, n_cells)
+    else:
+        sums = np.bincount(cells, weights=values, minlength=n_cells)
+        with np.errstate(invalid="ignore", divide="ignore"):
+            grid = sums if how == "sum" else sums / counts
+        grid[counts == 0] = np.nan
+    return grid.reshape(len(y_axis), len(x_axis)), x_axis, y_axis
+
+
+def idw(
+    x: np.ndarray,
+    y: np.ndarray,
+    values: np.ndarray,
+    x_axis: np.ndarray,
+    y_axis: np.ndarray,
+    power: float = 2.0,
+    k: int = 8,
+    max_distance: Optional[float] = None
+) -> np.ndarray:
+    """
+    Inverse distance weighted values at the grid cell centers from the k
+    nearest points, found with a KD-tree of the points. A cell center on
+    a point takes its value.
+
+    Args:
+        x: x coordinates of the points
+        y: y coordinates of the points
+        values: value of every point
+        x_axis: x of the cell centers
+        y_axis: y of the cell centers
+        power: power of the inverse distance
+        k: number of points per cell
+        max_distance: Optional distance beyond which points are not used.
+            Cells without points are NaN.
+
+    Returns:
+        The grid with a row per y
+    """
+    from scipy.spatial import cKDTree
+
+    x, y, values = [np.asarray(a, dtype=float) for a in (x, y, values)]
+    valid = ~(np.isnan(x) | np.isnan(y) | np.isnan(values))
+    x, y, values = x[valid], y[valid], values[valid]
+    shape = (len(y_axis), len(x_axis))
+    k = min(k, len(values))
+    if k < 1 or 0 in shape:
+        return np.full(shape, np.nan)
+
+    tree = cKDTree(np.column_stack([x, y]))
+    grid_x, grid_y = np.meshgrid(x_axis, y_axis)
+    distances, neighbors = tree.query(
+        np.column_stack([grid_x.ravel(), grid_y.ravel()]), k=k,
+        distance_upper_bound=np.inf if max_distance is None
+        else max_distance
+    )
+    distances = np.asarray(distances).reshape(-1, k)
+    neighbors = np.asarray(neighbors).reshape(-1, k)
+    found = np.isfinite(distances)
+    # Missing neighbors point past the end of the values
+    neighbor_values = np.append(values, np.nan)[neighbors]
+
+    with np.errstate(divide="ignore"):
+        weights = np.where(found, 1 / distances ** power, 0.0)
+    exact = distances == 0
+    weights = np.where(
+        exact.any(axis=1, keepdims=True), exact.astype(float), weights
+    )
+    total = weights.sum(axis=1)
+    weighted = np.nansum(
+        weights * np.where(found, neighbor_values, 0), axis=1
+    )
+    with np.errstate(invalid="ignore"):
+        grid = np.where(total > 0, weighted / total, np.nan)
+    return grid.reshape(shape)
@@ -0,0 +1,87 @@
+import logging
+import threading
+from typing import List
+
+from insitupy.profiles.base import MeasurementData
+
+LOG = logging.getLogger(__name__)
+
+
+class ResidentProfiles:
+    """
+    Least recently used set of profiles that have their data loaded.
+    Profiles beyond the limit are unloaded. Profiles stamp their own
+    accesses, see MeasurementData.last_access, so only loads take the
+    lock.
+    """
+    DEFAULT_MAX_RESIDENT = 128
+
+    def __init__(self, max_resident: int = DEFAULT_MAX_RESIDENT):
+        self._max_resident = max_resident
+        self._profiles = {}
+        self._lock = threading.Lock()
+
+    def __len__(self):
+        return len(self._profiles)
+
+    def __contains__(self, profile):
+        return id(profile) in self._profiles
+
+    def touch(self, profile: MeasurementData):
+        """
+        Add a loaded profile and unload the least recently accessed
+        profiles beyond the limit
+        """
+        with self._lock:
+            self._profiles[id(profile)] = profile
+            while len(self._profiles) > self._max_resident:
+                evicted = min(
+                    self._profiles.values(), key=lambda p: p.last_access
+                )
+                del self._profiles[id(evicted)]
+                evicted.unload()
+
+    def clear(self):
+        with self._lock:
+            for profile in self._profiles.values():
+                profile.unload()
+            self._profiles.clear()
+
+
+class CsvProfileLoader:
+    """
+    Loads the data of one profile from its file on first access. Only the
+    columns of the profile are read, starting below the known header.
+    """
+
+    def __init__(
+        self,
+        filename: str,
+        columns: List[str],
+        header_position: int,
+        usecols: List[int],
+        resident: ResidentProfiles
+    ):
+        """
+        Args:
+            filename: file with the profile data
+            columns: all columns in the file
+            header_position: position of the column header in the file
+            usecols: positions of the columns of the profile
+            resident: profiles with loaded data
+        """
+        self._filename = filename
+        self._columns = columns
+        self._header_position = header_position
+        self._usecols = usecols
+        self._resident = resident
+
+    def __call__(self, profile: MeasurementData):
+        if profile.is_loaded:
+            return
+        LOG.debug(f"Loading {profile.variable.code} from {self._filename}")
+        profile.df = profile.read_csv_dataframe(
+            self._filename, self._columns, self._header_position,
+            usecols=self._usecols
+        )
+        self._resident.touch(profile)
@@ -0,0 +1,194 @@
+import json
+import logging
+from dataclasses import fields
+from pathlib import Path
+from typing import List, Optional, Union
+from urllib.parse import quote
+
+import attrs
+import geopandas as gpd
+import numpy as np
+import pandas as pd
+
+from insitupy.profiles.base import ProfileData
+from insitupy.profiles.metadata import ProfileMetaData
+from insitupy.variables import MeasurementDescription
+
+LOG = logging.getLogger(__name__)
+
+# Companion table with one row per profile
+PROFILE_TABLE = "profiles.parquet"
+# Companion table with one row per collection
+COLLECTION_TABLE = "collections.parquet"
+# Name of the data file in every partition
+PARTITION_FILE = "part-0.parquet"
+# Partition value of missing campaign names, as used by Hive and Arrow
+NULL_PARTITION = "__HIVE_DEFAULT_PARTITION__"
+# Column of the long table holding the variable values
+VALUE_COLUMN = "value"
+PROFILE_ID_COLUMN = "profile_id"
+
+METADATA_FIELDS = [f.name for f in fields(ProfileMetaData)]
+VARIABLE_FIELDS = [f.name for f in attrs.fields(MeasurementDescription)]
+# Columns of the companion table
+RECORD_COLUMNS = [
+    PROFILE_ID_COLUMN, "collection_id", "profile_index",
+    *[f"variable_{name}" for name in VARIABLE_FIELDS], "unit",
+    *METADATA_FIELDS, "partition", "columns", "dtypes", "n_rows"
+]
+COLLECTION_COLUMNS = ["collection_id", "units_map", *METADATA_FIELDS]
+
+
+def partition_path(campaign_name: Optional[str], variable: str) -> str:
+    """
+    Relative path of the partition of a campaign and variable
+
+    Args:
+        campaign_name: campaign of the profiles
+        variable: variable code of the profiles
+    """
+    campaign = NULL_PARTITION if campaign_name is None \
+        else quote(campaign_name, safe="")
+    return (
+        f"campaign_name={campaign}/variable={quote(variable, safe='')}/"
+        f"{PARTITION_FILE}"
+    )
+
+
+def profile_record(
+    profile: ProfileData,
+    profile_id: int,
+    collection_id: int,
+    profile_index: int,
+) -> dict:
+    """
+    Row of the companion table for a profile
+
+    Args:
+        profile: profile to describe
+        profile_id: id of the profile rows in the long table
+        collection_id: position of the collection of the profile
+        profile_index: position of the profile in its collection
+    """
+    variable = profile.variable
+    record = {
+        PROFILE_ID_COLUMN: profile_id,
+        "collection_id": collection_id,
+        "profile_index": profile_index,
+        **{
+            f"variable_{name}": getattr(variable, name)
+            for name in VARIABLE_FIELDS
+        },
+        "unit": profile.units_map.get(variable.code),
+        **{name: getattr(profile.metadata, name) for name in METADATA_FIELDS},
+        "partition": None,
+        "columns": [],
+        "dtypes": [],
+        "n_rows": 0,
+    }
+    df = profile.df
+    if df is not None and not df.empty:
+        columns = profile.data_columns
+        record["partition"] = partition_path(
+            profile.metadata.campaign_name, variable.code
+        )
+        record["columns"] = columns
+        record["dtypes"] = [str(df[c].dtype) for c in columns]
+        record["n_rows"] = len(df)
+    return record
+
+
+def collection_record(collection, collection_id: int) -> dict:
+    """
+    Row of the collection table, with the metadata of the collection and
+    the units of all columns of its profiles as JSON
+
+    Args:
+        collection: collection to describe
+        collection_id: position of the collection
+    """
+    units_map = {}
+    for profile in collection.profiles:
+        units_map.update(profile.units_map)
+    return {
+        "collection_id": collection_id,
+        "units_map": json.dumps(units_map, sort_keys=True),
+        **{
+            name: getattr(collection.metadata, name)
+            for name in METADATA_FIELDS
+        },
+    }
+
+
+def units_from_record(record: dict) -> dict:
+    """
+    Units map of a collection from its collection table row
+    """
+    return json.loads(record["units_map"])
+
+
+def profile_rows(profile: ProfileData, profile_id: int) -> gpd.GeoDataFrame:
+    """
+    Rows of the long table for a profile, one per layer
+
+    Args:
+        profile: profile with data
+        profile_id: id of the profile
+    """
+    df = profile.df
+    rows = df.loc[:, profile.data_columns].rename(
+        columns={profile.variable.code: VALUE_COLUMN}
+    )
+    rows.insert(0, PROFILE_ID_COLUMN, profile_id)
+    rows["datetime"] = df["datetime"]
+    return gpd.GeoDataFrame(rows, geometry=df.geometry, crs=df.crs)
+
+
+def metadata_from_record(record: dict) -> ProfileMetaData:
+    """
+    Rebuild the metadata of a profile or collection from its companion
+    table row
+    """
+    values = {name: record[name] for name in METADATA_FIELDS}
+    if isinstance(values["observers"], np.ndarray):
+        values["observers"] = values["observers"].tolist()
+    return ProfileMetaData(**values)
+
+
+def variable_from_record(record: dict) -> MeasurementDescription:
+    """
+    Rebuild the canonical variable of a profile from its companion table row
+    """
+    values = {name: record[f"variable_{name}"] for name in VARIABLE_FIELDS}
+    if values["map_from"] is not None:
+        values["map_from"] = list(values["map_from"])
+    return MeasurementDescription.intern(**values)
+
+
+def data_from_rows(
+    rows: pd.DataFrame, record: dict, variable: MeasurementDescription
+) -> pd.DataFrame:
+    """
+    Rebuild the parsed data of a profile from its long table rows
+    """
+    columns = list(record["columns"])
+    df = pd.DataFrame(rows).rename(columns={VALUE_COLUMN: variable.code})
+    df = df.loc[:, columns].reset_index(drop=True)
+    return df.astype(dict(zip(columns, record["dtypes"])))
+
+
+def read_partitions(
+    path: Union[str, Path], partitions: List[str]
+) -> pd.DataFrame:
+    """
+    Read the long table rows of the given partitions only
+
+    Args:
+        path: root of the dataset
+        partitions: relative paths of the partitions
+    """
+    path = Path(path)
+    frames = [gpd.read_parquet(path.joinpath(p)) for p in partitions]
+    if not frames:
+        return pd.DataFrame(columns=[PROFILE_ID_COLUMN])
+    return pd.concat(frames, ignore_index=True)
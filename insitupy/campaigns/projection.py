@@ -0,0 +1,104 @@
+import logging
+from functools import lru_cache
+from typing import List, Optional, Union
+
+import numpy as np
+import pandas as pd
+import utm
+from pyproj import Transformer
+
+from insitupy.io.yaml_codes import YamlCodes
+from insitupy.profiles.metadata import ProfileMetaData
+
+LOG = logging.getLogger(__name__)
+
+GEOGRAPHIC_CRS = "EPSG:4326"
+XY_COLUMNS = ["site_name", "date_time", "crs", "x", "y"]
+
+
+def crs_key(crs: Union[str, int]) -> str:
+    """
+    Normalized name of a CRS, EPSG codes become 'EPSG:<code>'
+    """
+    crs = str(crs).strip()
+    if crs.isdigit():
+        return f"EPSG:{crs}"
+    if crs.lower().startswith("epsg:"):
+        return f"EPSG:{crs[5:]}"
+    return crs
+
+
+@lru_cache(maxsize=64)
+def transformer(source: str, target: str) -> Transformer:
+    """
+    Transformer between two normalized CRS. Building a transformer is
+    far slower than using it, so they are cached per pair.
+    """
+    LOG.debug(f"Building transformer from {source} to {target}")
+    return Transformer.from_crs(source, target, always_xy=True)
+
+
+def utm_crs(metadata: ProfileMetaData) -> Optional[str]:
+    """
+    UTM CRS of metadata, from utm_epsg or else from the zone of the
+    location. None if neither is known.
+    """
+    if metadata.utm_epsg not in (None, "None", ""):
+        return crs_key(metadata.utm_epsg)
+    if metadata.latitude is None or metadata.longitude is None or \
+            np.isnan(metadata.latitude) or np.isnan(metadata.longitude):
+        return None
+    zone = utm.latlon_to_zone_number(metadata.latitude, metadata.longitude)
+    return crs_key(f"{YamlCodes.UTM_EPSG_PREFIX}{zone:02d}")
+
+
+def project(
+    metadata: List[ProfileMetaData], crs: Optional[Union[str, int]] = None
+) -> pd.DataFrame:
+    """
+    Projected location of every metadata. Locations are grouped by target
+    CRS and every unique location of a group is transformed once, in one
+    call per group.
+
+    Args:
+        metadata: metadata to locate
+        crs: Optional target CRS. Defaults to the UTM zone of each
+            metadata, see utm_crs.
+
+    Returns:
+        One row per metadata with the site, time, target CRS, x and y
+    """
+    df = pd.DataFrame({
+        "site_name": [m.site_name for m in metadata],
+        "date_time": [m.date_time for m in metadata],
+        "crs": [
+            crs_key(crs) if crs is not None else utm_crs(m)
+            for m in metadata
+        ],
+        "latitude": np.array(
+            [m.latitude for m in metadata], dtype=float
+        ),
+        "longitude": np.array(
+            [m.longitude for m in metadata], dtype=float
+        ),
+        "x": np.nan,
+        "y": np.nan,
+    })
+    located = df[["latitude", "longitude"]].notna().all(axis=1)
+    for target, group in df[located].groupby("crs", sort=False):
+        locations, inverse = np.unique(
+            group[["longitude", "latitude"]].to_numpy(), axis=0,
+            return_inverse=True
+        )
+        inverse = np.asarray(inverse).reshape(-1)
+        longitudes, latitudes = locations[:, 0], locations[:, 1]
+        if len(locations) == 1:
+            # pyproj converts one element arrays to scalars, which NumPy
+            # deprecates, so pass the scalars
+            longitudes, latitudes = longitudes.item(), latitudes.item()
+        x, y = transformer(GEOGRAPHIC_CRS, target).transform(
+            longitudes, latitudes
+        )
+        df.loc[group.index, "x"] = np.atleast_1d(x)[inverse]
+        df.loc[group.index, "y"] = np.atleast_1d(y)[inverse]
+    return df[XY_COLUMNS]
@@ -0,0 +1,187 @@
+import logging
+import os
+import struct
+import tempfile
+from pathlib import Path
+from typing import TYPE_CHECKING, List, Optional, Type, Union
+
+from .campaign import ProfileDataCollection
+
+if TYPE_CHECKING:
+    import pyarrow as pa
+
+LOG = logging.getLogger(__name__)
+
+
+class SharedCollections:
+    """
+    Collections published once per machine in a memory mapped file. Each
+    collection is an Arrow IPC stream of ProfileDataCollection.to_arrow in
+    the file. Processes attach to the file by its path and get collections
+    whose numeric profile columns are read only views of the mapped
+    memory, which the operating system holds once for all processes.
+
+    The publishing process owns the file and removes it when done.
+    """
+    # RAM backed directory of the published files when available
+    DEFAULT_DIRECTORY = "/dev/shm" if os.path.isdir("/dev/shm") \
+        else tempfile.gettempdir()
+    SUFFIX = ".arrows"
+    # Header with the number of streams, followed by an entry per stream
+    HEADER = struct.Struct("<Q")
+    # Offset and byte size of a stream
+    ENTRY = struct.Struct("<QQ")
+    # Byte alignment of the streams
+    ALIGNMENT = 64
+
+    def __init__(self, path: Union[str, Path], owner: bool = False):
+        """
+        Use publish or attach instead
+
+        Args:
+            path: file with the published collections
+            owner: the file was published by this object
+        """
+        import pyarrow as pa
+
+        self._path = Path(path)
+        self._owner = owner
+        self._memory = pa.memory_map(str(self._path), "r")
+
+    @property
+    def path(self) -> Path:
+        """
+        Path to attach to from other processes
+        """
+        return self._path
+
+    @property
+    def size(self) -> int:
+        return self._memory.size()
+
+    @classmethod
+    def _align(cls, offset: int) -> int:
+        return -(-offset // cls.ALIGNMENT) * cls.ALIGNMENT
+
+    @classmethod
+    def publish(
+        cls,
+        collections: List[ProfileDataCollection],
+        path: Optional[Union[str, Path]] = None
+    ) -> "SharedCollections":
+        """
+        Write collections to a new file to share
+
+        Args:
+            collections: collections to publish
+            path: Optional path of the file. A unique file in
+                DEFAULT_DIRECTORY is used when not given.
+
+        Returns:
+            The owner of the file
+        """
+        import pyarrow as pa
+
+        if path is None:
+            fd, path = tempfile.mkstemp(
+                suffix=cls.SUFFIX, dir=cls.DEFAULT_DIRECTORY
+            )
+            os.close(fd)
+
+        streams = []
+        for collection in collections:
+            table = collection.to_arrow()
+            sink = pa.BufferOutputStream()
+            with pa.ipc.new_stream(sink, table.schema) as writer:
+                writer.write_table(table)
+            streams.append(sink.getvalue())
+
+        offset = cls._align(cls.HEADER.size + cls.ENTRY.size * len(streams))
+        locations = []
+        for stream in streams:
+            locations.append((offset, stream.size))
+            offset = cls._align(offset + stream.size)
+
+        with open(path, "wb") as f:
+            f.write(cls.HEADER.pack(len(streams)))
+            for start, size in locations:
+                f.write(cls.ENTRY.pack(start, size))
+            for (start, _), stream in zip(locations, streams):
+                f.seek(start)
+                f.write(stream)
+            f.truncate(offset)
+        LOG.debug(
+            f"Published {len(collections)} collections in {offset} bytes"
+            f" to {path}"
+        )
+        return cls(path, owner=True)
+
+    @classmethod
+    def attach(cls, path: Union[str, Path]) -> "SharedCollections":
+        """
+        Attach to a file published by another process
+
+        Args:
+            path: path of the file
+        """
+        return cls(path)
+
+    def tables(self) -> List["pa.Table"]:
+        """
+        Arrow tables of the collections, backed by the mapped memory
+        """
+        import pyarrow as pa
+
+        self._memory.seek(0)
+        buffer = self._memory.read_buffer(self._memory.size())
+        count, = self.HEADER.unpack_from(buffer, 0)
+        locations = [
+            self.ENTRY.unpack_from(
+                buffer, self.HEADER.size + i * self.ENTRY.size
+            ) for i in range(count)
+        ]
+        return [
+            pa.ipc.open_stream(buffer.slice(offset, size)).read_all()
+            for offset, size in locations
+        ]
+
+    def collections(
+        self,
+        collection_class: Type[ProfileDataCollection] = ProfileDataCollection,
+        **parser_kwargs
+    ) -> List[ProfileDataCollection]:
+        """
+        Collections with read only views of the mapped memory as the
+        numeric profile columns
+
+        Args:
+            collection_class: class of the collections
+            parser_kwargs: Arguments for the metadata parser of the
+                profiles. See ProfileDataCollection.from_csv
+        """
+        return [
+            collection_class.from_arrow(t, zero_copy=True, **parser_kwargs)
+            for t in self.tables()
+        ]
+
+    def close(self):
+        """
+        Detach from the file. Collections read from the file keep the
+        mapping alive until they are released.
+        """
+        self._memory.close()
+
+    def unlink(self):
+        """
+        Remove the published file. Only the owner removes it, attached
+        processes keep their mapping.
+        """
+        if self._owner and self._path.exists():
+            self._path.unlink()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *args):
+        self.close()
+        self.unlink()
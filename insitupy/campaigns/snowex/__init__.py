@@ -1,10 +1,15 @@
+from .filenames import SnowExFileIndex, SnowExFilename
 from .snowex_metadata import SnowExMetaDataParser
 from .snowex_campaign import SnowExProfileData
 from .snowex_profile_data_collection import SnowExProfileDataCollection
+from .snowex_pit_assembler import SnowExPitAssembler
 from .variables import snowex_metadata_yaml, snowex_variables_yaml
 
 __all__ = [
+    "SnowExFileIndex",
+    "SnowExFilename",
     "SnowExMetaDataParser",
+    "SnowExPitAssembler",
     "SnowExProfileData",
     "SnowExProfileDataCollection",
     "snowex_metadata_yaml",
@@ -0,0 +1,222 @@
+import logging
+import os
+import re
+from dataclasses import asdict, dataclass
+from pathlib import Path
+from typing import Iterable, List, Optional, Union
+
+import pandas as pd
+
+LOG = logging.getLogger(__name__)
+
+# Pit products, e.g. SNEX20_TS_SP_20200427_0845_COERAP_data_density_v01.csv
+PIT_PATTERN = re.compile(
+    r"^(?P<campaign>SNEX\d{2})_(?P<product>[A-Z][A-Z_]*?)"
+    r"_(?P<date>\d{8})_(?P<time>\d{4})_(?P<site>[^_]+)"
+    r"_(?:data_)?(?P<variable>[A-Za-z]+)_v(?P<version>\d+)\.csv$",
+    re.IGNORECASE
+)
+# SMP profiles, e.g. SNEX20_SMP_S19M1174_2N13_20200206.CSV
+SMP_PATTERN = re.compile(
+    r"^(?P<campaign>SNEX\d{2})_(?P<product>SMP)_S(?P<serial_number>\d{2})"
+    r"M\d+_(?P<site>[^_]+)_(?P<date>\d{8})\.csv$",
+    re.IGNORECASE
+)
+
+# Variable codes that can be in a file of a file name variable
+FILENAME_VARIABLE_CODES = {
+    "density": {"density"},
+    "lwc": {"density", "permittivity", "liquid_water_content"},
+    "temperature": {"snow_temperature"},
+    "force": {"force"},
+}
+
+
+@dataclass(frozen=True)
+class SnowExFilename:
+    """
+    Fields encoded in a SnowEx product file name
+    """
+    path: str
+    campaign: str
+    product: str
+    date: str
+    site: str
+    variable: str
+    time: Optional[str] = None
+    version: Optional[int] = None
+    serial_number: Optional[str] = None
+
+    @classmethod
+    def parse(cls, path: Union[str, Path]) -> Optional["SnowExFilename"]:
+        """
+        Parse a SnowEx file name without opening the file
+
+        Args:
+            path: path to the file
+
+        Returns:
+            The parsed fields or None if the name is not a known product
+        """
+        name = Path(path).name
+        match = PIT_PATTERN.match(name)
+        if match:
+            return cls(
+                path=str(path),
+                campaign=match.group("campaign").upper(),
+                product=match.group("product").upper(),
+                date=match.group("date"),
+                time=match.group("time"),
+                site=match.group("site"),
+                variable=match.group("variable").lower(),
+                version=int(match.group("version")),
+            )
+        match = SMP_PATTERN.match(name)
+        if match:
+            return cls(
+                path=str(path),
+                campaign=match.group("campaign").upper(),
+                product=match.group("product").upper(),
+                date=match.group("date"),
+                site=match.group("site"),
+                variable="force",
+                serial_number=match.group("serial_number"),
+            )
+        return None
+
+    @property
+    def date_time(self) -> pd.Timestamp:
+        """
+        Local date and time of the file name. Midnight when there is no time.
+        """
+        return pd.to_datetime(
+            self.date + (self.time or "0000"), format="%Y%m%d%H%M"
+        )
+
+    @property
+    def variable_codes(self) -> Optional[set]:
+        """
+        Variable codes that can be in the file, None when unknown
+        """
+        return FILENAME_VARIABLE_CODES.get(self.variable)
+
+    @property
+    def product_key(self) -> tuple:
+        """
+        Identity of the product across file versions
+        """
+        return (
+            self.campaign, self.product, self.date, self.time, self.site,
+            self.variable, self.serial_number
+        )
+
+
+class SnowExFileIndex:
+    """
+    Index of SnowEx product files built from file names alone, to prune
+    and route files before reading any of them.
+    """
+    SUFFIXES = (".csv",)
+
+    def __init__(self, entries: List[SnowExFilename]):
+        self._entries = entries
+
+    @classmethod
+    def from_paths(cls, paths: Iterable[Union[str, Path]]):
+        """
+        Index file paths. Names that are not known products are skipped.
+        """
+        entries = []
+        for path in paths:
+            entry = SnowExFilename.parse(path)
+            if entry is None:
+                LOG.debug(f"Skipping {path}, not a known SnowEx product")
+            else:
+                entries.append(entry)
+        return cls(entries)
+
+    @classmethod
+    def from_directories(cls, directories: Iterable[Union[str, Path]]):
+        """
+        Index all files with a known suffix in directory trees
+        """
+        if isinstance(directories, (str, Path)):
+            directories = [directories]
+
+        def _paths():
+            for directory in directories:
+                for root, _, names in os.walk(directory):
+                    for name in sorted(names):
+                        if name.lower().endswith(cls.SUFFIXES):
+                            yield os.path.join(root, name)
+        return cls.from_paths(_paths())
+
+    def __len__(self):
+        return len(self._entries)
+
+    def __iter__(self):
+        for entry in self._entries:
+            yield entry
+
+    @property
+    def entries(self) -> List[SnowExFilename]:
+        return self._entries
+
+    @property
+    def paths(self) -> List[str]:
+        return [e.path for e in self._entries]
+
+    def latest(self) -> "SnowExFileIndex":
+        """
+        Keep only the latest version of every product
+        """
+        latest = {}
+        for entry in self._entries:
+            current = latest.get(entry.product_key)
+            if current is None or \
+                    (entry.version or 0) > (current.version or 0):
+                latest[entry.product_key] = entry
+        return self.__class__(list(latest.values()))
+
+    def select(
+        self,
+        variables: Optional[List[str]] = None,
+        sites: Optional[List[str]] = None,
+        start: Optional[Union[str, pd.Timestamp]] = None,
+        end: Optional[Union[str, pd.Timestamp]] = None,
+    ) -> "SnowExFileIndex":
+        """
+        Select entries by their file name fields. Times are compared against
+        the local file name date and time.
+
+        Args:
+            variables: file name variables, e.g. density or lwc
+            sites: site codes
+            start: earliest date and time, inclusive
+            end: latest date and time, inclusive
+        """
+        variables = {v.lower() for v in variables} if variables else None
+        sites = set(sites) if sites else None
+        start = pd.to_datetime(start) if start is not None else None
+        end = pd.to_datetime(end) if end is not None else None
+        return self.__class__([
+            e for e in self._entries
+            if (variables is None or e.variable in variables) and
+            (sites is None or e.site in sites) and
+            (start is None or e.date_time >= start) and
+            (end is None or e.date_time <= end)
+        ])
+
+    def to_dataframe(self) -> pd.DataFrame:
+        """
+        One row per indexed file with the file name fields
+        """
+        columns = [
+            "path", "campaign", "product", "date", "site", "variable",
+            "time", "version", "serial_number"
+        ]
+        df = pd.DataFrame(
+            [asdict(e) for e in self._entries], columns=columns
+        )
+        df["date_time"] = [e.date_time for e in self._entries]
+        return df
@@ -4,6 +4,7 @@ from pathlib import Path
 import pandas as pd
 
 from insitupy.campaigns.snowex import SnowExMetaDataParser
+from insitupy.campaigns.snowex.filenames import SnowExFilename
 from insitupy.profiles.base import ProfileData, standardize_depth
 
 LOG = logging.getLogger(__name__)
@@ -13,7 +14,9 @@ class SnowExProfileData(ProfileData):
     META_PARSER = SnowExMetaDataParser
 
     @staticmethod
-    def read_csv_dataframe(profile_filename, columns, header_position):
+    def read_csv_dataframe(
+        profile_filename, columns, header_position, usecols=None
+    ):
         """
         Read in a profile file. Managing the number of lines to skip and
         adjusting column names
@@ -23,6 +26,7 @@ class SnowExProfileData(ProfileData):
                              profile
             columns: list of columns to use in dataframe
             header_position: skiprows for pd.read_csv
+            usecols: Optional positions of the columns to read
         Returns:
             df: pd.dataframe with csv data with desired column names
         """
@@ -31,12 +35,14 @@ class SnowExProfileData(ProfileData):
             profile_filename, header=0,
             skiprows=header_position,
             names=columns,
+            usecols=usecols,
             encoding='latin'
         )
         # Special SMP specific tasks
         depth_fmt = 'snow_height'
         is_smp = False
-        if 'force' in df.columns:
+        # Check all columns, the force may not have been read
+        if 'force' in columns:
             # Convert depth from mm to cm
             df['depth'] = df['depth'].div(10)
             is_smp = True
@@ -45,7 +51,11 @@ class SnowExProfileData(ProfileData):
 
             # SMP serial number and original filename for provenance to the comment
             f = Path(profile_filename).name
-            serial_no = f.split('SMP_')[-1][1:3]
+            parsed = SnowExFilename.parse(f)
+            if parsed is not None and parsed.serial_number is not None:
+                serial_no = parsed.serial_number
+            else:
+                serial_no = f.split('SMP_')[-1][1:3]
 
             df['comments'] = f"fname = {f}, " \
                              f"serial no. = {serial_no}"
@@ -1,4 +1,5 @@
 from .variables import snowex_metadata_yaml, snowex_variables_yaml
+from insitupy.io.layouts import LayoutDeclaration
 from insitupy.io.metadata import MetaDataParser
 from insitupy.variables import base_metadata_variables_yaml, \
     base_primary_variables_yaml
@@ -14,3 +15,24 @@ class SnowExMetaDataParser(MetaDataParser):
     DEFAULT_PRIMARY_VARIABLE_FILES = [
         base_primary_variables_yaml, snowex_variables_yaml
     ]
+    # Time series pit products share a ten line header
+    LAYOUT_DECLARATIONS = (
+        LayoutDeclaration(
+            pattern="SNEX20_TS_SP_*_data_density_v*.csv",
+            header_position=10,
+            columns=("top", "bottom", "density_a", "density_b", "density_c")
+        ),
+        LayoutDeclaration(
+            pattern="SNEX20_TS_SP_*_data_LWC_v*.csv",
+            header_position=10,
+            columns=(
+                "top", "bottom", "avg_density", "permittivity_a",
+                "permittivity_b", "lwc_vol_a", "lwc_vol_b"
+            )
+        ),
+        LayoutDeclaration(
+            pattern="SNEX20_TS_SP_*_data_temperature_v*.csv",
+            header_position=10,
+            columns=("depth", "temperature")
+        ),
+    )
@@ -0,0 +1,6 @@
+from insitupy.campaigns.assembler import PitAssembler
+from .snowex_profile_data_collection import SnowExProfileDataCollection
+
+
+class SnowExPitAssembler(PitAssembler):
+    COLLECTION_CLASS = SnowExProfileDataCollection
@@ -1,6 +1,49 @@
+from pathlib import Path
+from typing import List, Optional, Set, Union
+
+import pandas as pd
+
 from insitupy.campaigns import ProfileDataCollection
+from .filenames import SnowExFilename
 from .snowex_campaign import SnowExProfileData
 
 
 class SnowExProfileDataCollection(ProfileDataCollection):
     PROFILE_DATA_CLASS = SnowExProfileData
+    # File names carry the local time, or only the local date. Local times
+    # are at most this far from UTC.
+    MAX_UTC_OFFSET = pd.Timedelta("14h")
+
+    @classmethod
+    def _filename_candidates(
+        cls,
+        filenames: List[Union[str, Path]],
+        variables: Optional[Set[str]] = None,
+        start: Optional[pd.Timestamp] = None,
+        end: Optional[pd.Timestamp] = None,
+    ) -> List[Union[str, Path]]:
+        """
+        See ProfileDataCollection._filename_candidates. Files that are not
+        known SnowEx products are kept. The local time of a file name can
+        be any UTC time within MAX_UTC_OFFSET, and a file name with only a
+        date covers the whole local day, so no matching file is dropped.
+        """
+        result = []
+        for filename in filenames:
+            parsed = SnowExFilename.parse(filename)
+            if parsed is not None:
+                # Latest and earliest UTC time of the local file name time
+                local = parsed.date_time.tz_localize("UTC")
+                last = local if parsed.time is not None \
+                    else local + pd.Timedelta("1D")
+                if start is not None and \
+                        last + cls.MAX_UTC_OFFSET < start:
+                    continue
+                if end is not None and local - cls.MAX_UTC_OFFSET > end:
+                    continue
+                codes = parsed.variable_codes
+                if variables is not None and codes is not None and \
+                        not codes & variables:
+                    continue
+            result.append(filename)
+        return result
@@ -0,0 +1,221 @@
+import logging
+from typing import List, Optional, Tuple
+
+import numpy as np
+import shapely
+
+from insitupy.profiles.metadata import ProfileMetaData
+
+LOG = logging.getLogger(__name__)
+
+EARTH_RADIUS = 6371008.8
+# Meters per degree of latitude
+METERS_PER_DEGREE = np.pi * EARTH_RADIUS / 180
+
+
+def haversine(
+    latitude: float, longitude: float,
+    latitudes: np.ndarray, longitudes: np.ndarray
+) -> np.ndarray:
+    """
+    Great circle distances in meters from a point to many points
+
+    Args:
+        latitude: latitude of the point
+        longitude: longitude of the point
+        latitudes: latitudes of the other points
+        longitudes: longitudes of the other points
+    """
+    lat1, lon1 = np.radians(latitude), np.radians(longitude)
+    lat2, lon2 = np.radians(latitudes), np.radians(longitudes)
+    a = np.sin((lat2 - lat1) / 2) ** 2 + \
+        np.cos(lat1) * np.cos(lat2) * np.sin((lon2 - lon1) / 2) ** 2
+    return 2 * EARTH_RADIUS * np.arcsin(np.sqrt(np.clip(a, 0, 1)))
+
+
+class SpatialIndex:
+    """
+    Index of the locations of many collections or profiles. There is one
+    entry per unique location, so the pits of a site are indexed once. The
+    STRtree of the locations is built on the first query and reused.
+    Queries return the positions of the indexed items.
+    """
+
+    def __init__(self, latitudes: np.ndarray, longitudes: np.ndarray):
+        """
+        Args:
+            latitudes: latitude of every item
+            longitudes: longitude of every item
+        """
+        locations = np.column_stack([
+            np.asarray(longitudes, dtype=float),
+            np.asarray(latitudes, dtype=float)
+        ])
+        self._size = len(locations)
+        # Items without a location are not indexed
+        valid = ~np.isnan(locations).any(axis=1)
+        self._locations, inverse = np.unique(
+            locations[valid], axis=0, return_inverse=True
+        )
+        inverse = np.asarray(inverse).reshape(-1)
+        items = np.flatnonzero(valid)
+        # Items of each location, in order
+        order = np.argsort(inverse, kind="stable")
+        splits = np.cumsum(
+            np.bincount(inverse, minlength=len(self._locations))
+        )
+        self._location_items = np.split(items[order], splits[:-1])
+        self._tree = None
+
+    @classmethod
+    def from_metadata(cls, metadata: List[ProfileMetaData]) -> "SpatialIndex":
+        """
+        Index the locations of metadata
+        """
+        return cls(
+            [m.latitude for m in metadata], [m.longitude for m in metadata]
+        )
+
+    @classmethod
+    def from_collections(cls, collections: list) -> "SpatialIndex":
+        """
+        Index the locations of collections, queries return positions in
+        the collections
+        """
+        return cls.from_metadata([c.metadata for c in collections])
+
+    def __len__(self):
+        return self._size
+
+    @property
+    def n_locations(self) -> int:
+        return len(self._locations)
+
+    @property
+    def tree(self) -> shapely.STRtree:
+        if self._tree is None:
+            self._tree = shapely.STRtree(
+                shapely.points(self._locations)
+            )
+        return self._tree
+
+    def _items(self, locations: np.ndarray) -> np.ndarray:
+        if len(locations) == 0:
+            return np.array([], dtype=int)
+        return np.concatenate([self._location_items[i] for i in locations])
+
+    def _locations_in_box(
+        self, bbox: Tuple[float, float, float, float]
+    ) -> np.ndarray:
+        return self.tree.query(shapely.box(*bbox))
+
+    def bbox(self, bbox: Tuple[float, float, float, float]) -> np.ndarray:
+        """
+        Items within a bounding box, edges included
+
+        Args:
+            bbox: (min longitude, min latitude, max longitude, max latitude)
+
+        Returns:
+            Sorted positions of the items
+        """
+        return np.sort(self._items(self._locations_in_box(bbox)))
+
+    @staticmethod
+    def _search_boxes(
+        latitude: float, longitude: float, distance: float
+    ) -> List[Tuple[float, float, float, float]]:
+        """
+        Bounding boxes of all points within a distance in meters. A box
+        crossing the antimeridian is split in two at +-180 degrees.
+        """
+        d_lat = distance / METERS_PER_DEGREE
+        cos_lat = np.cos(np.radians(min(abs(latitude) + d_lat, 90.0)))
+        d_lon = 180.0 if cos_lat <= 0 else min(
+            distance / (METERS_PER_DEGREE * cos_lat), 180.0
+        )
+        west, east = longitude - d_lon, longitude + d_lon
+        south, north = latitude - d_lat, latitude + d_lat
+        boxes = [(max(west, -180.0), south, min(east, 180.0), north)]
+        if west < -180.0:
+            boxes.append((west + 360.0, south, 180.0, north))
+        if east > 180.0:
+            boxes.append((-180.0, south, east - 360.0, north))
+        return boxes
+
+    def _locations_near(
+        self, latitude: float, longitude: float, distance: float
+    ) -> np.ndarray:
+        """
+        Locations in the search boxes of a distance around a point
+        """
+        return np.unique(np.concatenate([
+            self._locations_in_box(box) for box in
+            self._search_boxes(latitude, longitude, distance)
+        ]))
+
+    def _distances(
+        self, latitude: float, longitude: float, locations: np.ndarray
+    ) -> np.ndarray:
+        return haversine(
+            latitude, longitude,
+            self._locations[locations, 1], self._locations[locations, 0]
+        )
+
+    def radius(
+        self, latitude: float, longitude: float, distance: float
+    ) -> np.ndarray:
+        """
+        Items within a great circle distance of a point
+
+        Args:
+            latitude: latitude of the point
+            longitude: longitude of the point
+            distance: distance in meters
+
+        Returns:
+            Sorted positions of the items
+        """
+        candidates = self._locations_near(latitude, longitude, distance)
+        inside = self._distances(latitude, longitude, candidates) <= distance
+        return np.sort(self._items(candidates[inside]))
+
+    def nearest(
+        self,
+        latitude: float,
+        longitude: float,
+        k: int = 1,
+        max_distance: Optional[float] = None
+    ) -> np.ndarray:
+        """
+        The k items nearest to a point. The search area grows until it
+        holds k items.
+
+        Args:
+            latitude: latitude of the point
+            longitude: longitude of the point
+            k: number of items
+            max_distance: Optional distance in meters beyond which items
+                are not returned
+
+        Returns:
+            Positions of the items, nearest first
+        """
+        if self.n_locations == 0 or k < 1:
+            return np.array([], dtype=int)
+        # Start with the spacing of evenly spread locations
+        distance = max(np.sqrt(k / self.n_locations) * 1000.0, 1.0)
+        while True:
+            if max_distance is not None:
+                distance = min(distance, max_distance)
+            candidates = self._locations_near(latitude, longitude, distance)
+            distances = self._distances(latitude, longitude, candidates)
+            inside = distances <= distance
+            candidates, distances = candidates[inside], distances[inside]
+            n_items = sum(len(self._location_items[c]) for c in candidates)
+            searched_all = distance >= np.pi * EARTH_RADIUS
+            if n_items >= k or searched_all or distance == max_distance:
+                break
+            distance *= 4
+        order = np.argsort(distances, kind="stable")
+        return self._items(candidates[order])[:k]
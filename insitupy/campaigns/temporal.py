@@ -0,0 +1,190 @@
+import logging
+from typing import Dict, List, Optional, Sequence, Tuple
+
+import numpy as np
+import pandas as pd
+
+from insitupy.profiles.metadata import ProfileMetaData
+from .campaign import ProfileDataCollection
+
+LOG = logging.getLogger(__name__)
+
+# Sort key of items without a time
+MISSING = np.iinfo(np.int64).max
+
+
+class TemporalIndex:
+    """
+    Sorted index of the times of many collections or profiles, optionally
+    keyed by site too. Time windows are found with a binary search and
+    return the indexed items themselves, so no profile data is copied.
+    Naive times are UTC.
+    """
+
+    def __init__(
+        self,
+        times: Sequence,
+        sites: Optional[Sequence[str]] = None,
+        items: Optional[list] = None
+    ):
+        """
+        Args:
+            times: time of every item
+            sites: Optional site of every item
+            items: Optional indexed items, e.g. collections, returned by
+                window. Positions are returned when not given.
+        """
+        self._times = np.array(
+            [self._value(t) for t in times], dtype=np.int64
+        )
+        self._order = np.argsort(self._times, kind="stable")
+        self._sorted = self._times[self._order]
+        # Items without a time sort last and are never in a window
+        self._n_valid = int(np.searchsorted(self._sorted, MISSING))
+        self._sites = list(sites) if sites is not None else None
+        self._site_keys = None
+        self._items = items
+
+    @classmethod
+    def from_metadata(
+        cls, metadata: List[ProfileMetaData], items: Optional[list] = None
+    ) -> "TemporalIndex":
+        """
+        Index the times and sites of metadata
+        """
+        return cls(
+            [m.date_time for m in metadata],
+            sites=[m.site_name for m in metadata],
+            items=items
+        )
+
+    @classmethod
+    def from_collections(
+        cls, collections: List[ProfileDataCollection]
+    ) -> "TemporalIndex":
+        """
+        Index collections by their time and site, windows return the
+        collections
+        """
+        return cls.from_metadata(
+            [c.metadata for c in collections], items=collections
+        )
+
+    def __len__(self):
+        return len(self._times)
+
+    @staticmethod
+    def _value(time) -> int:
+        """
+        Sort key of a time, nanoseconds since the epoch in UTC
+        """
+        if time is None or pd.isna(time):
+            return MISSING
+        return ProfileDataCollection._utc(time).value
+
+    def _bounds(
+        self, sorted_times: np.ndarray, start, end, n_valid: int
+    ) -> Tuple[int, int]:
+        left = 0 if start is None else int(np.searchsorted(
+            sorted_times[:n_valid], self._value(start), side="left"
+        ))
+        right = n_valid if end is None else int(np.searchsorted(
+            sorted_times[:n_valid], self._value(end), side="right"
+        ))
+        return left, max(left, right)
+
+    def slice(self, start=None, end=None) -> np.ndarray:
+        """
+        Positions of the items within a time window, inclusive, in time
+        order
+
+        Args:
+            start: Optional earliest time
+            end: Optional latest time
+        """
+        left, right = self._bounds(self._sorted, start, end, self._n_valid)
+        return self._order[left:right]
+
+    @property
+    def site_keys(self) -> Dict[str, Tuple[np.ndarray, np.ndarray]]:
+        """
+        Sorted times and positions of the items of every site, built on
+        first use
+        """
+        if self._site_keys is None:
+            if self._sites is None:
+                raise ValueError("The index has no sites")
+            positions = {}
+            for position in self._order[:self._n_valid]:
+                positions.setdefault(self._sites[position], []).append(
+                    position
+                )
+            self._site_keys = {
+                site: (self._times[p], np.array(p))
+                for site, p in positions.items()
+            }
+        return self._site_keys
+
+    def site_slice(self, site: str, start=None, end=None) -> np.ndarray:
+        """
+        Positions of the items of a site within a time window, inclusive,
+        in time order
+        """
+        if site not in self.site_keys:
+            return np.array([], dtype=int)
+        times, positions = self.site_keys[site]
+        left, right = self._bounds(times, start, end, len(times))
+        return positions[left:right]
+
+    def nearest(self, time, site: Optional[str] = None) -> Optional[int]:
+        """
+        Position of the item closest in time, optionally of one site.
+        The earlier item wins a tie.
+
+        Args:
+            time: time to look up
+            site: Optional site of the item
+
+        Returns:
+            The position or None when there is no item
+        """
+        if site is None:
+            times, positions = self._sorted[:self._n_valid], self._order
+        elif site in self.site_keys:
+            times, positions = self.site_keys[site]
+        else:
+            return None
+        if len(times) == 0:
+            return None
+        value = self._value(time)
+        i = int(np.searchsorted(times, value))
+        candidates = [c for c in (i - 1, i) if 0 <= c < len(times)]
+        best = min(candidates, key=lambda c: abs(int(times[c]) - value))
+        return int(positions[best])
+
+    def view(self, positions: np.ndarray) -> list:
+        """
+        The indexed items at positions, the items are not copied
+        """
+        if self._items is None:
+            return list(positions)
+        return [self._items[p] for p in positions]
+
+    def window(self, start=None, end=None, site: Optional[str] = None) -> list:
+        """
+        The items within a time window, inclusive, in time order
+
+        Args:
+            start: Optional earliest time
+            end: Optional latest time
+            site: Optional site of the items
+        """
+        if site is None:
+            return self.view(self.slice(start, end))
+        return self.view(self.site_slice(site, start, end))
+
+    def times(self) -> pd.DatetimeIndex:
+        """
+        UTC times of the items in time order
+        """
+        return pd.to_datetime(self._sorted[:self._n_valid], utc=True)
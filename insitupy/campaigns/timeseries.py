@@ -0,0 +1,153 @@
+import logging
+from typing import TYPE_CHECKING, Callable, Dict, List, Optional, Union
+
+import numpy as np
+import pandas as pd
+
+if TYPE_CHECKING:
+    import xarray as xr
+
+LOG = logging.getLogger(__name__)
+
+SITE_LEVEL = "site"
+TIME_LEVEL = "datetime"
+DENSITY_CODE = "density"
+
+
+def _profile(collection, code: str):
+    """
+    First profile of a variable with data, None if there is none
+    """
+    for profile in collection.profiles:
+        if profile.variable.code == code and profile.df is not None \
+                and not profile.df.empty:
+            return profile
+    return None
+
+
+def total_depth(collection) -> float:
+    """
+    Largest depth of the profiles of a collection
+    """
+    depths = [
+        p.total_depth for p in collection.profiles
+        if p.df is not None and not p.df.empty
+    ]
+    return np.nanmax(depths) if depths else np.nan
+
+
+def bulk_swe(collection) -> float:
+    """
+    SWE in mm from the weighted mean density in kg/m3 and the depth in cm
+    of the density profile
+    """
+    profile = _profile(collection, DENSITY_CODE)
+    if profile is None:
+        return np.nan
+    return profile.mean * profile.total_depth / 100
+
+
+# Derived values by name, other names are the mean of a variable profile
+DERIVED_VALUES: Dict[str, Callable] = {
+    "total_depth": total_depth,
+    "swe": bulk_swe,
+}
+DEFAULT_VALUES = [DENSITY_CODE, "swe", "total_depth"]
+
+
+def value_function(value: Union[str, Callable]) -> Callable:
+    """
+    Function of a collection for a value, which is a name in
+    DERIVED_VALUES, a variable code whose profile mean is used, or already
+    a function of the collection
+    """
+    if callable(value):
+        return value
+    if value in DERIVED_VALUES:
+        return DERIVED_VALUES[value]
+
+    def _mean(collection):
+        profile = _profile(collection, value)
+        return np.nan if profile is None else profile.mean
+    return _mean
+
+
+def _site_key(collection, by: str):
+    """
+    Site of a collection from a collection property, e.g. site_id, or
+    else from its metadata, e.g. site_name
+    """
+    if isinstance(getattr(type(collection), by, None), property):
+        return getattr(collection, by)
+    return getattr(collection.metadata, by)
+
+
+def site_series(
+    collections: list,
+    values: Optional[Union[List, Dict[str, Union[str, Callable]]]] = None,
+    by: str = "site_name",
+    resample: Optional[str] = None,
+    how: str = "mean"
+) -> pd.DataFrame:
+    """
+    Derived values of collections as a time series per site. The files
+    of a pit visit are combined, taking the first value of each column.
+
+    Args:
+        collections: collections to combine
+        values: Value names or a mapping of column name to value, where
+            a value is a name in DERIVED_VALUES, a variable code whose
+            profile mean is used, or a function of the collection.
+            Defaults to DEFAULT_VALUES.
+        by: collection property or metadata field of the site
+        resample: Optional pandas frequency, e.g. '7D', of a regular
+            cadence per site
+        how: aggregation of the values within a resampled period
+
+    Returns:
+        Frame indexed by site and UTC time, sorted, with a column per value
+    """
+    values = DEFAULT_VALUES if values is None else values
+    if not isinstance(values, dict):
+        values = {name: name for name in values}
+    functions = {
+        name: value_function(value) for name, value in values.items()
+    }
+
+    records = {
+        SITE_LEVEL: [_site_key(c, by) for c in collections],
+        TIME_LEVEL: pd.to_datetime(
+            [c.metadata.date_time for c in collections], utc=True
+        ),
+    }
+    for name, function in functions.items():
+        records[name] = np.array(
+            [function(c) for c in collections], dtype=float
+        )
+    df = pd.DataFrame(records).dropna(subset=[SITE_LEVEL, TIME_LEVEL])
+    df = df.groupby([SITE_LEVEL, TIME_LEVEL], sort=True).first()
+
+    if resample is not None:
+        df = df.reset_index(SITE_LEVEL).groupby(SITE_LEVEL).resample(
+            resample
+        ).agg(how)
+    LOG.debug(
+        f"Built series of {df.index.get_level_values(0).nunique()} sites"
+        f" from {len(collections)} collections"
+    )
+    return df
+
+
+def site_time_array(df: pd.DataFrame) -> "xr.Dataset":
+    """
+    Dataset with a (site, time) array per column of a site_series frame.
+    Times are UTC, times without a value at a site are NaN.
+    """
+    times = df.index.get_level_values(TIME_LEVEL)
+    if times.tz is not None:
+        df = df.set_axis(df.index.set_levels(
+            df.index.levels[1].tz_convert("UTC").tz_localize(None), level=1
+        ))
+    ds = df.to_xarray().rename({TIME_LEVEL: "time"})
+    ds["time"].attrs["timezone"] = "UTC"
+    return ds
@@ -0,0 +1,9 @@
+from .catalog import IngestReport, ProfileCatalog, file_hash, \
+    profile_summary
+
+__all__ = [
+    "IngestReport",
+    "ProfileCatalog",
+    "file_hash",
+    "profile_summary",
+]
@@ -0,0 +1,391 @@
+import logging
+import sqlite3
+import time
+from dataclasses import dataclass, field, fields
+from pathlib import Path
+from typing import Dict, Iterable, List, Optional, Tuple, Type, Union
+
+import numpy as np
+import pandas as pd
+
+from insitupy.campaigns import ProfileDataCollection
+from insitupy.io.files import file_hash
+from insitupy.profiles.base import ProfileData
+from insitupy.profiles.metadata import ProfileMetaData
+
+LOG = logging.getLogger(__name__)
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS files (
+    id INTEGER PRIMARY KEY,
+    path TEXT NOT NULL UNIQUE,
+    size INTEGER NOT NULL,
+    mtime REAL NOT NULL,
+    content_hash TEXT NOT NULL,
+    deleted REAL
+);
+CREATE TABLE IF NOT EXISTS profiles (
+    id INTEGER PRIMARY KEY,
+    file_id INTEGER NOT NULL REFERENCES files(id) ON DELETE CASCADE,
+    site_name TEXT,
+    date_time REAL,
+    latitude REAL,
+    longitude REAL,
+    utm_epsg TEXT,
+    campaign_name TEXT,
+    flags TEXT,
+    comments TEXT,
+    observers TEXT,
+    variable TEXT,
+    n_layers INTEGER NOT NULL,
+    depth_min REAL,
+    depth_max REAL,
+    mean REAL,
+    total_depth REAL
+);
+CREATE INDEX IF NOT EXISTS profiles_site ON profiles(site_name);
+CREATE INDEX IF NOT EXISTS profiles_time ON profiles(date_time);
+CREATE INDEX IF NOT EXISTS profiles_location ON profiles(latitude, longitude);
+CREATE INDEX IF NOT EXISTS profiles_variable ON profiles(variable);
+CREATE INDEX IF NOT EXISTS profiles_file ON profiles(file_id);
+"""
+
+METADATA_FIELDS = [f.name for f in fields(ProfileMetaData)]
+SUMMARY_FIELDS = [
+    "variable", "n_layers", "depth_min", "depth_max", "mean", "total_depth"
+]
+
+
+@dataclass
+class IngestReport:
+    """
+    Paths handled by an incremental ingest
+    """
+    added: List[str] = field(default_factory=list)
+    updated: List[str] = field(default_factory=list)
+    unchanged: List[str] = field(default_factory=list)
+    deleted: List[str] = field(default_factory=list)
+
+
+def _to_epoch(value) -> Optional[float]:
+    if value is None or pd.isna(value):
+        return None
+    value = pd.Timestamp(value)
+    if value.tz is None:
+        value = value.tz_localize("UTC")
+    return value.timestamp()
+
+
+def profile_summary(profile: ProfileData) -> dict:
+    """
+    Layer count, depth range and bulk values of a profile
+
+    Args:
+        profile: profile to summarize
+    """
+    df = profile.df
+    result = {
+        "variable": profile.variable.code if profile.variable else None,
+        "n_layers": 0,
+        "depth_min": None,
+        "depth_max": None,
+        "mean": None,
+        "total_depth": None,
+    }
+    if df is None or df.empty:
+        return result
+
+    result["n_layers"] = len(df)
+    depth_columns = [
+        c.code for c in profile.shared_column_options() if c.code in df
+    ]
+    if depth_columns:
+        depths = df[depth_columns].to_numpy(dtype=float)
+        if not np.isnan(depths).all():
+            result["depth_min"] = float(np.nanmin(depths))
+            result["depth_max"] = float(np.nanmax(depths))
+            result["total_depth"] = float(profile.total_depth)
+
+    if profile.variable is not None and profile.variable.code in df and \
+            pd.api.types.is_numeric_dtype(df[profile.variable.code]):
+        mean = profile.mean
+        result["mean"] = None if pd.isna(mean) else float(mean)
+    return result
+
+
+class ProfileCatalog:
+    """
+    Persistent SQLite catalog of ingested files and the profiles within
+    them. Answers questions about which profiles exist where and when
+    without reading the raw files again.
+    """
+    COLLECTION_CLASS = ProfileDataCollection
+
+    def __init__(
+        self,
+        database: Union[str, Path] = ":memory:",
+        collection_class: Type[ProfileDataCollection] = None
+    ):
+        """
+        Args:
+            database: path to the SQLite database file. It is created when
+                it does not exist.
+            collection_class: Collection class used to read files on ingest
+        """
+        self._database = str(database)
+        self._collection_class = collection_class or self.COLLECTION_CLASS
+        self._connection = sqlite3.connect(self._database)
+        self._connection.execute("PRAGMA foreign_keys = ON")
+        self._connection.executescript(SCHEMA)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *args):
+        self.close()
+
+    def close(self):
+        self._connection.close()
+
+    @property
+    def connection(self) -> sqlite3.Connection:
+        return self._connection
+
+    @staticmethod
+    def fingerprint(filename: Union[str, Path]) -> Tuple[int, float, str]:
+        """
+        Size, modification time and content hash of a file
+        """
+        stat = Path(filename).stat()
+        return stat.st_size, stat.st_mtime, file_hash(filename)
+
+    def _profile_row(self, file_id: int, profile: ProfileData,
+                     metadata: ProfileMetaData) -> tuple:
+        metadata = profile.metadata or metadata
+        values = []
+        for name in METADATA_FIELDS:
+            value = getattr(metadata, name)
+            if name == "date_time":
+                value = _to_epoch(value)
+            elif name == "observers" and value is not None:
+                value = ", ".join(value)
+            values.append(value)
+        summary = profile_summary(profile)
+        return (file_id, *values, *[summary[k] for k in SUMMARY_FIELDS])
+
+    def add_collection(
+        self,
+        filename: Union[str, Path],
+        collection: ProfileDataCollection,
+        fingerprint: Tuple[int, float, str] = None
+    ):
+        """
+        Store a collection parsed from a file, replacing any earlier
+        entries of the file
+
+        Args:
+            filename: file the collection was read from
+            collection: the parsed collection
+            fingerprint: size, mtime and hash of the file. Computed when
+                not given.
+        """
+        path = str(Path(filename).resolve())
+        size, mtime, content_hash = fingerprint or self.fingerprint(filename)
+        columns = ["file_id", *METADATA_FIELDS, *SUMMARY_FIELDS]
+        with self._connection:
+            self._connection.execute(
+                "DELETE FROM files WHERE path = ?", (path,)
+            )
+            file_id = self._connection.execute(
+                "INSERT INTO files (path, size, mtime, content_hash)"
+                " VALUES (?, ?, ?, ?)",
+                (path, size, mtime, content_hash)
+            ).lastrowid
+            self._connection.executemany(
+                f"INSERT INTO profiles ({', '.join(columns)})"
+                f" VALUES ({', '.join('?' * len(columns))})",
+                [
+                    self._profile_row(file_id, p, collection.metadata)
+                    for p in collection.profiles
+                ]
+            )
+
+    def _ingest_file(self, filename, fingerprint, parser_kwargs):
+        collection = self._collection_class.from_csv(
+            filename, **parser_kwargs
+        )
+        self.add_collection(filename, collection, fingerprint)
+        LOG.debug(f"Cataloged {filename}")
+
+    def ingest(self, filenames: Iterable[Union[str, Path]], **parser_kwargs):
+        """
+        Parse files and store their profiles in the catalog
+
+        Args:
+            filenames: paths to the files
+            parser_kwargs: Arguments for reading the files. See
+                ProfileDataCollection.from_csv
+        """
+        for filename in filenames:
+            self._ingest_file(
+                filename, self.fingerprint(filename), parser_kwargs
+            )
+
+    def manifest(self) -> Dict[str, Tuple[int, float, str]]:
+        """
+        Size, mtime and content hash of every cataloged file that is not
+        deleted, by path
+        """
+        return {
+            path: (size, mtime, content_hash)
+            for path, size, mtime, content_hash in self._connection.execute(
+                "SELECT path, size, mtime, content_hash FROM files"
+                " WHERE deleted IS NULL"
+            )
+        }
+
+    def tombstone(self, path: Union[str, Path]):
+        """
+        Mark a cataloged file as deleted and remove its profiles
+
+        Args:
+            path: path of the cataloged file
+        """
+        path = str(Path(path).resolve())
+        with self._connection:
+            self._connection.execute(
+                "DELETE FROM profiles WHERE file_id IN"
+                " (SELECT id FROM files WHERE path = ?)", (path,)
+            )
+            self._connection.execute(
+                "UPDATE files SET deleted = ? WHERE path = ?",
+                (time.time(), path)
+            )
+
+    def refresh(
+        self, filenames: Iterable[Union[str, Path]], **parser_kwargs
+    ) -> IngestReport:
+        """
+        Incrementally ingest files against the stored manifest. Only new
+        and changed files are parsed. Files with an unchanged size and mtime
+        are skipped without reading them, and touched files with unchanged
+        content only get their mtime updated. Cataloged files that no longer
+        exist on disk are tombstoned.
+
+        Args:
+            filenames: paths to the files
+            parser_kwargs: Arguments for reading the files. See
+                ProfileDataCollection.from_csv
+
+        Returns:
+            IngestReport of the handled paths
+        """
+        manifest = self.manifest()
+        report = IngestReport()
+        for filename in filenames:
+            path = str(Path(filename).resolve())
+            stat = Path(filename).stat()
+            known = manifest.get(path)
+            if known is not None and \
+                    known[:2] == (stat.st_size, stat.st_mtime):
+                report.unchanged.append(path)
+                continue
+
+            fingerprint = (stat.st_size, stat.st_mtime, file_hash(filename))
+            if known is not None and known[2] == fingerprint[2]:
+                with self._connection:
+                    self._connection.execute(
+                        "UPDATE files SET mtime = ? WHERE path = ?",
+                        (stat.st_mtime, path)
+                    )
+                report.unchanged.append(path)
+                continue
+
+            self._ingest_file(filename, fingerprint, parser_kwargs)
+            if known is None:
+                report.added.append(path)
+            else:
+                report.updated.append(path)
+
+        for path in manifest:
+            if not Path(path).exists():
+                self.tombstone(path)
+                report.deleted.append(path)
+
+        LOG.info(
+            f"Added {len(report.added)}, updated {len(report.updated)},"
+            f" deleted {len(report.deleted)} and skipped"
+            f" {len(report.unchanged)} files"
+        )
+        return report
+
+    def files(self, include_deleted: bool = False) -> pd.DataFrame:
+        """
+        Cataloged files with their size, mtime and content hash
+
+        Args:
+            include_deleted: include tombstoned files
+        """
+        where = "" if include_deleted else "WHERE deleted IS NULL"
+        return pd.read_sql_query(
+            f"SELECT path, size, mtime, content_hash, deleted FROM files"
+            f" {where} ORDER BY path",
+            self._connection
+        )
+
+    def query(
+        self,
+        site_name: Optional[str] = None,
+        start: Optional[Union[str, pd.Timestamp]] = None,
+        end: Optional[Union[str, pd.Timestamp]] = None,
+        bbox: Optional[Tuple[float, float, float, float]] = None,
+        variable: Optional[Union[str, List[str]]] = None,
+    ) -> pd.DataFrame:
+        """
+        Find cataloged profiles. All given filters have to match.
+
+        Args:
+            site_name: site name of the profile
+            start: earliest profile time, inclusive. Naive times are UTC.
+            end: latest profile time, inclusive. Naive times are UTC.
+            bbox: (min longitude, min latitude, max longitude, max latitude)
+            variable: variable code or list of codes
+
+        Returns:
+            One row per profile with the file path, the ProfileMetaData
+            fields and the profile summary
+        """
+        conditions = []
+        parameters = []
+        if site_name is not None:
+            conditions.append("p.site_name = ?")
+            parameters.append(site_name)
+        if start is not None:
+            conditions.append("p.date_time >= ?")
+            parameters.append(_to_epoch(start))
+        if end is not None:
+            conditions.append("p.date_time <= ?")
+            parameters.append(_to_epoch(end))
+        if bbox is not None:
+            conditions.append(
+                "p.longitude BETWEEN ? AND ? AND p.latitude BETWEEN ? AND ?"
+            )
+            parameters += [bbox[0], bbox[2], bbox[1], bbox[3]]
+        if variable is not None:
+            variables = [variable] if isinstance(variable, str) else variable
+            conditions.append(
+                f"p.variable IN ({', '.join('?' * len(variables))})"
+            )
+            parameters += list(variables)
+
+        where = f"WHERE {' AND '.join(conditions)}" if conditions else ""
+        df = pd.read_sql_query(
+            f"SELECT f.path, {', '.join('p.' + c for c in METADATA_FIELDS)},"
+            f" {', '.join('p.' + c for c in SUMMARY_FIELDS)}"
+            f" FROM profiles p JOIN files f ON p.file_id = f.id"
+            f" {where} ORDER BY p.date_time, f.path, p.id",
+            self._connection,
+            params=parameters
+        )
+        df["date_time"] = pd.to_datetime(df["date_time"], unit="s", utc=True)
+        return df
@@ -0,0 +1,18 @@
+import hashlib
+from pathlib import Path
+from typing import Union
+
+
+def file_hash(filename: Union[str, Path], chunk_size: int = 1 << 20) -> str:
+    """
+    Hash of the file content
+
+    Args:
+        filename: path to the file
+        chunk_size: bytes read at a time
+    """
+    digest = hashlib.blake2b(digest_size=16)
+    with open(filename, "rb") as f:
+        for chunk in iter(lambda: f.read(chunk_size), b""):
+            digest.update(chunk)
+    return digest.hexdigest()
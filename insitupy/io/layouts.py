@@ -0,0 +1,122 @@
+import threading
+from collections import OrderedDict
+from dataclasses import dataclass
+from fnmatch import fnmatchcase
+from pathlib import Path
+from typing import Dict, Hashable, List, Optional, Tuple, Union
+
+from insitupy.variables import MeasurementDescription
+
+
+@dataclass(frozen=True)
+class HeaderLayout:
+    """
+    Result of mapping a single column header line
+    """
+    # Column names to use when reading the data
+    columns: Tuple[str, ...]
+    # Map of column name to the known variable
+    columns_map: Dict[str, Optional[MeasurementDescription]]
+    # Map of variable code to the unit inferred from the header
+    units: Dict[str, Optional[str]]
+
+
+@dataclass(frozen=True)
+class LayoutDeclaration:
+    """
+    Known, fixed layout of a campaign product. Files matching the pattern
+    skip the header search heuristics when the declared layout verifies.
+
+    Args:
+        pattern: glob pattern matched against the file name
+        header_position: index of the column header line, which is also
+            the number of metadata lines above it
+        column_sep: column separator of the header line
+        columns: optional standardized column names expected in the header
+    """
+    pattern: str
+    header_position: int
+    column_sep: str = ","
+    columns: Optional[Tuple[str, ...]] = None
+
+    def matches_filename(self, filename: Union[str, Path]) -> bool:
+        return fnmatchcase(Path(filename).name, self.pattern)
+
+    def matches_lines(self, lines: List[str], header_line_start: str) -> bool:
+        """
+        Verify the first lines of a file against the declaration. Lines must
+        contain at least the header line, and the line after it when the
+        file has data.
+
+        Args:
+            lines: first lines of the file
+            header_line_start: character starting every header line
+        """
+        if len(lines) <= self.header_position:
+            return False
+        if not all(
+            ln.startswith(header_line_start)
+            for ln in lines[:self.header_position + 1]
+        ):
+            return False
+        # The header has to end at the declared line
+        next_line = self.header_position + 1
+        if len(lines) > next_line and \
+                lines[next_line].startswith(header_line_start):
+            return False
+        return True
+
+
+class HeaderLayoutCache:
+    """
+    Bounded LRU cache of mapped column header lines. Files of the same
+    product share the header line, so the mapping only happens once.
+    """
+    DEFAULT_MAX_SIZE = 256
+
+    def __init__(self, max_size: int = DEFAULT_MAX_SIZE):
+        self._max_size = max_size
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+        self._hits = 0
+        self._misses = 0
+
+    def get(self, key: Hashable) -> Optional[HeaderLayout]:
+        with self._lock:
+            layout = self._entries.get(key)
+            if layout is None:
+                self._misses += 1
+            else:
+                self._hits += 1
+                self._entries.move_to_end(key)
+            return layout
+
+    def put(self, key: Hashable, layout: HeaderLayout):
+        with self._lock:
+            self._entries[key] = layout
+            self._entries.move_to_end(key)
+            while len(self._entries) > self._max_size:
+                self._entries.popitem(last=False)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self._hits = 0
+            self._misses = 0
+
+    def __len__(self):
+        return len(self._entries)
+
+    @property
+    def stats(self) -> Dict[str, float]:
+        """
+        Hits, misses, size and hit rate of the cache
+        """
+        with self._lock:
+            total = self._hits + self._misses
+            return {
+                "hits": self._hits,
+                "misses": self._misses,
+                "size": len(self._entries),
+                "hit_rate": self._hits / total if total else 0.0,
+            }
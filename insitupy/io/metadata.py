@@ -1,10 +1,16 @@
+import copy
+import hashlib
+import json
 import logging
+from itertools import islice
 from pathlib import Path
 from typing import List, Tuple, Optional, Union
 
 import pandas as pd
 
 from .dates import DateTimeManager
+from .files import file_hash
+from .layouts import HeaderLayout, HeaderLayoutCache, LayoutDeclaration
 from .locations import LocationManager
 from .strings import StringManager
 from .yaml_codes import YamlCodes
@@ -28,6 +34,13 @@ class MetaDataParser:
     DEFAULT_HEADER_LINE_START = '#'
     DEFAULT_COLUMN_SEPARATOR = ','
     END_OF_LINE = '\n\r'
+    # Consecutive non header lines that mark the start of the data when
+    # only reading the header of a file
+    HEADER_SCAN_DATA_LINES = 3
+    # Mapped column header lines shared by all parsers
+    LAYOUT_CACHE = HeaderLayoutCache()
+    # Known product layouts that skip the header search
+    LAYOUT_DECLARATIONS: Tuple[LayoutDeclaration, ...] = ()
 
     def __init__(
         self,
@@ -71,6 +84,8 @@ class MetaDataParser:
         self._id = _id
         self._campaign_name = campaign_name
         self._units_map = units_map or {}
+        # Filename and header info of the last header only read, see parse
+        self._header = None
 
         self.primary_variables = self.extend_variables(
             self.DEFAULT_PRIMARY_VARIABLE_FILES,
@@ -112,6 +127,46 @@ class MetaDataParser:
             allow_map_failures=allow_map_failures
         )
 
+    def copy(self) -> "MetaDataParser":
+        """
+        Parser with the same configuration and variables, but its own
+        parsing state, e.g. the units map of the file it parses. Much
+        cheaper than building a new parser, as the variables are shared.
+        """
+        parser = copy.copy(self)
+        parser._units_map = dict(self._units_map)
+        parser._rough_obj = {}
+        parser._lat_lon_easting_northing = None
+        parser._header = None
+        return parser
+
+    @classmethod
+    def register_layout(cls, declaration: LayoutDeclaration):
+        """
+        Add a known product layout to this parser class and its subclasses.
+        Subclasses with their own LAYOUT_DECLARATIONS still use it, after
+        their own, see layout_declarations.
+
+        Args:
+            declaration: layout of files matching the declaration pattern
+        """
+        cls.LAYOUT_DECLARATIONS = cls.__dict__.get(
+            "LAYOUT_DECLARATIONS", ()
+        ) + (declaration,)
+
+    @classmethod
+    def layout_declarations(cls) -> Tuple[LayoutDeclaration, ...]:
+        """
+        Declared layouts of this parser class and its base classes, the
+        most derived class first
+        """
+        declarations = []
+        for klass in cls.__mro__:
+            for declaration in klass.__dict__.get("LAYOUT_DECLARATIONS", ()):
+                if declaration not in declarations:
+                    declarations.append(declaration)
+        return tuple(declarations)
+
     @property
     def rough_obj(self):
         return self._rough_obj
@@ -120,6 +175,43 @@ class MetaDataParser:
     def units_map(self):
         return self._units_map
 
+    @property
+    def layout_cache_stats(self) -> dict:
+        """
+        Hits, misses, size and hit rate of the column header layout cache
+        """
+        return self.LAYOUT_CACHE.stats
+
+    @property
+    def fingerprint(self) -> str:
+        """
+        Hash of the parser configuration, which changes with anything that
+        changes the parse result of a file: the parser class, the content
+        of the variable definition files, the separators, the timezone,
+        overrides and known layouts.
+        """
+        config = {
+            "parser": f"{type(self).__module__}.{type(self).__qualname__}",
+            "variable_files": [
+                file_hash(f) for f in
+                self.primary_variables.source_files +
+                self.metadata_variables.source_files
+            ],
+            "allow_map_failures": self.primary_variables.allow_map_failures,
+            "allow_split_lines": self._allow_split_header_lines,
+            "timezone": self._input_timezone,
+            "header_sep": self._header_sep,
+            "column_sep": self._column_sep,
+            "id": self._id,
+            "campaign_name": self._campaign_name,
+            "units_map": self._units_map,
+            "layouts": [repr(d) for d in self.layout_declarations()],
+        }
+        return hashlib.blake2b(
+            json.dumps(config, sort_keys=True, default=str).encode(),
+            digest_size=16
+        ).hexdigest()
+
     @property
     def lat_lon_easting_northing(self):
         if self._lat_lon_easting_northing is None:
@@ -235,23 +327,45 @@ class MetaDataParser:
                 data[known_name] = None
         return data
 
-    def parse(self, filename: str) -> Tuple:
+    def parse(
+        self,
+        filename: str,
+        metadata: Optional[ProfileMetaData] = None,
+        header_only: bool = False
+    ) -> Tuple:
         """
         Parse the file and return a metadata object.
         We can override these methods as needed to parse the different
         metadata
 
-        This populates self.rough_obj
+        This populates self.rough_obj. The header of a file just read with
+        read_header or a header_only parse is not read again.
 
         Args:
             filename: (str) Full path to the file with the header info to parse
+            metadata: Already parsed metadata shared with this file. When
+                given, only the header lines and columns are parsed.
+            header_only: Stop reading the file at the start of the data.
+                See find_header_info.
 
         Returns:
             Tuple: metadata object, column list, position of header in file
         """
-        meta_lines, columns, columns_map, header_position = \
-            self.find_header_info(filename)
-        self._rough_obj = self._preparse_meta(meta_lines)
+        header, self._header = self._header, None
+        if header is not None and header[0] == str(filename):
+            _, columns, columns_map, header_position = header[1]
+            columns_map = dict(columns_map)
+        else:
+            header_info = self.find_header_info(
+                filename, header_only=header_only
+            )
+            meta_lines, columns, columns_map, header_position = header_info
+            self._rough_obj = self._preparse_meta(meta_lines)
+            if header_only:
+                self._header = (str(filename), header_info)
+        if metadata is not None:
+            return metadata, columns, columns_map, header_position
+
         # Create a standard metadata object
         metadata = ProfileMetaData(
             site_name=self.parse_id(),
@@ -266,6 +380,22 @@ class MetaDataParser:
 
         return metadata, columns, columns_map, header_position
 
+    def read_header(self, filename: str) -> dict:
+        """
+        Parse only the header entries of a file without building the
+        metadata object. This populates self.rough_obj
+
+        Args:
+            filename: (str) Full path to the file with the header info to parse
+
+        Returns:
+            dict: header entries with known keys
+        """
+        header_info = self.find_header_info(filename, header_only=True)
+        self._rough_obj = self._preparse_meta(header_info[0])
+        self._header = (str(filename), header_info)
+        return self._rough_obj
+
     def _parse_header(self, lines):
         # Key value pairs are separate by some separator provided.
         data = {}
@@ -297,18 +427,47 @@ class MetaDataParser:
         )
         return data
 
-    def _parse_columns(self, str_line):
+    def _split_columns(self, str_line, column_sep=None) -> List[str]:
         """
-        Parse the column names from the input line. This can include mapping
+        Split the column header line into the raw column names
         """
         raw_cols = str_line.strip(
             self.DEFAULT_HEADER_LINE_START + self.END_OF_LINE
         ).split(
-            self._column_sep
+            column_sep or self._column_sep
         )
         # Filter empty strings, especially with trailing commas.
         # Example: col1, col2, col3,
-        raw_cols = [col for col in raw_cols if col]
+        return [col for col in raw_cols if col]
+
+    def _parse_columns(self, str_line, column_sep=None):
+        """
+        Parse the column names from the input line. This can include mapping.
+        Identical header lines mapped with the same variables are only
+        mapped once and then served from LAYOUT_CACHE.
+        """
+        column_sep = column_sep or self._column_sep
+        key = (str_line, column_sep, self.primary_variables.signature)
+        layout = self.LAYOUT_CACHE.get(key)
+        if layout is None:
+            layout = self._map_columns(str_line, column_sep)
+            self.LAYOUT_CACHE.put(key, layout)
+
+        # User overrides are applied on every call since they can change
+        # between files
+        inferred_units_map = {
+            code: self._units_map.get(code) or unit
+            for code, unit in layout.units.items()
+        }
+        return (
+            list(layout.columns), dict(layout.columns_map), inferred_units_map
+        )
+
+    def _map_columns(self, str_line, column_sep=None) -> HeaderLayout:
+        """
+        Standardize, unit infer, and map every column in the header line
+        """
+        raw_cols = self._split_columns(str_line, column_sep)
         # Clean the raw columns
         standard_cols = [StringManager.standardize_key(c) for c in raw_cols]
         # Infer units from the raw columns
@@ -337,14 +496,15 @@ class MetaDataParser:
                         f"No unit for {column} - column mapping has failed"
                     )
             else:
-                # override the code if it is given
-                inferred_units_map[
-                    result_obj.code
-                ] = self._units_map.get(result_obj.code) or unit
+                inferred_units_map[result_obj.code] = unit
 
-        return final_cols, final_col_map, inferred_units_map
+        return HeaderLayout(
+            columns=tuple(final_cols),
+            columns_map=final_col_map,
+            units=inferred_units_map
+        )
 
-    def find_header_info(self, filename: str):
+    def find_header_info(self, filename: str, header_only: bool = False):
         """
         Read in all site details file for a pit If the filename has the word
         site in it then we read everything in the file. Otherwise, we use this
@@ -353,7 +513,11 @@ class MetaDataParser:
         E.g. Read all commented data until we see a column descriptor.
 
         Args:
-            filename: Path to a csv containing # leading lines with site details
+            filename: Path to a csv containing # leading lines with site
+                details
+            header_only: Stop reading the file after HEADER_SCAN_DATA_LINES
+                consecutive lines that are not header lines, instead of
+                reading the entire file.
 
         Returns:
             tuple: **data** - Dictionary containing site details
@@ -362,28 +526,32 @@ class MetaDataParser:
                                     read_csv
        """
         filename = str(filename)
-        try:
-            with open(filename, "r", encoding="utf-8-sig") as f:
-                lines = f.readlines()
-        except UnicodeDecodeError:
-            with open(filename, "r", encoding="latin1") as f:
-                lines = f.readlines()
 
         # Site description files have no need for column lists
         if 'site' in filename.lower():
             LOG.info('Parsing site description header...')
+            lines = self._read_lines(filename)
             columns = None
             header_pos = None
-            header_indicator = None
             columns_map = {}
-            self._units_map = self._units_map
 
         # Find the column names and where it is in the file
         else:
-            header_pos, header_indicator = self._find_header_position(lines)
+            declaration, lines = self._declared_layout(filename)
+            if declaration is None:
+                if header_only:
+                    lines = self._read_header_lines(filename)
+                else:
+                    lines = self._read_lines(filename)
+                header_pos, header_indicator = \
+                    self._find_header_position(lines)
+                column_sep = self._column_sep
+            else:
+                header_pos = declaration.header_position
+                column_sep = declaration.column_sep
             # identify columns, map columns, and units map
             columns, columns_map, units_map = self._parse_columns(
-                lines[header_pos]
+                lines[header_pos], column_sep
             )
             # Combine with user defined units map
             self._units_map = {**self._units_map, **units_map}
@@ -405,6 +573,95 @@ class MetaDataParser:
 
         return str_data, columns, columns_map, header_pos
 
+    @staticmethod
+    def _read_lines(filename: str, n_lines: Optional[int] = None) -> List[str]:
+        """
+        Read the lines of a file, trying utf-8 before latin1
+
+        Args:
+            filename: path to the file
+            n_lines: only read this many lines from the top of the file
+        """
+        try:
+            with open(filename, "r", encoding="utf-8-sig") as f:
+                lines = list(islice(f, n_lines))
+        except UnicodeDecodeError:
+            with open(filename, "r", encoding="latin1") as f:
+                lines = list(islice(f, n_lines))
+        return lines
+
+    def _read_header_lines(self, filename: str) -> List[str]:
+        """
+        Read the lines of a file up to the start of the data. The data
+        starts at the first of HEADER_SCAN_DATA_LINES consecutive lines
+        that do not start with the header character, which still allows for
+        single split header lines.
+
+        Args:
+            filename: path to the file
+        """
+        def _read(encoding):
+            lines = []
+            n_data = 0
+            with open(filename, "r", encoding=encoding) as f:
+                for line in f:
+                    lines.append(line)
+                    if line.startswith(self.DEFAULT_HEADER_LINE_START):
+                        n_data = 0
+                    else:
+                        n_data += 1
+                    if n_data >= self.HEADER_SCAN_DATA_LINES:
+                        break
+            return lines
+
+        try:
+            lines = _read("utf-8-sig")
+        except UnicodeDecodeError:
+            lines = _read("latin1")
+        return lines
+
+    def _declared_layout(
+        self, filename: str
+    ) -> Tuple[Optional[LayoutDeclaration], Optional[List[str]]]:
+        """
+        Find a declared layout matching the file. Only the header lines of
+        the file are read.
+
+        Args:
+            filename: path to the file
+
+        Returns:
+            The matching declaration and the lines read, or None for both
+            if no declaration verifies against the file
+        """
+        for declaration in self.layout_declarations():
+            if not declaration.matches_filename(filename):
+                continue
+            header_pos = declaration.header_position
+            # Read the line after the header too, to verify it is data
+            lines = self._read_lines(filename, header_pos + 2)
+            if declaration.matches_lines(
+                lines, self.DEFAULT_HEADER_LINE_START
+            ) and (
+                declaration.columns is None or tuple(
+                    StringManager.standardize_key(c) for c in
+                    self._split_columns(
+                        lines[header_pos], declaration.column_sep
+                    )
+                ) == declaration.columns
+            ):
+                LOG.debug(
+                    f"Using declared layout {declaration.pattern} for "
+                    f"{filename}"
+                )
+                return declaration, lines
+
+            LOG.debug(
+                f"{filename} does not match declared layout "
+                f"{declaration.pattern}, searching for the header"
+            )
+        return None, None
+
     def _iterative_header_pos_search(self, lines, n_columns, header_indicator):
         # Use these to monitor if a larger column count is found
         header_pos = 0
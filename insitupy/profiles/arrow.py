@@ -0,0 +1,314 @@
+import json
+import logging
+from dataclasses import asdict, fields
+from typing import List, Optional, Tuple
+
+import attrs
+import numpy as np
+import pandas as pd
+import pyarrow as pa
+import shapely
+
+from insitupy.profiles.metadata import ProfileMetaData
+from insitupy.variables import MeasurementDescription
+
+LOG = logging.getLogger(__name__)
+
+# Key of the insitupy entries in the schema metadata
+SCHEMA_KEY = b"insitupy"
+PROFILE_INDEX_COLUMN = "profile_index"
+VARIABLE_COLUMN = "variable"
+VALUE_COLUMN = "value"
+GEOMETRY_COLUMN = "geometry"
+GEOMETRY_ENCODINGS = ["WKB", "geoarrow"]
+CRS = "EPSG:4326"
+# dtype kinds whose arrays share the memory of the DataFrame
+NUMERIC_KINDS = "iufb"
+
+METADATA_FIELDS = [f.name for f in fields(ProfileMetaData)]
+VARIABLE_FIELDS = [f.name for f in attrs.fields(MeasurementDescription)]
+
+
+def _array(series: pd.Series) -> pa.Array:
+    """
+    Arrow array of a column. Numeric columns share the memory of the
+    DataFrame.
+    """
+    values = series.to_numpy()
+    if values.dtype.kind in NUMERIC_KINDS:
+        return pa.array(values)
+    return pa.array(series, from_pandas=True)
+
+
+def _repeated(value, n: int) -> pa.DictionaryArray:
+    """
+    Array of n times the same value, which is stored once
+    """
+    if value is None:
+        return pa.DictionaryArray.from_arrays(
+            pa.nulls(n, pa.int32()), pa.array([], pa.string())
+        )
+    if isinstance(value, pd.Timestamp):
+        dictionary = pa.Array.from_pandas(pd.Series([value]))
+    else:
+        dictionary = pa.array([value])
+    return pa.DictionaryArray.from_arrays(
+        pa.array(np.zeros(n, dtype=np.int32)), dictionary
+    )
+
+
+def _repeated_list(values: List[str], n: int) -> pa.Array:
+    """
+    Array of n times the same list of strings, which are stored once
+    """
+    value_type = pa.dictionary(pa.int32(), pa.string())
+    if values is None:
+        return pa.nulls(n, pa.list_(value_type))
+    k = len(values)
+    items = pa.DictionaryArray.from_arrays(
+        pa.array(np.tile(np.arange(k, dtype=np.int32), n)),
+        pa.array(values, pa.string())
+    )
+    offsets = pa.array(np.arange(0, n * k + 1, k, dtype=np.int32))
+    return pa.ListArray.from_arrays(offsets, items)
+
+
+def _geometry(
+    metadata: ProfileMetaData, n: int, encoding: str
+) -> Tuple[pa.Array, pa.Field]:
+    """
+    Point geometry of the profile location, as WKB or as a native
+    geoarrow point array
+    """
+    extension_metadata = json.dumps({"crs": CRS, "crs_type": "authority_code"})
+    if encoding == "WKB":
+        wkb = shapely.to_wkb(
+            shapely.Point(metadata.longitude, metadata.latitude)
+        )
+        array = pa.array([wkb] * n, pa.binary())
+        name = "geoarrow.wkb"
+    elif encoding == "geoarrow":
+        array = pa.StructArray.from_arrays(
+            [
+                pa.array(np.full(n, metadata.longitude, dtype=float)),
+                pa.array(np.full(n, metadata.latitude, dtype=float)),
+            ],
+            names=["x", "y"]
+        )
+        name = "geoarrow.point"
+    else:
+        raise ValueError(
+            f"{encoding} is not a valid geometry encoding. Options are:"
+            f" {GEOMETRY_ENCODINGS}"
+        )
+    field = pa.field(
+        GEOMETRY_COLUMN, array.type, metadata={
+            "ARROW:extension:name": name,
+            "ARROW:extension:metadata": extension_metadata,
+        }
+    )
+    return array, field
+
+
+def _json_metadata(metadata: ProfileMetaData) -> dict:
+    values = asdict(metadata)
+    if values["date_time"] is not None:
+        values["date_time"] = pd.Timestamp(values["date_time"]).isoformat()
+    return values
+
+
+def value_column(
+    variable: MeasurementDescription, df: Optional[pd.DataFrame]
+) -> str:
+    """
+    Table column of the values of a profile. Numeric values of all
+    variables share the 'value' column, other values, e.g. comments, get a
+    column per variable, so the tables of all profiles can be concatenated.
+    """
+    if df is None or variable.code not in df.columns or \
+            df[variable.code].to_numpy().dtype.kind in NUMERIC_KINDS:
+        return VALUE_COLUMN
+    return f"{VALUE_COLUMN}_{variable.code}"
+
+
+def profile_description(
+    variable: MeasurementDescription,
+    unit: str,
+    columns: List[str],
+    dtypes: List[str],
+    value_name: str = VALUE_COLUMN
+) -> dict:
+    """
+    Entry of a profile in the schema metadata
+
+    Args:
+        variable: variable of the profile
+        unit: unit of the variable values
+        columns: data columns of the profile as parsed, in order
+        dtypes: dtypes of the data columns
+        value_name: table column of the variable values, see value_column
+    """
+    return {
+        "variable": {
+            name: getattr(variable, name) for name in VARIABLE_FIELDS
+        },
+        "unit": unit,
+        "columns": columns,
+        "dtypes": dtypes,
+        "value_column": value_name,
+    }
+
+
+def _table_names(description: dict) -> List[str]:
+    """
+    Table columns of the data columns of a profile description
+    """
+    code = description["variable"]["code"]
+    return [
+        description["value_column"] if c == code else c
+        for c in description["columns"]
+    ]
+
+
+def profile_table(
+    df: pd.DataFrame,
+    variable: MeasurementDescription,
+    metadata: ProfileMetaData,
+    columns: List[str],
+    profile_index: int = 0,
+    geometry_encoding: str = "WKB"
+) -> pa.Table:
+    """
+    Long table of the layers of a profile. The data columns share the
+    memory of the DataFrame, the metadata is dictionary encoded and the
+    location is a point geometry. Every table has a 'value' column, null
+    when the values are in a column of their own, see value_column.
+
+    Args:
+        df: data of the profile, can be None
+        variable: variable of the profile
+        metadata: metadata of the profile
+        columns: data columns of df as parsed, in order
+        profile_index: position of the profile in its collection
+        geometry_encoding: 'WKB' or 'geoarrow' points
+    """
+    n = 0 if df is None else len(df)
+    value_name = value_column(variable, df)
+    arrays = [
+        pa.array(np.full(n, profile_index, dtype=np.int32)),
+        _repeated(variable.code, n),
+    ]
+    names = [PROFILE_INDEX_COLUMN, VARIABLE_COLUMN]
+    for column in columns:
+        arrays.append(_array(df[column]))
+        names.append(value_name if column == variable.code else column)
+    if VALUE_COLUMN not in names:
+        arrays.append(pa.nulls(n, pa.float64()))
+        names.append(VALUE_COLUMN)
+    for name in METADATA_FIELDS:
+        value = getattr(metadata, name)
+        if name == "observers":
+            arrays.append(_repeated_list(value, n))
+        else:
+            arrays.append(_repeated(value, n))
+        names.append(name)
+
+    schema_fields = [pa.field(name, a.type) for name, a in zip(names, arrays)]
+    geometry, geometry_field = _geometry(metadata, n, geometry_encoding)
+    return pa.Table.from_arrays(
+        arrays + [geometry], schema=pa.schema(schema_fields + [geometry_field])
+    )
+
+
+def with_schema_metadata(
+    table: pa.Table, metadata: ProfileMetaData, profiles: List[dict]
+) -> pa.Table:
+    """
+    Add the metadata and profile descriptions used to rebuild profiles
+    """
+    return table.replace_schema_metadata({
+        SCHEMA_KEY: json.dumps({
+            "metadata": _json_metadata(metadata),
+            "profiles": profiles,
+        })
+    })
+
+
+def read_schema_metadata(
+    table: pa.Table
+) -> Tuple[ProfileMetaData, List[dict]]:
+    """
+    Metadata and profile descriptions of a table from profile_table
+
+    Raises:
+        ValueError: if the table was not written by insitupy
+    """
+    schema_metadata = table.schema.metadata or {}
+    if SCHEMA_KEY not in schema_metadata:
+        raise ValueError("Table has no insitupy profile description")
+    content = json.loads(schema_metadata[SCHEMA_KEY])
+    values = content["metadata"]
+    if values["date_time"] is not None:
+        values["date_time"] = pd.Timestamp(values["date_time"])
+    return ProfileMetaData(**values), content["profiles"]
+
+
+def variable_from_description(description: dict) -> MeasurementDescription:
+    """
+    Canonical variable of a profile description
+    """
+    return MeasurementDescription.intern(**description["variable"])
+
+
+def profile_rows(table: pa.Table, profile_index: int) -> pa.Table:
+    """
+    Rows of a profile in a table sorted by profile index, without copying
+    """
+    indices = table.column(PROFILE_INDEX_COLUMN).to_numpy()
+    start, end = np.searchsorted(indices, [profile_index, profile_index + 1])
+    return table.slice(start, end - start)
+
+
+def _missing_as_nan(values: np.ndarray) -> np.ndarray:
+    """
+    Missing values of object columns, which Arrow returns as None, as NaN
+    like read_csv
+    """
+    if values.dtype != object:
+        return values
+    return np.where(pd.isna(values), np.nan, values)
+
+
+def data_from_table(table: pa.Table, description: dict) -> pd.DataFrame:
+    """
+    Data of a profile as parsed, from its rows of a profile table
+    """
+    columns = description["columns"]
+    df = table.select(_table_names(description)).to_pandas()
+    df.columns = columns
+    df = df.astype(dict(zip(columns, description["dtypes"])))
+    for column in df.columns[df.dtypes == object]:
+        df[column] = _missing_as_nan(df[column].to_numpy())
+    return df
+
+
+def data_views(table: pa.Table, description: dict) -> pd.DataFrame:
+    """
+    Data of a profile from its rows of a profile table. Numeric columns
+    without nulls are read only views of the table memory.
+    """
+    data = {}
+    for column, name, dtype in zip(
+        description["columns"], _table_names(description),
+        description["dtypes"]
+    ):
+        chunked = table.column(name)
+        if chunked.num_chunks == 1:
+            array = chunked.chunk(0)
+        else:
+            array = pa.concat_arrays(chunked.chunks)
+        values = array.to_numpy(zero_copy_only=False)
+        if values.dtype != dtype:
+            values = values.astype(dtype)
+        data[column] = _missing_as_nan(values)
+    return pd.DataFrame(data, copy=False)
@@ -1,16 +1,25 @@
 import logging
+from itertools import count
 
 import geopandas as gpd
 import numpy as np
 import pandas as pd
 
-from typing import Union
+from typing import TYPE_CHECKING, List, Optional, Sequence, Tuple, Union
 
 from insitupy.io.metadata import MetaDataParser
+from insitupy.profiles import binning, windows
+from insitupy.profiles.metadata import ProfileMetaData
 from insitupy.variables import MeasurementDescription
 
+if TYPE_CHECKING:
+    import pyarrow as pa
+
 LOG = logging.getLogger(__name__)
 
+# Increasing stamps of data accesses, next() on it needs no lock
+_ACCESS_CLOCK = count()
+
 
 class MeasurementData:
     """
@@ -40,7 +49,7 @@ class MeasurementData:
         self._meta_parser = meta_parser
 
         if variable is None:
-            variable = MeasurementDescription()
+            variable = MeasurementDescription.intern()
         self.variable = variable
 
         # mapping of all column names to a measurement type
@@ -48,6 +57,9 @@ class MeasurementData:
         self._sample_column = None
 
         self._df = None
+        # Optional callable that loads the data when df is first accessed
+        self._loader = None
+        self._last_access = 0
         self._metadata = None
         # Columns that were identified in via MetaDataParser
         self._meta_columns_map = None
@@ -55,6 +67,9 @@ class MeasurementData:
     def _set_column_mappings(self):
         # Get rid of columns we don't want and populate column mapping
         for column in self.columns:
+            # Columns can be known already, e.g. from from_dataframe
+            if column in self._column_mappings:
+                continue
             # Find the variable associated with each column
             # and store a map
             cn, cm = self._meta_parser.primary_variables.from_mapping(column)
@@ -64,7 +79,7 @@ class MeasurementData:
     def _check_sample_columns(self):
         _sample_columns = [
             c for c in self.columns
-            if self._column_mappings.get(c) == self.variable
+            if self._column_mappings.get(c) is self.variable
         ]
 
         if len(_sample_columns) == 0:
@@ -86,7 +101,7 @@ class MeasurementData:
         # it was a multi-sample variable
         # Columns related to the variable
         sample_column_type = self._column_mappings[_sample_column]
-        if sample_column_type != self.variable:
+        if sample_column_type is not self.variable:
             raise ValueError(
                 f"{sample_column_type} and {self.variable} are not the same"
             )
@@ -119,8 +134,41 @@ class MeasurementData:
 
     @property
     def df(self):
+        if self._loader is not None:
+            self._last_access = next(_ACCESS_CLOCK)
+            if self._df is None:
+                self._loader(self)
         return self._df
 
+    @property
+    def is_loaded(self) -> bool:
+        return self._df is not None
+
+    @property
+    def last_access(self) -> int:
+        """
+        Order of the latest access of df, for objects with a loader
+        """
+        return self._last_access
+
+    def set_loader(self, loader):
+        """
+        Defer reading the data until df is first accessed
+
+        Args:
+            loader: callable taking this object, that sets df. It is called
+                on the accesses of df while the data is not loaded.
+        """
+        self._loader = loader
+
+    def unload(self):
+        """
+        Release the data of an object with a loader. It is read again on the
+        next access of df.
+        """
+        if self._loader is not None:
+            self._df = None
+
     @df.setter
     def df(self, value):
         self._df = value
@@ -151,8 +199,16 @@ class MeasurementData:
     def _format_df(self):
         raise NotImplementedError("not implemented")
 
+    def shared_column_options(self) -> List[MeasurementDescription]:
+        """
+        Variables of the columns shared by all measurements in a file
+        """
+        return []
+
     @staticmethod
-    def read_csv_dataframe(profile_filename, columns, header_position):
+    def read_csv_dataframe(
+        profile_filename, columns, header_position, usecols=None
+    ):
         """
         Read in a profile file. Managing the number of lines to skip and
         adjusting column names
@@ -162,22 +218,57 @@ class MeasurementData:
                              profile
             columns: list of columns to use in dataframe
             header_position: skiprows for pd.read_csv
+            usecols: Optional positions of the columns to read
         Returns:
             df: pd.dataframe of the csv data with desired column names
         """
         raise NotImplementedError("Not implemented")
 
-    def from_csv(self, filename: str):
+    def _project_columns(
+        self, columns: List[str], variables: List[str]
+    ) -> List[int]:
+        """
+        Positions of the shared columns and the columns of the requested
+        variables. Limits the column map to these columns.
+
+        Args:
+            columns: all columns in the file
+            variables: requested variable codes
+        """
+        shared = set(self.shared_column_options())
+        usecols = []
+        for i, column in enumerate(columns):
+            variable = self._meta_columns_map.get(column)
+            if variable is not None and (
+                variable in shared or variable.code in variables
+            ):
+                usecols.append(i)
+        selected = {columns[i] for i in usecols}
+        self._meta_columns_map = {
+            c: v for c, v in self._meta_columns_map.items() if c in selected
+        }
+        return usecols
+
+    def from_csv(
+        self,
+        filename: str,
+        metadata: ProfileMetaData = None,
+        variables: List[str] = None
+    ):
         """
         Parse all information of a given file, including the header and actual
         data.
 
         Args:
             filename: (str) Path of a file to read
+            metadata: Optional already parsed metadata for this file, which
+                skips parsing it from the header again
+            variables: Optional variable codes to read. Only the shared
+                columns and the columns of these variables are parsed.
         """
         # Parse the metadata and column info
         self._metadata, meta_columns, self._meta_columns_map, header_pos = \
-            self._meta_parser.parse(filename=filename)
+            self._meta_parser.parse(filename=filename, metadata=metadata)
 
         # read in the actual data
         if meta_columns is None and not self._meta_columns_map:
@@ -185,10 +276,33 @@ class MeasurementData:
             LOG.warning(f"File {filename} is empty of rows")
             self.df = pd.DataFrame()
         else:
+            usecols = None
+            if variables is not None:
+                usecols = self._project_columns(meta_columns, variables)
             self.df = self.read_csv_dataframe(
-                filename, meta_columns, header_pos
+                filename, meta_columns, header_pos, usecols=usecols
             )
 
+    def from_dataframe(
+        self,
+        df: pd.DataFrame,
+        metadata: ProfileMetaData,
+        columns_map: dict
+    ):
+        """
+        Set already parsed data, e.g. read back from a columnar file. The
+        column names are not mapped through the variable definitions again.
+
+        Args:
+            df: data with the columns as parsed from the file
+            metadata: metadata of the measurement
+            columns_map: map of every column name in df to its variable
+        """
+        self._metadata = metadata
+        self._meta_columns_map = dict(columns_map)
+        self._column_mappings = dict(columns_map)
+        self.df = df
+
 
 class ProfileData(MeasurementData):
     """
@@ -244,9 +358,11 @@ class ProfileData(MeasurementData):
         # Filter to the desired measurement columns
         self._set_column_mappings()
         if len(self._measurements_to_keep) > 0:
+            # Descriptions hash by identity, so this is a cheap lookup
+            measurements_to_keep = set(self._measurements_to_keep)
             columns_to_keep = [
                 c for c in self.columns
-                if self._column_mappings[c] in self._measurements_to_keep
+                if self._column_mappings[c] in measurements_to_keep
             ]
             self._df = self._df.loc[:, columns_to_keep]
 
@@ -255,7 +371,17 @@ class ProfileData(MeasurementData):
             self._check_sample_columns()
 
         self.describe()
+        self._add_time_and_location()
+        self._df.replace(self.NAN_DATA_VALUE, np.NaN, inplace=True)
+
+    def _add_time_and_location(self, copy: bool = True):
+        """
+        Add the datetime column and make the df a GeoDataFrame with the
+        location of the metadata
 
+        Args:
+            copy: copy the data into the GeoDataFrame
+        """
         n_entries = len(self._df)
         self._df["datetime"] = [self._dt] * n_entries
 
@@ -265,10 +391,27 @@ class ProfileData(MeasurementData):
             [lon] * n_entries, [lat] * n_entries
         )
 
-        self._df = gpd.GeoDataFrame(self._df, geometry=location).set_crs(
-            "EPSG:4326"
+        self._df = gpd.GeoDataFrame(
+            self._df, geometry=location, crs="EPSG:4326", copy=copy
         )
-        self._df.replace(self.NAN_DATA_VALUE, np.NaN, inplace=True)
+
+    def set_formatted_df(self, df: pd.DataFrame, metadata: ProfileMetaData):
+        """
+        Use data that is formatted already, e.g. columns of another
+        profile that are shared between processes. The given columns are
+        neither copied nor modified, so read only arrays stay valid. The
+        derived columns are added.
+
+        Args:
+            df: the data columns of the profile, with the variable column
+                named by the variable code
+            metadata: metadata of the profile
+        """
+        self._metadata = metadata
+        self._df = df
+        self._sample_column = self.variable.code
+        self.describe()
+        self._add_time_and_location(copy=False)
 
     def _add_thickness_to_df(self) -> None:
         """
@@ -284,15 +427,119 @@ class ProfileData(MeasurementData):
             self._df[self._lower_depth_layer.code]
         )
 
-    def from_csv(self, filename: str):
+    def from_csv(
+        self,
+        filename: str,
+        metadata: ProfileMetaData = None,
+        variables: List[str] = None
+    ):
         """
         See MeasurementData.from_csv
         """
-        super().from_csv(filename)
+        super().from_csv(filename, metadata=metadata, variables=variables)
 
         if len(self.columns) > 0 and self._depth_layer.code not in self.columns:
             raise ValueError(f"Expected {self._depth_layer} in columns")
 
+    @property
+    def data_columns(self) -> List[str]:
+        """
+        Columns of the data as parsed from the file, in order. Columns
+        derived when formatting the data are left out.
+        """
+        df = self.df
+        if df is None:
+            return []
+        codes = {v.code for v in self.shared_column_options()}
+        codes.add(self.variable.code)
+        return [c for c in df.columns if c in codes]
+
+    def to_arrow(
+        self, geometry_encoding: str = "WKB", profile_index: int = 0
+    ) -> "pa.Table":
+        """
+        Arrow table with a row per layer. The numeric data columns share
+        the memory of df, the variable and metadata are dictionary encoded
+        columns and the location is a WKB or geoarrow point column. The
+        numeric values of the variable are in the 'value' column, others
+        in a column of their own, see arrow.value_column.
+
+        Args:
+            geometry_encoding: 'WKB' or 'geoarrow'
+            profile_index: position of the profile in its collection
+
+        Returns:
+            The table, with the information to rebuild the profile in the
+            schema metadata
+        """
+        from insitupy.profiles import arrow
+
+        df = self.df
+        columns = self.data_columns
+        table = arrow.profile_table(
+            df, self.variable, self.metadata, columns,
+            profile_index=profile_index, geometry_encoding=geometry_encoding
+        )
+        description = arrow.profile_description(
+            self.variable, self.units_map.get(self.variable.code), columns,
+            [str(df[c].dtype) for c in columns],
+            value_name=arrow.value_column(self.variable, df)
+        )
+        return arrow.with_schema_metadata(table, self.metadata, [description])
+
+    @classmethod
+    def from_arrow(
+        cls,
+        table: "pa.Table",
+        meta_parser: MetaDataParser = None,
+        profile_index: int = 0,
+        zero_copy: bool = False
+    ) -> "ProfileData":
+        """
+        Rebuild a profile from a table of to_arrow
+
+        Args:
+            table: table of one or more profiles
+            meta_parser: Optional parser holding the variable definitions.
+                A default parser with the unit of the profile is used when
+                not given.
+            profile_index: position of the profile in the table
+            zero_copy: Use read only views of the numeric table columns as
+                the data instead of parsing a copy
+        """
+        from insitupy.profiles import arrow
+
+        metadata, descriptions = arrow.read_schema_metadata(table)
+        description = descriptions[profile_index]
+        variable = arrow.variable_from_description(description)
+        if meta_parser is None:
+            units_map = {}
+            if description["unit"] is not None:
+                units_map[variable.code] = description["unit"]
+            meta_parser = cls.META_PARSER(units_map=units_map)
+
+        profile = cls(variable=variable, meta_parser=meta_parser)
+        if description["columns"] and zero_copy:
+            profile.set_formatted_df(
+                arrow.data_views(
+                    arrow.profile_rows(table, profile_index), description
+                ),
+                metadata
+            )
+        elif description["columns"]:
+            columns_map = {c.code: c for c in profile.shared_column_options()}
+            columns_map[variable.code] = variable
+            profile.from_dataframe(
+                arrow.data_from_table(
+                    arrow.profile_rows(table, profile_index), description
+                ),
+                metadata,
+                {c: columns_map[c] for c in description["columns"]}
+            )
+        else:
+            profile.metadata = metadata
+        return profile
+
     def describe(self) -> None:
         """
         Set internal properties based on csv file information and add some
@@ -325,7 +572,7 @@ class ProfileData(MeasurementData):
             raise RuntimeError("Cannot compute for no layers")
 
         # this should work for multi or not multi sample
-        profile = self._df.loc[:, self._sample_column]
+        profile = self.df.loc[:, self._sample_column]
         self._df["mean"] = profile
         # TODO: sum up with depth change
         # TODO: could we use the weighted mean * the total depth?
@@ -334,7 +581,7 @@ class ProfileData(MeasurementData):
 
     @property
     def mean(self):
-        profile = self._df.loc[:, self._sample_column]
+        profile = self.df.loc[:, self._sample_column]
         if pd.isna(profile).all():
             return np.nan
 
@@ -359,13 +606,121 @@ class ProfileData(MeasurementData):
 
     @property
     def total_depth(self):
-        profile = self._df.loc[:, self._depth_layer.code].values
+        profile = self.df.loc[:, self._depth_layer.code].values
         return np.nanmax(profile)
 
+    def layer_depths(
+        self, depth_datum: str = "snow_height"
+    ) -> Tuple[np.ndarray, Optional[np.ndarray]]:
+        """
+        Top and bottom depths of the layers in a depth datum. The bottom is
+        None for profiles of point measurements.
+
+        Args:
+            depth_datum: 'snow_height' or 'surface_datum', see
+                standardize_depth
+        """
+        df = self.df
+        depth = self._depth_layer.code
+        top = standardize_depth(df[depth], desired_format=depth_datum)
+        bottom = None
+        if self._lower_depth_layer.code in df.columns:
+            # Keep the layers aligned with their converted top
+            bottom = (
+                df[self._lower_depth_layer.code] + (top - df[depth])
+            ).to_numpy(dtype=float)
+        return top.to_numpy(dtype=float), bottom
+
+    def aggregate(
+        self,
+        top: float,
+        bottom: float,
+        how: str = "mean",
+        depth_datum: str = "snow_height"
+    ) -> float:
+        """
+        Statistic of the values within a depth band, e.g. the density of
+        the top 30 cm with aggregate(0, -30, depth_datum="surface_datum").
+        Layers are clipped to the band and weighted by the overlapping
+        thickness, point measurements in the band are weighted equally.
+
+        Args:
+            top: top of the band
+            bottom: bottom of the band
+            how: one of windows.AGGREGATIONS
+            depth_datum: datum of the band depths, 'snow_height' or
+                'surface_datum'
+
+        Returns:
+            The statistic, NaN if no values are in the band
+        """
+        return windows.aggregate_profiles(
+            [self], top, bottom, how=how, depth_datum=depth_datum
+        )[0]
+
+    def bin_intervals(
+        self,
+        top: np.ndarray,
+        bottom: np.ndarray,
+        statistics: Sequence[str] = binning.DEFAULT_STATISTICS,
+        depth_datum: str = "surface_datum"
+    ) -> pd.DataFrame:
+        """
+        Statistics of the values within depth intervals, e.g. of a high
+        resolution SMP profile within pit layers. An interval holds the
+        values from its bottom up to, but not including, its top. Layers
+        are binned at their center.
+
+        Args:
+            top: top of every interval
+            bottom: bottom of every interval
+            statistics: any of binning.BIN_STATISTICS and percentiles like
+                'p90'
+            depth_datum: datum of the interval depths, 'surface_datum' or
+                'snow_height'
+
+        Returns:
+            Frame with a row per interval and a column per statistic
+        """
+        depths = binning.point_depths(self, depth_datum)
+        values = pd.to_numeric(
+            self.df[self.variable.code], errors="coerce"
+        ).to_numpy(dtype=float)
+        return binning.bin_values(
+            depths, values, np.minimum(top, bottom), np.maximum(top, bottom),
+            statistics=statistics
+        )
+
+    def bin_onto(
+        self,
+        layers: "ProfileData",
+        statistics: Sequence[str] = binning.DEFAULT_STATISTICS,
+        depth_datum: str = "surface_datum"
+    ) -> pd.DataFrame:
+        """
+        Statistics of the values within the layers of another profile,
+        e.g. SMP force within the layers of a co-located pit. See
+        binning.bin_onto_layers for many pairs at once.
+
+        Args:
+            layers: profile with layers
+            statistics: any of binning.BIN_STATISTICS and percentiles like
+                'p90'
+            depth_datum: datum the depths of both profiles are compared
+                in, surface_datum aligns the snow surfaces
+
+        Returns:
+            Frame with the top and bottom of every layer and a column per
+            statistic
+        """
+        return binning.bin_onto_layers(
+            [(self, layers)], statistics=statistics, depth_datum=depth_datum
+        ).drop(columns=binning.PAIR_COLUMN)
+
     def get_profile(self, snow_datum="ground"):
         # TODO: snow datum is ground or snow
         # get profile of values
-        profile_average = self._df.loc[:, self._sample_column]
+        profile_average = self.df.loc[:, self._sample_column]
         df = self._df.copy()
         df[self.variable.code] = profile_average
         columns_of_interest = [*self._non_measure_columns, self.variable.code]
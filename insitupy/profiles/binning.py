@@ -0,0 +1,247 @@
+import logging
+import re
+from typing import List, Optional, Sequence, Tuple
+
+import numpy as np
+import pandas as pd
+
+LOG = logging.getLogger(__name__)
+
+# Statistics besides percentiles, which are named 'p<percent>', e.g. 'p90'
+BIN_STATISTICS = ["mean", "sum", "count", "median", "min", "max"]
+DEFAULT_STATISTICS = ["mean", "median", "count"]
+PERCENTILE_PATTERN = re.compile(r"^p(?P<percent>\d+(\.\d+)?)$")
+PAIR_COLUMN = "pair"
+TOP_COLUMN = "top"
+BOTTOM_COLUMN = "bottom"
+
+
+def _percent(statistic: str) -> Optional[float]:
+    """
+    Percent of a statistic, None for statistics that are not percentiles
+
+    Raises:
+        ValueError: for unknown statistics
+    """
+    if statistic == "median":
+        return 50.0
+    if statistic in BIN_STATISTICS:
+        return None
+    match = PERCENTILE_PATTERN.match(statistic)
+    if match is None or float(match.group("percent")) > 100:
+        raise ValueError(
+            f"{statistic} is not a valid statistic. Options are:"
+            f" {BIN_STATISTICS} or percentiles like 'p90'"
+        )
+    return float(match.group("percent"))
+
+
+def _sorted_keys(
+    depths: np.ndarray, groups: np.ndarray, width: float, low: float
+) -> np.ndarray:
+    """
+    Sort keys of depths that keep the groups apart, so the intervals of
+    all groups are found with one searchsorted
+    """
+    return groups * width + (depths - low)
+
+
+def bin_values(
+    depths: np.ndarray,
+    values: np.ndarray,
+    lower: np.ndarray,
+    upper: np.ndarray,
+    statistics: Sequence[str] = DEFAULT_STATISTICS,
+    groups: Optional[np.ndarray] = None,
+    interval_groups: Optional[np.ndarray] = None
+) -> pd.DataFrame:
+    """
+    Statistics of the values within depth intervals. The values are sorted
+    by depth once and the ends of every interval are found by a binary
+    search. Counts, sums and means come from cumulative sums, medians and
+    percentiles from the sorted values of each interval. Intervals are
+    [lower, upper) and may overlap. NaN values are ignored.
+
+    Args:
+        depths: depth of every value
+        values: the values
+        lower: lower depth of every interval
+        upper: upper depth of every interval
+        statistics: any of BIN_STATISTICS and percentiles like 'p90'
+        groups: Optional group of every value, e.g. the profile, as
+            integers from 0
+        interval_groups: group of every interval, required with groups.
+            Intervals only hold the values of their group.
+
+    Returns:
+        Frame with a row per interval and a column per statistic. Empty
+        intervals are NaN, except for the count and sum.
+    """
+    percents = {s: _percent(s) for s in statistics}
+    depths, values = np.asarray(depths, float), np.asarray(values, float)
+    lower, upper = np.asarray(lower, float), np.asarray(upper, float)
+    if groups is None:
+        groups = np.zeros(len(depths), dtype=np.int64)
+        interval_groups = np.zeros(len(lower), dtype=np.int64)
+    elif interval_groups is None:
+        raise ValueError("Intervals need a group when the values have one")
+    groups = np.asarray(groups, dtype=np.int64)
+    interval_groups = np.asarray(interval_groups, dtype=np.int64)
+
+    valid = ~(np.isnan(depths) | np.isnan(values))
+    depths, values, groups = depths[valid], values[valid], groups[valid]
+    order = np.lexsort((depths, groups))
+    depths, values, groups = depths[order], values[order], groups[order]
+
+    # Edges beyond all depths hold the same values as the outermost depths
+    low = np.min(depths) if len(depths) else 0.0
+    high = np.max(depths) if len(depths) else 0.0
+    width = high - low + 2
+    keys = _sorted_keys(depths, groups, width, low)
+    starts = np.searchsorted(keys, _sorted_keys(
+        np.clip(lower, low, high + 1), interval_groups, width, low
+    ), side="left")
+    ends = np.searchsorted(keys, _sorted_keys(
+        np.clip(upper, low, high + 1), interval_groups, width, low
+    ), side="left")
+    ends = np.maximum(starts, ends)
+    counts = ends - starts
+
+    result = {}
+    cumulative = np.concatenate([[0.0], np.cumsum(values)])
+    sums = cumulative[ends] - cumulative[starts]
+    with np.errstate(invalid="ignore", divide="ignore"):
+        means = np.where(counts > 0, sums / counts, np.nan)
+
+    ordered = offsets = None
+    if any(p is not None for p in percents.values()) or \
+            "min" in statistics or "max" in statistics:
+        ordered, offsets = _interval_values(values, starts, counts)
+
+    for statistic, percent in percents.items():
+        if statistic == "count":
+            result[statistic] = counts
+        elif statistic == "sum":
+            result[statistic] = sums
+        elif statistic == "mean":
+            result[statistic] = means
+        elif statistic == "min":
+            result[statistic] = _order_statistic(ordered, offsets, counts, 0)
+        elif statistic == "max":
+            result[statistic] = _order_statistic(
+                ordered, offsets, counts, 100
+            )
+        else:
+            result[statistic] = _order_statistic(
+                ordered, offsets, counts, percent
+            )
+    return pd.DataFrame(result, columns=list(statistics))
+
+
+def _interval_values(
+    values: np.ndarray, starts: np.ndarray, counts: np.ndarray
+) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Values of every interval, sorted within each interval, concatenated,
+    and the offset of every interval in them
+    """
+    total = int(counts.sum())
+    offsets = np.concatenate([[0], np.cumsum(counts)[:-1]]).astype(np.int64)
+    positions = np.repeat(starts - offsets, counts) + np.arange(total)
+    intervals = np.repeat(np.arange(len(counts)), counts)
+    gathered = values[positions]
+    return gathered[np.lexsort((gathered, intervals))], offsets
+
+
+def _order_statistic(
+    ordered: np.ndarray, offsets: np.ndarray, counts: np.ndarray,
+    percent: float
+) -> np.ndarray:
+    """
+    Percentile of the sorted values of every interval, interpolated
+    linearly like np.percentile
+    """
+    result = np.full(len(counts), np.nan)
+    filled = counts > 0
+    position = (counts[filled] - 1) * percent / 100
+    below = np.floor(position).astype(np.int64)
+    above = np.minimum(below + 1, counts[filled] - 1)
+    start = offsets[filled]
+    fraction = position - below
+    result[filled] = ordered[start + below] * (1 - fraction) + \
+        ordered[start + above] * fraction
+    return result
+
+
+def point_depths(profile, depth_datum: str) -> np.ndarray:
+    """
+    Depth of every value of a profile, the center of layers
+    """
+    top, bottom = profile.layer_depths(depth_datum)
+    return top if bottom is None else (top + bottom) / 2
+
+
+def _intervals(layers, depth_datum: str) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Upper and lower depth of the layers of a profile
+    """
+    top, bottom = layers.layer_depths(depth_datum)
+    if bottom is None:
+        raise ValueError(
+            f"{layers.variable.code} of {layers.metadata.site_name} has no"
+            f" layers to bin onto"
+        )
+    return np.maximum(top, bottom), np.minimum(top, bottom)
+
+
+def bin_onto_layers(
+    pairs: List[tuple],
+    statistics: Sequence[str] = DEFAULT_STATISTICS,
+    depth_datum: str = "surface_datum"
+) -> pd.DataFrame:
+    """
+    Aggregate high resolution profiles, e.g. SMP force, onto the layers of
+    co-located profiles, e.g. pit density, for many pairs at once. Depths
+    are compared in the depth datum, surface_datum aligns the snow
+    surfaces of both profiles. Layered profiles are binned at the center
+    of their layers.
+
+    Args:
+        pairs: (high resolution profile, layered profile) pairs
+        statistics: any of BIN_STATISTICS and percentiles like 'p90'
+        depth_datum: 'surface_datum' or 'snow_height'
+
+    Returns:
+        Frame with a row per layer of every pair, with the pair position,
+        the top and bottom of the layer and a column per statistic
+    """
+    depths, values, groups = [], [], []
+    tops, bottoms, interval_groups = [], [], []
+    for i, (profile, layers) in enumerate(pairs):
+        top, bottom = _intervals(layers, depth_datum)
+        tops.append(top)
+        bottoms.append(bottom)
+        interval_groups.append(np.full(len(top), i))
+        df = profile.df
+        if df is None or df.empty:
+            continue
+        depths.append(point_depths(profile, depth_datum))
+        values.append(pd.to_numeric(
+            df[profile.variable.code], errors="coerce"
+        ).to_numpy(dtype=float))
+        groups.append(np.full(len(df), i))
+
+    def _flat(arrays, dtype=float):
+        return np.concatenate(arrays) if arrays else np.array([], dtype=dtype)
+
+    tops, bottoms = _flat(tops), _flat(bottoms)
+    interval_groups = _flat(interval_groups, int)
+    stats = bin_values(
+        _flat(depths), _flat(values), bottoms, tops, statistics=statistics,
+        groups=_flat(groups, int), interval_groups=interval_groups
+    )
+    LOG.debug(f"Binned {len(pairs)} profiles onto {len(tops)} layers")
+    stats.insert(0, BOTTOM_COLUMN, bottoms)
+    stats.insert(0, TOP_COLUMN, tops)
+    stats.insert(0, PAIR_COLUMN, interval_groups)
+    return stats
@@ -0,0 +1,139 @@
+import logging
+from typing import List, Union
+
+import numpy as np
+import pandas as pd
+
+LOG = logging.getLogger(__name__)
+
+AGGREGATIONS = ["mean", "sum", "min", "max", "count", "thickness"]
+
+
+def _bands(values: Union[float, np.ndarray], n: int) -> np.ndarray:
+    """
+    Band edge of every profile from one edge or an edge per profile
+    """
+    values = np.asarray(values, dtype=float)
+    if values.ndim == 0:
+        return np.full(n, float(values))
+    if len(values) != n:
+        raise ValueError(f"Got {len(values)} band edges for {n} profiles")
+    return values
+
+
+def aggregate_layers(
+    profile_index: np.ndarray,
+    lower: np.ndarray,
+    upper: np.ndarray,
+    values: np.ndarray,
+    band_lower: np.ndarray,
+    band_upper: np.ndarray,
+    n_profiles: int,
+    how: str = "mean"
+) -> np.ndarray:
+    """
+    Statistic of the layers of many profiles within a depth band per
+    profile, in one pass over all layers. Layers are clipped to the band
+    and weighted by their overlapping thickness. Point measurements have a
+    lower depth equal to the upper depth and a weight of one when inside
+    the band.
+
+    Args:
+        profile_index: profile of every layer
+        lower: lower depth of every layer
+        upper: upper depth of every layer
+        values: value of every layer
+        band_lower: lower depth of the band of every profile
+        band_upper: upper depth of the band of every profile
+        n_profiles: number of profiles
+        how: one of AGGREGATIONS. 'sum' is the sum of value times overlap,
+            'thickness' the total overlap.
+
+    Returns:
+        The statistic of every profile, NaN for profiles without layers in
+        the band, except for the count and thickness
+    """
+    if how not in AGGREGATIONS:
+        raise ValueError(
+            f"{how} is not a valid aggregation. Options are: {AGGREGATIONS}"
+        )
+    lows, highs = band_lower[profile_index], band_upper[profile_index]
+    layered = upper > lower
+    overlap = np.minimum(upper, highs) - np.maximum(lower, lows)
+    weights = np.where(
+        layered, np.clip(overlap, 0, None), (overlap >= 0).astype(float)
+    )
+    used = (weights > 0) & ~np.isnan(values) & ~np.isnan(weights)
+    index, weights, values = profile_index[used], weights[used], values[used]
+
+    counts = np.bincount(index, minlength=n_profiles)
+    if how == "count":
+        return counts.astype(float)
+    if how == "thickness":
+        # Point measurements have no thickness
+        return np.bincount(
+            index, weights=np.where(layered[used], weights, 0.0),
+            minlength=n_profiles
+        )
+    if how in ["min", "max"]:
+        result = np.full(n_profiles, np.nan)
+        (np.fmin if how == "min" else np.fmax).at(result, index, values)
+        return result
+
+    sums = np.bincount(index, weights=weights * values, minlength=n_profiles)
+    if how == "mean":
+        totals = np.bincount(index, weights=weights, minlength=n_profiles)
+        with np.errstate(invalid="ignore", divide="ignore"):
+            sums = sums / totals
+    sums[counts == 0] = np.nan
+    return sums
+
+
+def aggregate_profiles(
+    profiles: list,
+    top: Union[float, np.ndarray],
+    bottom: Union[float, np.ndarray],
+    how: str = "mean",
+    depth_datum: str = "snow_height"
+) -> np.ndarray:
+    """
+    Statistic of every profile within a depth band, see aggregate_layers.
+    The layers of all profiles are concatenated and aggregated together.
+
+    Args:
+        profiles: profiles with numeric values
+        top: top of the band, one for all profiles or one per profile
+        bottom: bottom of the band, one for all profiles or one per profile
+        how: one of AGGREGATIONS
+        depth_datum: datum of the band depths, 'snow_height' or
+            'surface_datum', see standardize_depth
+
+    Returns:
+        The statistic of every profile
+    """
+    n = len(profiles)
+    top, bottom = _bands(top, n), _bands(bottom, n)
+    indices: List[np.ndarray] = []
+    lowers, uppers, values = [], [], []
+    for i, profile in enumerate(profiles):
+        df = profile.df
+        if df is None or df.empty:
+            continue
+        layer_top, layer_bottom = profile.layer_depths(depth_datum)
+        if layer_bottom is None:
+            layer_bottom = layer_top
+        indices.append(np.full(len(df), i))
+        lowers.append(np.minimum(layer_top, layer_bottom))
+        uppers.append(np.maximum(layer_top, layer_bottom))
+        values.append(pd.to_numeric(
+            df[profile.variable.code], errors="coerce"
+        ).to_numpy(dtype=float))
+
+    def _flat(arrays, dtype):
+        return np.concatenate(arrays) if arrays else np.array([], dtype=dtype)
+
+    return aggregate_layers(
+        _flat(indices, int), _flat(lowers, float), _flat(uppers, float),
+        _flat(values, float), np.minimum(top, bottom),
+        np.maximum(top, bottom), n, how=how
+    )
@@ -1,5 +1,7 @@
 import logging
 import os.path
+import threading
+import weakref
 from pathlib import Path
 from typing import Dict, List, Tuple, Union
 
@@ -19,11 +21,16 @@ class InputMappingError(RuntimeError):
 
 
 # Similar to MeasurementDescription from metloom
-@attrs.frozen
+@attrs.frozen(eq=False)
 class MeasurementDescription:
     """
     data class for describing a measurement
 
+    Descriptions compare and hash by identity. Use
+    MeasurementDescription.intern to get the one canonical object for a
+    set of field values, which is what ExtendableVariables stores, so
+    registries loaded from the same definitions share their entries.
+
     Args:
         code: code used within the applicable API
         description: description of the sensor
@@ -38,7 +45,7 @@ class MeasurementDescription:
     description: str = None
     # Map to this variable from a list of options
     map_from: List = field(
-        default=[],
+        factory=list,
         validator=attrs.validators.optional(validators.instance_of(List))
     )
     # Auto remap the column to the code
@@ -48,18 +55,89 @@ class MeasurementDescription:
     # Optional value type casting
     cast_type: str = None
 
+    @property
+    def key(self) -> Tuple:
+        """
+        Hashable tuple of the field values used for interning
+        """
+        return (
+            self.code, self.description,
+            tuple(self.map_from) if self.map_from is not None else None,
+            self.auto_remap, self.match_on_code, self.cast_type
+        )
+
+    @classmethod
+    def intern(cls, **kwargs) -> "MeasurementDescription":
+        """
+        Get the canonical description for the given field values. A new
+        object is only created the first time a set of values is seen.
+
+        Args:
+            kwargs: MeasurementDescription fields
+
+        Returns:
+            The canonical MeasurementDescription
+        """
+        return cls.canonical(cls(**kwargs))
+
+    @classmethod
+    def canonical(
+        cls, description: "MeasurementDescription"
+    ) -> "MeasurementDescription":
+        """
+        Get the canonical description with the field values of a
+        description. The description becomes canonical if its values were
+        not seen before.
+
+        Args:
+            description: description built by any means
+
+        Returns:
+            The canonical MeasurementDescription
+        """
+        with _INTERN_LOCK:
+            return _INTERNED.setdefault(description.key, description)
+
+    def __reduce__(self):
+        # Unpickle to the canonical object, so identity survives the copies
+        # sent to and from worker processes
+        return _intern_fields, (attrs.asdict(self, recurse=False),)
+
+
+def _intern_fields(fields: dict) -> MeasurementDescription:
+    return MeasurementDescription.intern(**fields)
+
+
+# Canonical descriptions keyed by their field values
+_INTERNED = weakref.WeakValueDictionary()
+_INTERN_LOCK = threading.Lock()
+
+
+def _canonical_entry(
+    entry: Union[dict, MeasurementDescription]
+) -> MeasurementDescription:
+    """
+    Canonical description of an entry given as field values or as a
+    description
+    """
+    if isinstance(entry, MeasurementDescription):
+        return MeasurementDescription.canonical(entry)
+    return MeasurementDescription.intern(**entry)
+
 
 def variable_from_input(files: list[Union[str, Path]], self_):
     """
     Parses list of YAML files that have primary or metadata variable
-    definitions.
+    definitions. The entries are interned on every path, so registries
+    built from files or dicts share their descriptions.
 
     Args:
-        files (list[Union[str, Path]] | dict): List of files to parse.
+        files (list[Union[str, Path]] | dict): List of files to parse, or
+            a dict of entries given as descriptions or field values.
         self_: The instance of the initialized ExtendableVariables class.
 
     Returns:
-        dict: A dictionary with parsed MeasurementDescription objects.
+        dict: A dictionary with canonical MeasurementDescription objects.
 
     Raises:
         TypeError: If the input `x` is neither a list of files nor a valid
@@ -75,13 +153,13 @@ def variable_from_input(files: list[Union[str, Path]], self_):
                 data = yaml.safe_load(fp)
             # Merge, overwriting options with second
             pydash.merge(data_final, data)
-        return {k: MeasurementDescription(**v) for k, v in data_final.items()}
+        return {k: _canonical_entry(v) for k, v in data_final.items()}
     # Check that we have a dict
     if not isinstance(files, dict):
         raise TypeError(
             f"Expected to formulate dict, got {type(files)} with value {files}"
         )
-    return files
+    return {k: _canonical_entry(v) for k, v in files.items()}
 
 
 @attrs.define
@@ -111,6 +189,14 @@ class ExtendableVariables:
     def __len__(self):
         return len(self.entries)
 
+    @property
+    def signature(self) -> Tuple:
+        """
+        Hashable identity of the registry contents. Entries are interned,
+        so registries built from the same definitions share a signature.
+        """
+        return tuple(self.entries.items()), self.allow_map_failures
+
     def from_mapping(
         self, input_name
     ) -> Tuple[str, Dict[str, MeasurementDescription]]:
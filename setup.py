@@ -19,6 +19,14 @@ requirements = [
     "pydash>=8.0.5",
 ]
 
+extra_requirements = {
+    "arrow": ["pyarrow"],
+    "xarray": ["xarray"],
+    "scipy": ["scipy"],
+    "zarr": ["xarray", "zarr"],
+    "netcdf": ["xarray", "netCDF4"],
+}
+
 test_requirements = ['pytest>=3', ]
 
 setup(
@@ -43,6 +51,7 @@ setup(
         ],
     },
     install_requires=requirements,
+    extras_require=extra_requirements,
     license="MIT license",
     long_description=readme + '\n\n' + history,
     include_package_data=True,
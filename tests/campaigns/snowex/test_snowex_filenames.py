@@ -0,0 +1,105 @@
+import pandas as pd
+import pytest
+
+from insitupy.campaigns.snowex import SnowExFileIndex, SnowExFilename
+
+DENSITY = "SNEX20_TS_SP_20200427_0845_COERAP_data_density_v01.csv"
+
+
+class TestSnowExFilename:
+    def test_parse_pit(self):
+        result = SnowExFilename.parse(f"/archive/{DENSITY}")
+        assert result == SnowExFilename(
+            path=f"/archive/{DENSITY}",
+            campaign="SNEX20",
+            product="TS_SP",
+            date="20200427",
+            time="0845",
+            site="COERAP",
+            variable="density",
+            version=1,
+        )
+        assert result.date_time == pd.to_datetime("2020-04-27 08:45")
+
+    @pytest.mark.parametrize("name, variable", [
+        ("SNEX20_TS_SP_20200427_0845_COERAP_data_LWC_v01.csv", "lwc"),
+        ("SNEX20_TS_SP_20200427_0845_COERAP_siteDetails_v01.csv",
+         "sitedetails"),
+        ("SNEX20_GM_SP_20200128_1324_1N6_data_stratigraphy_v02.csv",
+         "stratigraphy"),
+    ])
+    def test_parse_variable(self, name, variable):
+        assert SnowExFilename.parse(name).variable == variable
+
+    def test_parse_smp(self):
+        result = SnowExFilename.parse("SNEX20_SMP_S19M1174_2N13_20200206.CSV")
+        assert result.product == "SMP"
+        assert result.serial_number == "19"
+        assert result.site == "2N13"
+        assert result.variable == "force"
+        assert result.version is None
+        assert result.date_time == pd.to_datetime("2020-02-06")
+
+    @pytest.mark.parametrize("name", [
+        "Density_file_unmapped.csv",
+        "SNEX20_TS_SP_20200427_0845_COERAP_data_density.csv",
+    ])
+    def test_parse_unknown(self, name):
+        assert SnowExFilename.parse(name) is None
+
+
+@pytest.fixture
+def archive(tmp_path):
+    names = {
+        "2020/04/27": [
+            DENSITY,
+            DENSITY.replace("v01", "v02"),
+            "SNEX20_TS_SP_20200427_0845_COERAP_data_LWC_v01.csv",
+            "notes.txt",
+        ],
+        "2020/02/06": [
+            "SNEX20_TS_SP_20200206_1200_COGM1N_data_density_v01.csv",
+            "SNEX20_SMP_S19M1174_2N13_20200206.CSV",
+            "Density_file_unmapped.csv",
+        ],
+    }
+    for directory, files in names.items():
+        path = tmp_path.joinpath(directory)
+        path.mkdir(parents=True)
+        for name in files:
+            # Files should never be opened, so write garbage
+            path.joinpath(name).write_bytes(b"\xff\xfe")
+    return tmp_path
+
+
+class TestSnowExFileIndex:
+    def test_from_directories(self, archive, mocker):
+        opened = mocker.patch("builtins.open")
+        index = SnowExFileIndex.from_directories(archive)
+        assert len(index) == 5
+        assert opened.call_count == 0
+
+    def test_latest(self, archive):
+        index = SnowExFileIndex.from_directories(archive).latest()
+        density = index.select(variables=["density"], sites=["COERAP"])
+        assert len(index) == 4
+        assert [e.version for e in density] == [2]
+
+    @pytest.mark.parametrize("kwargs, expected", [
+        ({"variables": ["density"]}, 3),
+        ({"variables": ["DENSITY", "force"]}, 4),
+        ({"sites": ["COERAP"]}, 3),
+        ({"start": "2020-04-01"}, 3),
+        ({"end": "2020-02-06 12:00"}, 2),
+        ({"start": "2020-02-06", "end": "2020-02-06 11:59"}, 1),
+    ])
+    def test_select(self, archive, kwargs, expected):
+        index = SnowExFileIndex.from_directories(archive)
+        assert len(index.select(**kwargs)) == expected
+
+    def test_to_dataframe(self, archive):
+        df = SnowExFileIndex.from_directories(archive).to_dataframe()
+        assert len(df) == 5
+        assert set(df["product"]) == {"TS_SP", "SMP"}
+        assert df["path"].tolist() == \
+            SnowExFileIndex.from_directories(archive).paths
@@ -0,0 +1,119 @@
+import pytest
+
+from insitupy.campaigns import PitAssembler
+from insitupy.campaigns.snowex import SnowExMetaDataParser, \
+    SnowExPitAssembler, SnowExProfileDataCollection
+
+PIT_FILES = [
+    "SNEX20_TS_SP_20200427_0845_COERAP_data_density_v01.csv",
+    "SNEX20_TS_SP_20200427_0845_COERAP_data_LWC_v01.csv",
+    "SNEX20_TS_SP_20200427_0845_COERAP_data_temperature_v01.csv",
+]
+PIT_STEM = "SNEX20_TS_SP_20200427_0845_COERAP"
+
+
+@pytest.fixture
+def pit_files(data_path):
+    return [data_path.joinpath(f) for f in PIT_FILES]
+
+
+class TestSnowExPitAssembler:
+    def test_inheritance(self):
+        assert issubclass(SnowExPitAssembler, PitAssembler)
+        assert SnowExPitAssembler.COLLECTION_CLASS == \
+            SnowExProfileDataCollection
+
+    def test_invalid_group_by(self):
+        with pytest.raises(ValueError):
+            SnowExPitAssembler(group_by="date")
+
+    def test_invalid_executor(self):
+        with pytest.raises(ValueError):
+            SnowExPitAssembler(executor="cluster")
+
+    @pytest.mark.parametrize("filename, expected", [
+        (PIT_FILES[0], PIT_STEM),
+        ("SNEX20_TS_SP_20200427_0845_COERAP_siteDetails_v01.csv", PIT_STEM),
+        ("other_file.csv", "other_file"),
+    ])
+    def test_group_by_stem(self, filename, expected):
+        groups = SnowExPitAssembler().group([filename])
+        assert list(groups.keys()) == [expected]
+
+    def test_group_by_pit_id(self, pit_files):
+        groups = SnowExPitAssembler(group_by="pit_id").group(pit_files)
+        assert list(groups.keys()) == ["COERAP_20200427_0845"]
+        assert groups["COERAP_20200427_0845"] == sorted(pit_files)
+
+    def test_assemble(self, pit_files):
+        result = SnowExPitAssembler(allow_map_failure=True).assemble(
+            pit_files
+        )
+        collection = result[PIT_STEM]
+        expected = [
+            p.variable
+            for f in sorted(pit_files)
+            for p in SnowExProfileDataCollection.from_csv(
+                f, allow_map_failure=True
+            ).profiles
+        ]
+
+        assert isinstance(collection, SnowExProfileDataCollection)
+        assert [p.variable for p in collection.profiles] == expected
+        assert collection.metadata.site_name == "COERAP_20200427_0845"
+        assert all(
+            p.metadata is collection.metadata for p in collection.profiles
+        )
+
+    def test_assemble_on_processes(self, pit_files):
+        threaded = SnowExPitAssembler(allow_map_failure=True).assemble(
+            pit_files
+        )[PIT_STEM]
+        result = SnowExPitAssembler(
+            allow_map_failure=True, executor="process", n_workers=1
+        ).assemble(pit_files)[PIT_STEM]
+        # Variables come back as the canonical descriptions
+        assert [p.variable for p in result.profiles] == \
+            [p.variable for p in threaded.profiles]
+        assert result.metadata == threaded.metadata
+
+    def test_units_kept_per_file(self, pit_files):
+        collection = SnowExPitAssembler(allow_map_failure=True).assemble(
+            pit_files
+        )[PIT_STEM]
+        temperature = [
+            p for p in collection.profiles
+            if p.variable.code == "snow_temperature"
+        ][0]
+        density = [
+            p for p in collection.profiles if p.variable.code == "density"
+        ]
+        assert "snow_temperature" not in density[0].units_map
+        assert "density" not in temperature.units_map
+
+    def test_group_by_pit_id_reads_headers_once(self, pit_files, mocker):
+        find_header_info = mocker.spy(
+            SnowExMetaDataParser, "find_header_info"
+        )
+        SnowExPitAssembler(
+            group_by="pit_id", allow_map_failure=True
+        ).assemble(pit_files)
+        assert find_header_info.call_count == len(pit_files)
+
+    def test_metadata_parsed_once(self, pit_files, mocker):
+        parse_date_time = mocker.spy(SnowExMetaDataParser, "parse_date_time")
+        SnowExPitAssembler(allow_map_failure=True).assemble(pit_files)
+        assert parse_date_time.call_count == 1
+
+    def test_mismatched_pit_fails(self, pit_files, tmp_path):
+        source = pit_files[0]
+        moved = tmp_path.joinpath(
+            PIT_STEM + "_data_temperature_v01.csv"
+        )
+        moved.write_text(
+            source.read_text().replace("Easting,329131", "Easting,329000")
+        )
+        with pytest.raises(ValueError, match="easting"):
+            SnowExPitAssembler(allow_map_failure=True).assemble(
+                [source, moved]
+            )
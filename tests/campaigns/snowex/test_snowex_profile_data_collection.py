@@ -1,9 +1,14 @@
+import geopandas as gpd
 import numpy as np
+import pandas as pd
+import pyarrow as pa
 import pytest
 
 from insitupy.campaigns import ProfileDataCollection
-from insitupy.campaigns.snowex import SnowExProfileData, \
-    SnowExProfileDataCollection
+from insitupy.campaigns.lazy import CsvProfileLoader, ResidentProfiles
+from insitupy.campaigns.snowex import SnowExMetaDataParser, \
+    SnowExProfileData, SnowExProfileDataCollection
+from insitupy.profiles import binning
 
 TEST_FILES = {
     "SNEX20_TS_SP_20200427_0845_COERAP_data_temperature_v01.csv":
@@ -56,6 +61,32 @@ def data_collection(data_path):
     yield _create_obj
 
 
+@pytest.fixture
+def collections(data_path):
+    return [
+        SnowExProfileDataCollection.from_csv(
+            data_path.joinpath(f), allow_map_failure=True
+        ) for f in TEST_FILES
+    ]
+
+
+@pytest.fixture
+def other_pit(data_path, tmp_path):
+    """
+    The density file moved to another location
+    """
+    source = data_path.joinpath(
+        "SNEX20_TS_SP_20200427_0845_COERAP_data_density_v01.csv"
+    )
+    filename = tmp_path.joinpath(source.name)
+    filename.write_text(
+        source.read_text().replace(
+            "Latitude,38.92524", "Latitude,40.5"
+        ).replace("Longitude,-106.97112", "Longitude,-105.5")
+    )
+    return filename
+
+
 @pytest.mark.parametrize('test_file', TEST_FILES)
 class TestSnowExProfileDataCollectionFromCSV:
     def test_variables(
@@ -80,3 +111,544 @@ class TestSnowExProfileDataCollectionFromCSV:
             np.array(TEST_FILES[test_file]['means']),
             decimal=2
         )
+
+
+class TestSnowExScanMetadata:
+    def test_scan_metadata(self, data_path):
+        filenames = [data_path.joinpath(f) for f in TEST_FILES]
+        result = SnowExProfileDataCollection.scan_metadata(
+            filenames, allow_map_failure=True
+        )
+
+        assert result["filename"].tolist() == [str(f) for f in filenames]
+        assert (result["site_name"] == "COERAP_20200427_0845").all()
+        assert (result["latitude"] == 38.92524).all()
+        assert result["variables"].tolist() == [
+            ["snow_temperature"],
+            ["density", "permittivity", "liquid_water_content"],
+            ["density"],
+        ]
+
+    def test_scan_locations(self, data_path, other_pit):
+        result = SnowExProfileDataCollection.scan_metadata(
+            [data_path.joinpath(f) for f in TEST_FILES] + [other_pit],
+            allow_map_failure=True
+        )
+        assert result["latitude"].tolist() == [38.92524] * 3 + [40.5]
+        assert result["longitude"].tolist() == [-106.97112] * 3 + [-105.5]
+
+    def test_scan_does_not_read_data(self, data_path, mocker):
+        read_csv = mocker.spy(SnowExProfileData, "read_csv_dataframe")
+        SnowExProfileDataCollection.scan_metadata(
+            [data_path.joinpath(f) for f in TEST_FILES],
+            allow_map_failure=True
+        )
+        assert read_csv.call_count == 0
+
+
+class TestSnowExQuery:
+    @pytest.fixture
+    def filenames(self, data_path):
+        return [data_path.joinpath(f) for f in TEST_FILES]
+
+    def test_query_variables(self, filenames):
+        result = SnowExProfileDataCollection.query(
+            filenames, variables=["density"], allow_map_failure=True
+        )
+        # Temperature file is pruned and only density profiles are created
+        assert [
+            [p.variable.code for p in c.profiles] for c in result
+        ] == [["density"], ["density"] * 3]
+        assert result[0].metadata.site_name == "COERAP_20200427_0845"
+
+    def test_query_all(self, filenames):
+        result = SnowExProfileDataCollection.query(
+            filenames, allow_map_failure=True
+        )
+        assert sum(len(c.profiles) for c in result) == 9
+
+    def test_query_reads_headers_once(self, filenames, mocker):
+        find_header_info = mocker.spy(
+            SnowExMetaDataParser, "find_header_info"
+        )
+        preparse = mocker.spy(SnowExMetaDataParser, "_preparse_meta")
+        result = SnowExProfileDataCollection.query(
+            filenames, allow_map_failure=True
+        )
+        assert len(result) == len(filenames)
+        assert find_header_info.call_count == len(filenames)
+        assert preparse.call_count == len(filenames)
+
+    @pytest.mark.parametrize("kwargs, expected", [
+        ({"time": ("2020-04-27 14:00", "2020-04-27 15:00")}, 3),
+        ({"time": ("2020-04-27 15:00", None)}, 0),
+        ({"time": (None, "2020-04-27 14:00")}, 0),
+        ({"bbox": (-107.0, 38.9, -106.9, 39.0)}, 3),
+        ({"bbox": (-106.0, 38.9, -105.0, 39.0)}, 0),
+    ])
+    def test_query_header_predicates(self, filenames, kwargs, expected):
+        result = SnowExProfileDataCollection.query(
+            filenames, allow_map_failure=True, **kwargs
+        )
+        assert len(result) == expected
+
+    def test_header_mismatch_does_not_read_data(self, filenames, mocker):
+        read_csv = mocker.spy(SnowExProfileData, "read_csv_dataframe")
+        SnowExProfileDataCollection.query(
+            filenames, bbox=(-106.0, 38.9, -105.0, 39.0),
+            allow_map_failure=True
+        )
+        assert read_csv.call_count == 0
+
+    def test_filename_pruning(self, filenames, mocker):
+        parse = mocker.spy(SnowExMetaDataParser, "parse")
+        result = SnowExProfileDataCollection.query(
+            filenames, time=("2020-05-01", None), allow_map_failure=True
+        )
+        assert result == []
+        assert parse.call_count == 0
+
+    @pytest.mark.parametrize("start, end, expected", [
+        # 23:59 MST on the file date is 06:59 UTC on the next day
+        ("2020-02-07 06:00", None, True),
+        (None, "2020-02-05 12:00", True),
+        ("2020-02-08 12:00", None, False),
+        (None, "2020-02-05 09:00", False),
+    ])
+    def test_filename_pruning_date_only(self, start, end, expected):
+        filename = "SNEX20_SMP_S19M1174_2N13_20200206.CSV"
+        result = SnowExProfileDataCollection._filename_candidates(
+            [filename],
+            start=pd.Timestamp(start, tz="UTC") if start else None,
+            end=pd.Timestamp(end, tz="UTC") if end else None,
+        )
+        assert result == ([filename] if expected else [])
+
+    def test_filename_pruning_variables(self, filenames):
+        result = SnowExProfileDataCollection._filename_candidates(
+            filenames, variables={"snow_temperature"}
+        )
+        assert result == filenames[:1]
+
+
+class TestSnowExColumnProjection:
+    def test_from_csv_variables(self, data_path, mocker):
+        read_csv = mocker.spy(pd, "read_csv")
+        obj = SnowExProfileDataCollection.from_csv(
+            data_path.joinpath(
+                "SNEX20_TS_SP_20200427_0845_COERAP_data_LWC_v01.csv"
+            ),
+            allow_map_failure=True,
+            variables=["permittivity"]
+        )
+        assert [p.variable.code for p in obj.profiles] == \
+            ["permittivity"] * 2
+        assert read_csv.call_args.kwargs["usecols"] == [0, 1, 3, 4]
+        assert list(obj.profiles[0].df.columns) == [
+            "depth", "bottom_depth", "permittivity", "layer_thickness",
+            "datetime", "geometry"
+        ]
+
+    def test_from_csv_variables_match_full_read(self, data_path):
+        filename = data_path.joinpath(
+            "SNEX20_TS_SP_20200427_0845_COERAP_data_density_v01.csv"
+        )
+        projected = SnowExProfileDataCollection.from_csv(
+            filename, variables=["density"]
+        )
+        full = SnowExProfileDataCollection.from_csv(filename)
+        for p, f in zip(projected.profiles, full.profiles):
+            pd.testing.assert_frame_equal(p.df, f.df)
+
+    def test_from_csv_no_matching_variables(self, data_path):
+        obj = SnowExProfileDataCollection.from_csv(
+            data_path.joinpath(
+                "SNEX20_TS_SP_20200427_0845_COERAP_data_density_v01.csv"
+            ),
+            variables=["snow_temperature"]
+        )
+        assert obj.profiles == []
+
+
+class TestSnowExOpenLazy:
+    @pytest.fixture
+    def filenames(self, data_path):
+        return [data_path.joinpath(f) for f in TEST_FILES]
+
+    def test_open_does_not_read_data(self, filenames, mocker):
+        read_csv = mocker.spy(SnowExProfileData, "read_csv_dataframe")
+        result = SnowExProfileDataCollection.open_lazy(
+            filenames, allow_map_failure=True
+        )
+        profiles = [p for c in result for p in c.profiles]
+
+        assert read_csv.call_count == 0
+        assert len(profiles) == 9
+        assert not any(p.is_loaded for p in profiles)
+        assert result[0].metadata.site_name == "COERAP_20200427_0845"
+
+    def test_matches_eager(self, filenames):
+        lazy = SnowExProfileDataCollection.open_lazy(
+            filenames, allow_map_failure=True
+        )
+        for filename, collection in zip(filenames, lazy):
+            eager = SnowExProfileDataCollection.from_csv(
+                filename, allow_map_failure=True
+            )
+            assert [p.variable for p in collection.profiles] == \
+                [p.variable for p in eager.profiles]
+            for p, e in zip(collection.profiles, eager.profiles):
+                pd.testing.assert_frame_equal(p.df, e.df)
+
+    def test_per_file_state(self, filenames, other_pit):
+        lazy = SnowExProfileDataCollection.open_lazy(
+            filenames + [other_pit], allow_map_failure=True
+        )
+        assert [c.metadata.latitude for c in lazy] == \
+            [38.92524] * 3 + [40.5]
+        np.testing.assert_allclose(
+            lazy[-1].profiles[0].df.geometry.y, 40.5
+        )
+        for filename, collection in zip(filenames, lazy):
+            eager = SnowExProfileDataCollection.from_csv(
+                filename, allow_map_failure=True
+            )
+            for p, e in zip(collection.profiles, eager.profiles):
+                assert p.units_map == e.units_map
+
+    def test_reads_only_profile_columns(self, filenames, mocker):
+        read_csv = mocker.spy(pd, "read_csv")
+        collection = SnowExProfileDataCollection.open_lazy(
+            filenames[1:2], allow_map_failure=True
+        )[0]
+        collection.profiles[1].df
+        assert read_csv.call_args.kwargs["usecols"] == [0, 1, 3]
+
+    def test_loaded_access_skips_loader(self, filenames, mocker):
+        profile = SnowExProfileDataCollection.open_lazy(
+            filenames[:1], allow_map_failure=True
+        )[0].profiles[0]
+        profile.df
+        loader = mocker.spy(CsvProfileLoader, "__call__")
+        touch = mocker.spy(ResidentProfiles, "touch")
+        first = profile.last_access
+        profile.df
+
+        assert loader.call_count == 0
+        assert touch.call_count == 0
+        assert profile.last_access > first
+
+    def test_max_resident(self, filenames, mocker):
+        read_csv = mocker.spy(SnowExProfileData, "read_csv_dataframe")
+        result = SnowExProfileDataCollection.open_lazy(
+            filenames, max_resident=2, allow_map_failure=True
+        )
+        profiles = [p for c in result for p in c.profiles]
+        means = [p.mean for p in profiles]
+
+        assert [p.is_loaded for p in profiles].count(True) == 2
+        assert read_csv.call_count == 9
+        # Evicted profiles load again
+        assert profiles[0].mean == means[0]
+        assert read_csv.call_count == 10
+
+
+class TestSnowExParquet:
+    @pytest.fixture
+    def dataset(self, collections, tmp_path):
+        path = tmp_path.joinpath("profiles")
+        SnowExProfileDataCollection.write_parquet(collections, path)
+        return path
+
+    def test_partitions(self, dataset):
+        partitions = sorted(
+            p.parent.relative_to(dataset).as_posix()
+            for p in dataset.rglob("part-0.parquet")
+        )
+        assert partitions == [
+            "campaign_name=East%20River/variable=density",
+            "campaign_name=East%20River/variable=liquid_water_content",
+            "campaign_name=East%20River/variable=permittivity",
+            "campaign_name=East%20River/variable=snow_temperature",
+        ]
+
+    def test_geoparquet(self, dataset):
+        gdf = gpd.read_parquet(next(dataset.rglob("part-0.parquet")))
+        assert gdf.crs == "EPSG:4326"
+        assert {"profile_id", "depth", "value", "datetime"} <= \
+            set(gdf.columns)
+
+    def test_round_trip(self, collections, dataset):
+        result = SnowExProfileDataCollection.from_parquet(
+            dataset, allow_map_failure=True
+        )
+        assert len(result) == len(collections)
+        for expected, collection in zip(collections, result):
+            assert collection.metadata == expected.metadata
+            assert len(collection.profiles) == len(expected.profiles)
+            for e, p in zip(expected.profiles, collection.profiles):
+                assert p.variable is e.variable
+                # Depth and other column units survive too
+                assert p.units_map == e.units_map
+                assert p.units_map["depth"] == "cm"
+                pd.testing.assert_frame_equal(p.df, e.df)
+                np.testing.assert_equal(p.mean, e.mean)
+
+    def test_round_trip_without_profiles(self, data_path, tmp_path):
+        collection = SnowExProfileDataCollection.from_csv(
+            data_path.joinpath(
+                "SNEX20_TS_SP_20200427_0845_COERAP_data_temperature_v01.csv"
+            ),
+            allow_map_failure=True, variables=["density"]
+        )
+        assert collection.profiles == []
+        collection.to_parquet(tmp_path)
+
+        result = SnowExProfileDataCollection.from_parquet(tmp_path)
+        assert len(result) == 1
+        assert result[0].profiles == []
+        assert result[0].metadata == collection.metadata
+
+    def test_prunes_partitions(self, dataset, mocker):
+        read_parquet = mocker.spy(gpd, "read_parquet")
+        result = SnowExProfileDataCollection.from_parquet(
+            dataset, variables=["snow_temperature"], allow_map_failure=True
+        )
+        assert read_parquet.call_count == 1
+        assert len(result) == 1
+        assert result[0].profiles[0].mean == 0.0
+
+    def test_no_campaign(self, dataset):
+        assert SnowExProfileDataCollection.from_parquet(
+            dataset, campaigns=["Grand Mesa"]
+        ) == []
+
+    def test_exists(self, collections, dataset):
+        with pytest.raises(FileExistsError):
+            collections[0].to_parquet(dataset)
+        collections[0].to_parquet(dataset, overwrite=True)
+        assert len(
+            SnowExProfileDataCollection.from_parquet(
+                dataset, allow_map_failure=True
+            )
+        ) == 1
+
+
+class TestSnowExArrow:
+    def test_round_trip(self, collections):
+        for collection in collections:
+            result = SnowExProfileDataCollection.from_arrow(
+                collection.to_arrow(), allow_map_failure=True
+            )
+            assert result.metadata == collection.metadata
+            for e, p in zip(collection.profiles, result.profiles):
+                assert p.variable is e.variable
+                assert p.metadata is result.metadata
+                assert p.units_map.get(p.variable.code) == \
+                    e.units_map.get(e.variable.code)
+                pd.testing.assert_frame_equal(p.df, e.df)
+
+    def test_profile_round_trip(self, collections):
+        profile = collections[2].profiles[1]
+        result = SnowExProfileData.from_arrow(profile.to_arrow())
+        assert result.variable is profile.variable
+        assert result.metadata == profile.metadata
+        pd.testing.assert_frame_equal(result.df, profile.df)
+
+    def test_zero_copy(self, collections):
+        profile = collections[2].profiles[0]
+        table = profile.to_arrow()
+        for column, name in [("depth", "depth"), ("density", "value")]:
+            buffer = table.column(name).chunk(0).buffers()[1]
+            assert buffer.address == \
+                profile.df[column].to_numpy().ctypes.data
+
+    def test_columns(self, collections):
+        table = collections[1].to_arrow()
+        assert table.num_rows == 5 * 9
+        assert table.column("variable").type == \
+            pa.dictionary(pa.int32(), pa.string())
+        assert table.column("site_name").chunk(0).dictionary.to_pylist() \
+            == ["COERAP_20200427_0845"]
+        assert table.column("value").num_chunks == 5
+        assert table.schema.field("geometry").metadata[
+            b"ARROW:extension:name"] == b"geoarrow.wkb"
+        # The temperature file has no bottom depth
+        assert "bottom_depth" not in collections[0].to_arrow().schema.names
+
+    def test_geoarrow(self, collections):
+        table = collections[0].to_arrow(geometry_encoding="geoarrow")
+        geometry = table.column("geometry").chunk(0)
+        assert geometry.field("x")[0].as_py() == \
+            collections[0].metadata.longitude
+        assert geometry.field("y")[0].as_py() == \
+            collections[0].metadata.latitude
+
+    def test_invalid_geometry(self, collections):
+        with pytest.raises(ValueError):
+            collections[0].to_arrow(geometry_encoding="wkt")
+
+    @pytest.mark.parametrize("zero_copy", [False, True])
+    def test_mixed_types(self, mixed_pit, zero_copy):
+        collection = SnowExProfileDataCollection.from_csv(mixed_pit)
+        table = collection.to_arrow()
+        assert table.column("value").type == pa.float64()
+        assert table.column("value_comments").type == pa.string()
+
+        result = SnowExProfileDataCollection.from_arrow(
+            table, zero_copy=zero_copy
+        )
+        assert [p.variable.code for p in result.profiles] == \
+            ["density", "comments"]
+        for e, p in zip(collection.profiles, result.profiles):
+            pd.testing.assert_frame_equal(
+                pd.DataFrame(p.df), pd.DataFrame(e.df)
+            )
+
+    def test_not_insitupy(self):
+        with pytest.raises(ValueError):
+            SnowExProfileDataCollection.from_arrow(pa.table({"a": [1]}))
+
+
+class TestSnowExProjection:
+    def test_projected_xy(self, collections):
+        df = SnowExProfileDataCollection.projected_xy(collections)
+        assert len(df) == len(collections)
+        # Same pit, UTM zone from the file header
+        assert df["crs"].unique().tolist() == ["EPSG:26913"]
+        assert df["x"].nunique() == 1
+
+    def test_to_crs(self, collections):
+        collection = collections[1]
+        frames = collection.to_crs(26913)
+        assert len(frames) == len(collection.profiles)
+        xy = SnowExProfileDataCollection.projected_xy([collection])
+        for df, profile in zip(frames, collection.profiles):
+            assert df.crs == "EPSG:26913"
+            np.testing.assert_allclose(df.geometry.x, xy["x"].iloc[0])
+            # The profile data is unchanged
+            assert profile.df.crs == "EPSG:4326"
+            pd.testing.assert_frame_equal(
+                pd.DataFrame(df.drop(columns="geometry")),
+                pd.DataFrame(profile.df.drop(columns="geometry"))
+            )
+
+    def test_to_crs_without_location(self, collections):
+        collection = collections[0]
+        collection.metadata.latitude = None
+        with pytest.raises(ValueError):
+            collection.to_crs()
+
+
+class TestSnowExDepthWindows:
+    @pytest.fixture
+    def density(self, collections):
+        return collections[2].profiles[0]
+
+    @pytest.mark.parametrize("top, bottom, how, expected", [
+        # Top 30 cm
+        (0, -30, "mean", (401 + 449 + 472) / 3),
+        (0, -25, "mean", (401 * 10 + 449 * 10 + 472 * 5) / 25),
+        (-25, 0, "thickness", 25.0),
+        (0, -25, "sum", 401 * 10 + 449 * 10 + 472 * 5),
+        (0, -25, "max", 472.0),
+        (-200, -300, "mean", np.nan),
+    ])
+    def test_profile(self, density, top, bottom, how, expected):
+        np.testing.assert_allclose(
+            density.aggregate(
+                top, bottom, how=how, depth_datum="surface_datum"
+            ),
+            expected
+        )
+
+    def test_snow_height(self, density):
+        # The basal 10 cm only overlap the lowest layer, from 5 cm up
+        assert density.aggregate(0, 10, how="thickness") == 5.0
+        assert density.aggregate(0, 10, how="mean") == 362.0
+
+    def test_points(self, collections):
+        temperature = collections[0].profiles[0]
+        assert temperature.aggregate(0, 30, how="count") == 4
+
+    def test_collections(self, collections):
+        result = SnowExProfileDataCollection.aggregate(
+            collections, "density", [0, 0, -5], [-10, -10, -15],
+            how="mean", depth_datum="surface_datum"
+        )
+        # The temperature file has no density profile
+        assert np.isnan(result[0])
+        np.testing.assert_allclose(result[1:], [
+            collections[1].profiles[0].aggregate(
+                0, -10, depth_datum="surface_datum"
+            ),
+            (401 * 5 + 449 * 5) / 10
+        ])
+
+
+class TestSnowExBinning:
+    def test_bin_onto(self, collections):
+        temperature = collections[0].profiles[0]
+        density = collections[2].profiles[0]
+        df = temperature.bin_onto(density, statistics=["mean", "count"])
+        assert df.columns.tolist() == ["top", "bottom", "mean", "count"]
+        assert len(df) == len(density.df)
+        # Surface datum, a reading at the bottom of every 10 cm layer
+        assert df["top"].iloc[0] == 0.0
+        assert df["bottom"].iloc[0] == -10.0
+        assert (df["count"] == 1).all()
+        assert (df["mean"] == 0.0).all()
+
+    def test_bin_onto_pairs(self, collections):
+        temperature = collections[0].profiles[0]
+        density = collections[2].profiles
+        df = binning.bin_onto_layers(
+            [(temperature, density[0]), (density[1], density[0])],
+            statistics=["median"]
+        )
+        assert df["pair"].tolist() == [0] * 9 + [1] * 9
+        # The layers of the second pair have their own value
+        np.testing.assert_allclose(
+            df["median"][9:], density[1].df["density"]
+        )
+
+    def test_bin_intervals(self, collections):
+        density = collections[2].profiles[0]
+        df = density.bin_intervals(
+            [0, -30], [-30, -100], statistics=["mean", "max"]
+        )
+        np.testing.assert_allclose(
+            df["mean"], [(401 + 449 + 472) / 3, np.mean(
+                [428, 367, 384, 356, 362, 362]
+            )]
+        )
+        assert df["max"].tolist() == [472, 428]
+
+    def test_no_layers(self, collections):
+        temperature = collections[0].profiles[0]
+        with pytest.raises(ValueError):
+            temperature.bin_onto(temperature)
+
+
+class TestSnowExGridding:
+    def test_grid_variable(self, collections):
+        grid, _, _ = SnowExProfileDataCollection.grid(
+            collections, "density", crs=26913, resolution=10
+        )
+        # Mean of the first density profile of every file at the pit
+        np.testing.assert_allclose(
+            grid, [[(395.03703703703707 + 397.8888888) / 2]]
+        )
+
+
+class TestSnowExTimeSeries:
+    def test_time_series(self, collections):
+        df = SnowExProfileDataCollection.time_series(collections)
+        assert len(df) == 1
+        row = df.iloc[0]
+        # The density of the first file with a density profile
+        np.testing.assert_allclose(row["density"], 395.03703703703707)
+        assert row["total_depth"] > 0
+        np.testing.assert_allclose(
+            row["swe"], row["density"] * 95.0 / 100
+        )
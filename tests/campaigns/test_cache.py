@@ -0,0 +1,162 @@
+import shutil
+
+import pandas as pd
+import pytest
+
+from insitupy.campaigns import ParseCache
+from insitupy.campaigns.snowex import SnowExProfileDataCollection
+
+DENSITY_FILE = "SNEX20_TS_SP_20200427_0845_COERAP_data_density_v01.csv"
+LWC_FILE = "SNEX20_TS_SP_20200427_0845_COERAP_data_LWC_v01.csv"
+
+
+class TestParseCache:
+    @pytest.fixture
+    def cache(self, tmp_path):
+        return ParseCache(tmp_path.joinpath("cache"))
+
+    @pytest.fixture
+    def density_file(self, data_path, tmp_path):
+        filename = tmp_path.joinpath(DENSITY_FILE)
+        shutil.copy(data_path.joinpath(DENSITY_FILE), filename)
+        return filename
+
+    def test_hit(self, cache, density_file, mocker):
+        read_csv = mocker.spy(SnowExProfileDataCollection, "_read_csv")
+        expected = SnowExProfileDataCollection.from_csv(
+            density_file, cache=cache
+        )
+        result = SnowExProfileDataCollection.from_csv(
+            density_file, cache=cache
+        )
+
+        assert read_csv.call_count == 1
+        assert cache.stats["hits"] == 1
+        assert cache.stats["misses"] == 1
+        assert len(cache) == 1
+        assert result.metadata == expected.metadata
+        for e, p in zip(expected.profiles, result.profiles):
+            assert p.variable is e.variable
+            pd.testing.assert_frame_equal(p.df, e.df)
+
+    def test_hit_keeps_units(self, cache, density_file):
+        expected = SnowExProfileDataCollection.from_csv(
+            density_file, cache=cache
+        )
+        result = SnowExProfileDataCollection.from_csv(
+            density_file, cache=cache
+        )
+        assert cache.stats["hits"] == 1
+        assert result.profiles[0].units_map == \
+            expected.profiles[0].units_map
+
+    def test_hit_without_profiles(self, cache, density_file):
+        for _ in range(2):
+            result = SnowExProfileDataCollection.from_csv(
+                density_file, cache=cache, variables=["snow_temperature"]
+            )
+        assert cache.stats["hits"] == 1
+        assert result.profiles == []
+        assert result.metadata.site_name == "COERAP_20200427_0845"
+
+    def test_write_failure(self, cache, density_file, mocker, caplog):
+        mocker.patch.object(
+            SnowExProfileDataCollection, "to_parquet",
+            side_effect=ValueError("unsupported")
+        )
+        result = SnowExProfileDataCollection.from_csv(
+            density_file, cache=cache
+        )
+        assert len(result.profiles) == 3
+        assert len(cache) == 0
+        assert list(cache.directory.iterdir()) == []
+        assert "Could not store cache entry" in caplog.text
+
+    def test_put_does_not_scan_entries(self, cache, data_path, mocker):
+        for name in [DENSITY_FILE, LWC_FILE]:
+            SnowExProfileDataCollection.from_csv(
+                data_path.joinpath(name), cache=cache,
+                allow_map_failure=True
+            )
+        size = mocker.spy(ParseCache, "_size")
+        SnowExProfileDataCollection.from_csv(
+            data_path.joinpath(DENSITY_FILE), cache=cache, timezone="UTC"
+        )
+        # Only the new entry is measured
+        assert size.call_count == 1
+        assert len(cache) == 3
+
+    def test_index_read_from_directory(self, cache, density_file):
+        SnowExProfileDataCollection.from_csv(density_file, cache=cache)
+        reopened = ParseCache(cache.directory)
+        assert len(reopened) == 1
+        assert reopened.size == cache.size
+
+    def test_file_change(self, cache, density_file):
+        SnowExProfileDataCollection.from_csv(density_file, cache=cache)
+        with open(density_file, "a") as f:
+            f.write("10.0,0.0,200.0,200.0,200.0\n")
+        result = SnowExProfileDataCollection.from_csv(
+            density_file, cache=cache
+        )
+
+        assert cache.stats["hits"] == 0
+        assert len(cache) == 2
+        assert len(result.profiles[0].df) == 10
+
+    def test_config_change(self, cache, density_file):
+        SnowExProfileDataCollection.from_csv(density_file, cache=cache)
+        SnowExProfileDataCollection.from_csv(
+            density_file, cache=cache, timezone="UTC"
+        )
+        SnowExProfileDataCollection.from_csv(
+            density_file, cache=cache, variables=["density"]
+        )
+        assert cache.stats["hits"] == 0
+        assert len(cache) == 3
+
+    def test_eviction(self, tmp_path, data_path, density_file):
+        cache = ParseCache(tmp_path.joinpath("cache"), max_bytes=1)
+        SnowExProfileDataCollection.from_csv(density_file, cache=cache)
+        SnowExProfileDataCollection.from_csv(
+            data_path.joinpath(LWC_FILE), cache=cache,
+            allow_map_failure=True
+        )
+        assert len(cache) == 0
+
+    def test_lru(self, tmp_path, density_file):
+        cache = ParseCache(tmp_path.joinpath("cache"))
+        files = [density_file]
+        for i in range(2):
+            filename = tmp_path.joinpath(f"{i}_{DENSITY_FILE}")
+            shutil.copy(density_file, filename)
+            with open(filename, "a") as f:
+                f.write(f"{i}.0,0.0,200.0,200.0,200.0\n")
+            files.append(filename)
+
+        for filename in files[:2]:
+            SnowExProfileDataCollection.from_csv(filename, cache=cache)
+        # Room for two entries
+        cache._max_bytes = int(cache.size * 1.5)
+        SnowExProfileDataCollection.from_csv(files[0], cache=cache)
+        SnowExProfileDataCollection.from_csv(files[2], cache=cache)
+
+        assert len(cache) == 2
+        SnowExProfileDataCollection.from_csv(files[0], cache=cache)
+        SnowExProfileDataCollection.from_csv(files[1], cache=cache)
+        # The second file was least recently used
+        assert cache.stats["hits"] == 2
+
+    def test_class_default(self, cache, density_file, monkeypatch):
+        monkeypatch.setattr(
+            SnowExProfileDataCollection, "PARSE_CACHE", cache
+        )
+        SnowExProfileDataCollection.from_csv(density_file)
+        SnowExProfileDataCollection.from_csv(density_file)
+        assert cache.stats["hits"] == 1
+
+    def test_clear(self, cache, density_file):
+        SnowExProfileDataCollection.from_csv(density_file, cache=cache)
+        cache.clear()
+        assert len(cache) == 0
+        assert cache.size == 0
@@ -0,0 +1,93 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from insitupy.campaigns import ProfileDataCollection
+from insitupy.campaigns.clustering import cluster_locations
+from insitupy.campaigns.spatial import METERS_PER_DEGREE
+from insitupy.profiles.metadata import ProfileMetaData
+
+# A degree of latitude per meter
+METER = 1 / METERS_PER_DEGREE
+
+
+@pytest.fixture
+def locations():
+    return np.array([
+        # Replicate pits 3 m apart, and a chain 8 m further
+        [39.0, -108.0], [39.0 + 3 * METER, -108.0],
+        [39.0 + 11 * METER, -108.0],
+        # Repeat visit of the first pit
+        [39.0, -108.0],
+        # 50 m away
+        [39.0 + 61 * METER, -108.0],
+        [np.nan, np.nan],
+        # Another site
+        [40.0, -105.0],
+    ])
+
+
+def _cluster(locations, tolerance=10.0):
+    return cluster_locations(locations[:, 0], locations[:, 1], tolerance)
+
+
+class TestClusterLocations:
+    def test_clusters(self, locations):
+        ids = _cluster(locations)
+        assert ids[0] == ids[1] == ids[2] == ids[3]
+        assert len({ids[0], ids[4], ids[6]}) == 3
+        assert ids[5] is None
+
+    def test_tolerance(self, locations):
+        ids = _cluster(locations, tolerance=5.0)
+        assert ids[0] == ids[1] == ids[3]
+        assert ids[2] != ids[0]
+
+    def test_stable_ids(self, locations):
+        ids = _cluster(locations)
+        order = np.array([6, 2, 5, 4, 0, 3, 1])
+        shuffled = _cluster(locations[order])
+        assert shuffled == [ids[i] for i in order]
+        # Unrelated sites do not change the ids
+        assert _cluster(locations[:4]) == ids[:4]
+
+    def test_cell_boundaries(self):
+        # Pairs 9 m apart across many cell boundaries
+        latitudes = 39.0 + np.arange(100) * 9 * METER
+        ids = cluster_locations(latitudes, np.full(100, -108.0), 10.0)
+        assert len(set(ids)) == 1
+        ids = cluster_locations(latitudes, np.full(100, -108.0), 8.0)
+        assert len(set(ids)) == 100
+
+    def test_matches_pairwise(self):
+        rng = np.random.default_rng(1)
+        latitudes = 39.0 + rng.uniform(0, 200 * METER, 300)
+        longitudes = -108.0 + rng.uniform(0, 200 * METER, 300)
+        ids = cluster_locations(latitudes, longitudes, 10.0)
+        # Neighbors within the tolerance share a cluster
+        x = longitudes * METERS_PER_DEGREE * np.cos(np.radians(39.0))
+        y = latitudes * METERS_PER_DEGREE
+        distances = np.hypot(x[:, None] - x, y[:, None] - y)
+        for i, j in zip(*np.nonzero(distances < 9.9)):
+            assert ids[i] == ids[j]
+
+    def test_empty(self):
+        assert cluster_locations([], []) == []
+
+
+class TestClusterSites:
+    def test_groups(self, locations):
+        collections = [
+            ProfileDataCollection([], ProfileMetaData(
+                site_name=f"site{i}", date_time=pd.Timestamp("2020-01-01"),
+                latitude=lat, longitude=lon
+            )) for i, (lat, lon) in enumerate(locations)
+        ]
+        assert collections[0].site_id is None
+        sites = ProfileDataCollection.cluster_sites(collections)
+        assert sorted(len(s) for s in sites.values()) == [1, 1, 4]
+        site = sites[collections[0].site_id]
+        assert [c.metadata.site_name for c in site] == [
+            "site0", "site1", "site2", "site3"
+        ]
+        assert collections[5].site_id is None
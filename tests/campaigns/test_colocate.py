@@ -0,0 +1,139 @@
+import geopandas as gpd
+import numpy as np
+import pandas as pd
+import pytest
+
+from insitupy.campaigns import ProfileDataCollection
+from insitupy.campaigns.colocate import (
+    cartesian, chord_to_distance, nearest_stations, pit_table,
+    station_locations, station_readings
+)
+from insitupy.campaigns.spatial import haversine
+from insitupy.profiles.metadata import ProfileMetaData
+
+
+def _collection(site_name, date_time, latitude, longitude):
+    return ProfileDataCollection([], ProfileMetaData(
+        site_name=site_name, date_time=date_time,
+        latitude=latitude, longitude=longitude
+    ))
+
+
+@pytest.fixture
+def collections():
+    return [
+        _collection(
+            "pit1", pd.Timestamp("2020-02-01 10:00", tz="UTC"), 39.0, -108.0
+        ),
+        _collection(
+            "pit2", pd.Timestamp("2020-02-03 20:00", tz="UTC"), 39.5, -107.5
+        ),
+        _collection("pit3", None, 39.02, -108.01),
+        _collection("pit4", pd.Timestamp("2020-02-02"), None, None),
+    ]
+
+
+@pytest.fixture
+def stations():
+    """
+    Daily readings of three stations in the metloom format
+    """
+    locations = {
+        "S1": (39.01, -108.0), "S2": (39.5, -107.6), "S3": (41.0, -105.0)
+    }
+    rows = []
+    for day in pd.date_range("2020-02-01", periods=4, freq="D", tz="UTC"):
+        for i, (site, (lat, lon)) in enumerate(locations.items()):
+            rows.append({
+                "datetime": day, "site": site,
+                "SNOWDEPTH": 100.0 * (i + 1) + day.day,
+                "SNOWDEPTH_units": "cm",
+                "geometry": gpd.points_from_xy([lon], [lat])[0],
+                "datasource": "NRCS",
+            })
+    return gpd.GeoDataFrame(rows, geometry="geometry").set_index(
+        ["datetime", "site"]
+    )
+
+
+class TestStations:
+    def test_readings(self, stations):
+        readings = station_readings(stations)
+        assert {"station", "datetime", "latitude", "longitude"}.issubset(
+            readings.columns
+        )
+        assert "geometry" not in readings.columns
+        assert str(readings["datetime"].dt.tz) == "UTC"
+
+    def test_missing_columns(self):
+        with pytest.raises(ValueError):
+            station_readings(pd.DataFrame({"site": ["S1"]}))
+
+    def test_locations(self, stations):
+        locations = station_locations(station_readings(stations))
+        assert locations["station"].tolist() == ["S1", "S2", "S3"]
+
+    def test_chord_distance(self):
+        xyz = cartesian([39.0, 39.5], [-108.0, -107.5])
+        chord = np.linalg.norm(xyz[0] - xyz[1])
+        np.testing.assert_allclose(
+            chord_to_distance(chord),
+            haversine(39.0, -108.0, np.array([39.5]), np.array([-107.5]))[0]
+        )
+
+
+class TestNearestStations:
+    def test_k(self, collections, stations):
+        pairs = nearest_stations(
+            pit_table(collections),
+            station_locations(station_readings(stations)), k=2
+        )
+        # The pit without a location is not paired
+        assert pairs["pit"].tolist() == [0, 0, 1, 1, 2, 2]
+        assert pairs["station"].tolist() == \
+            ["S1", "S2", "S2", "S1", "S1", "S2"]
+        assert pairs["rank"].tolist() == [1, 2] * 3
+        np.testing.assert_allclose(
+            pairs["distance"].iloc[0], 1111.95, rtol=1e-4
+        )
+
+    def test_max_distance(self, collections, stations):
+        pairs = nearest_stations(
+            pit_table(collections),
+            station_locations(station_readings(stations)), k=3,
+            max_distance=20000
+        )
+        assert pairs["station"].tolist() == ["S1", "S2", "S1"]
+        assert (pairs["distance"] <= 20000).all()
+
+
+class TestColocate:
+    def test_nearest_reading(self, collections, stations):
+        df = ProfileDataCollection.colocate_stations(collections, stations)
+        assert df["site_name"].tolist() == ["pit1", "pit2", "pit3"]
+        assert df["station"].tolist() == ["S1", "S2", "S1"]
+        assert df["pit"].tolist() == [0, 1, 2]
+        # Nearest daily readings to the pit times
+        assert df["datetime"].iloc[0] == pd.Timestamp("2020-02-01", tz="UTC")
+        assert df["datetime"].iloc[1] == pd.Timestamp("2020-02-04", tz="UTC")
+        assert df["SNOWDEPTH"].tolist()[:2] == [101.0, 204.0]
+        # Pits without a time have no reading
+        assert pd.isna(df["SNOWDEPTH"].iloc[2])
+
+    def test_tolerance_and_variables(self, collections, stations):
+        df = ProfileDataCollection.colocate_stations(
+            collections, stations, tolerance=pd.Timedelta("6h"),
+            variables=["SNOWDEPTH"]
+        )
+        assert "SNOWDEPTH_units" not in df.columns
+        # 10 hours from the nearest reading
+        assert pd.isna(df["SNOWDEPTH"].iloc[0])
+        assert df["SNOWDEPTH"].iloc[1] == 204.0
+
+    def test_columns(self, collections, stations):
+        readings = station_readings(stations).reset_index(drop=True)
+        df = ProfileDataCollection.colocate_stations(
+            collections, readings.rename(columns={"station": "site"}), k=2
+        )
+        assert len(df) == 6
+        assert df["rank"].tolist() == [1, 2] * 3
@@ -0,0 +1,93 @@
+import numpy as np
+import pytest
+import xarray as xr
+
+from insitupy.campaigns import cube
+from insitupy.campaigns.snowex import SnowExProfileDataCollection
+
+PIT_FILES = [
+    "SNEX20_TS_SP_20200427_0845_COERAP_data_density_v01.csv",
+    "SNEX20_TS_SP_20200427_0845_COERAP_data_temperature_v01.csv",
+]
+
+
+@pytest.fixture
+def collections(data_path):
+    return [
+        SnowExProfileDataCollection.from_csv(data_path.joinpath(f))
+        for f in PIT_FILES
+    ]
+
+
+class TestRegrid:
+    def test_layers(self, collections):
+        profile = collections[0].profiles[0]
+        df = profile.df
+        depths = np.array([-1.0, 93.0, 95.0, 200.0])
+        result = cube.regrid_profile(profile, depths)
+        # The top layer spans from 85 to 95
+        top = df.loc[df["depth"] == 95, "density"].iloc[0]
+        np.testing.assert_equal(result, [np.nan, top, top, np.nan])
+
+    def test_points(self, collections):
+        profile = collections[1].profiles[0]
+        result = cube.regrid_profile(profile, np.array([90.0, 300.0]))
+        np.testing.assert_equal(result, [0.0, np.nan])
+
+    def test_surface_datum(self, collections):
+        profile = collections[0].profiles[0]
+        result = cube.regrid_profile(
+            profile, np.array([-5.0, 5.0]), depth_datum="surface_datum"
+        )
+        df = profile.df
+        np.testing.assert_equal(
+            result, [df.loc[df["depth"] == 95, "density"].iloc[0], np.nan]
+        )
+
+
+class TestCube:
+    def test_to_cube(self, collections):
+        ds = SnowExProfileDataCollection.to_cube(collections, depth_step=5)
+        assert ds.sizes == {"profile": 4, "depth": 20}
+        assert list(ds.variable.values) == ["density"] * 3 + \
+            ["snow_temperature"]
+        assert list(ds.unit.values) == ["kg/m3"] * 3 + ["deg c"]
+        assert ds.depth.attrs["depth_datum"] == "snow_height"
+        assert set(ds.site.values) == {"COERAP_20200427_0845"}
+        assert ds.time.values[0] == np.datetime64("2020-04-27T14:45")
+        assert ds.value.sel(depth=90.0).values[-1] == 0.0
+
+    def test_invalid_datum(self, collections):
+        with pytest.raises(ValueError):
+            collections[0].to_xarray(depth_datum="ground")
+
+    def test_zarr_append(self, collections, tmp_path):
+        store = tmp_path.joinpath("cube.zarr")
+        SnowExProfileDataCollection.write_zarr(
+            collections[:1], store, chunks={"profile": 2, "depth": 16},
+            depth_step=5
+        )
+        SnowExProfileDataCollection.write_zarr(
+            collections[1:], store, append=True
+        )
+        expected = SnowExProfileDataCollection.to_cube(
+            collections, depths=np.arange(5.0, 100.0, 5.0)
+        )
+        with xr.open_zarr(store) as ds:
+            assert ds.value.encoding["chunks"] == (2, 16)
+            assert ds.sizes == {"profile": 4, "depth": 19}
+            np.testing.assert_equal(ds.value.values, expected.value.values)
+            assert list(ds.variable.values) == \
+                list(expected.variable.values)
+
+    def test_netcdf(self, collections, tmp_path):
+        path = tmp_path.joinpath("cube.nc")
+        SnowExProfileDataCollection.write_netcdf(
+            collections, path, chunks={"depth": 8}
+        )
+        with xr.open_dataset(path) as ds:
+            assert ds.value.encoding["chunksizes"] == (4, 8)
+            np.testing.assert_equal(
+                ds.value.values,
+                SnowExProfileDataCollection.to_cube(collections).value.values
+            )
@@ -0,0 +1,176 @@
+from types import SimpleNamespace
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from insitupy.campaigns import ProfileDataCollection
+from insitupy.campaigns.gridding import bin_points, grid_axes, idw
+from insitupy.profiles.metadata import ProfileMetaData
+
+
+@pytest.fixture
+def points():
+    x = np.array([0.5, 1.5, 1.6, 1.7, 0.2, np.nan, 2.5])
+    y = np.array([0.5, 0.5, 0.6, 0.4, 1.5, 0.5, 1.5])
+    values = np.array([1.0, 2.0, 4.0, 9.0, 5.0, 100.0, np.nan])
+    return x, y, values
+
+
+class TestGridAxes:
+    def test_extent(self, points):
+        x, y, _ = points
+        x_axis, y_axis = grid_axes(x, y, 1.0)
+        np.testing.assert_equal(x_axis, [0.5, 1.5, 2.5])
+        np.testing.assert_equal(y_axis, [0.5, 1.5])
+
+    def test_aligned_bounds(self):
+        x_axis, y_axis = grid_axes(
+            np.array([]), np.array([]), 10, bounds=(15, -5, 35, 5)
+        )
+        np.testing.assert_equal(x_axis, [15, 25, 35])
+        np.testing.assert_equal(y_axis, [-5, 5])
+
+    def test_resolution(self):
+        with pytest.raises(ValueError):
+            grid_axes(np.array([0.0]), np.array([0.0]), 0)
+
+
+class TestBinPoints:
+    @pytest.mark.parametrize("how, expected", [
+        ("mean", [[1.0, 5.0, np.nan], [5.0, np.nan, np.nan]]),
+        ("median", [[1.0, 4.0, np.nan], [5.0, np.nan, np.nan]]),
+        ("sum", [[1.0, 15.0, np.nan], [5.0, np.nan, np.nan]]),
+        ("count", [[1, 3, 0], [1, 0, 0]]),
+    ])
+    def test_statistics(self, points, how, expected):
+        grid, x_axis, y_axis = bin_points(*points, 1.0, how=how)
+        # The NaN value of the last point does not extend the grid
+        np.testing.assert_equal(x_axis, [0.5, 1.5])
+        np.testing.assert_equal(grid, np.array(expected)[:, :2])
+
+    def test_even_median(self):
+        grid, _, _ = bin_points(
+            np.array([0.1, 0.2, 0.3, 0.4]), np.zeros(4) + 0.1,
+            np.array([4.0, 1.0, 3.0, 2.0]), 1.0, how="median"
+        )
+        np.testing.assert_equal(grid, [[2.5]])
+
+    def test_bounds(self, points):
+        grid, x_axis, _ = bin_points(
+            *points, 1.0, how="count", bounds=(1, 0, 2, 1)
+        )
+        np.testing.assert_equal(x_axis, [1.5, 2.5])
+        np.testing.assert_equal(grid, [[3, 0], [0, 0]])
+
+    def test_matches_pandas(self):
+        rng = np.random.default_rng(0)
+        x, y = rng.uniform(0, 100, (2, 10000))
+        values = rng.normal(size=10000)
+        grid, x_axis, y_axis = bin_points(x, y, values, 10, how="median")
+        df = pd.DataFrame({
+            "row": np.floor(y / 10), "column": np.floor(x / 10), "v": values
+        })
+        expected = df.groupby(["row", "column"])["v"].median().unstack()
+        np.testing.assert_allclose(grid, expected.to_numpy())
+
+    def test_invalid(self, points):
+        with pytest.raises(ValueError):
+            bin_points(*points, 1.0, how="mode")
+
+
+class TestIdw:
+    def test_weights(self):
+        x = np.array([0.0, 2.0])
+        y = np.array([0.0, 0.0])
+        grid = idw(
+            x, y, np.array([1.0, 3.0]), np.array([0.0, 0.5, 1.0]),
+            np.array([0.0])
+        )
+        # Exact at the points, weighted by 1 / d ** 2 between them
+        np.testing.assert_allclose(grid, [[1.0, 1.2, 2.0]])
+
+    def test_max_distance(self):
+        grid = idw(
+            np.array([0.0]), np.array([0.0]), np.array([1.0]),
+            np.array([0.0, 5.0]), np.array([0.0]), max_distance=1
+        )
+        np.testing.assert_equal(grid, [[1.0, np.nan]])
+
+    def test_no_points(self):
+        grid = idw(
+            np.array([np.nan]), np.array([0.0]), np.array([1.0]),
+            np.array([0.0, 5.0]), np.array([0.0])
+        )
+        assert np.isnan(grid).all()
+
+
+class TestCollectionGrid:
+    @pytest.fixture
+    def collections(self):
+        # A pit every 100 m in UTM zone 13
+        return [
+            ProfileDataCollection([], ProfileMetaData(
+                site_name=f"pit{i}", date_time=pd.Timestamp("2020-01-01"),
+                latitude=40.0, longitude=-105.0 + i * 0.0011744,
+                utm_epsg="26913"
+            )) for i in range(4)
+        ]
+
+    def test_values(self, collections):
+        grid, x_axis, y_axis = ProfileDataCollection.grid(
+            collections, [1.0, 2.0, 3.0, 4.0], crs=26913, resolution=1000,
+        )
+        assert grid.shape == (1, len(x_axis))
+        assert np.nanmean(grid) <= 4.0
+
+    def test_count(self, collections):
+        grid, _, _ = ProfileDataCollection.grid(
+            collections, lambda c: 1.0, crs=26913, resolution=50, how="count"
+        )
+        assert grid.sum() == 4
+
+    def test_idw(self, collections):
+        grid, x_axis, y_axis = ProfileDataCollection.grid(
+            collections, [1.0, 2.0, 3.0, 4.0], crs=26913, resolution=25,
+            how="idw", k=2
+        )
+        assert grid.shape == (len(y_axis), len(x_axis))
+        assert np.nanmin(grid) >= 1.0 and np.nanmax(grid) <= 4.0
+
+    @pytest.mark.parametrize("values, expected", [
+        ("density", [100.0, 200.0, 300.0, 400.0]),
+        ("swe", [50.0, 100.0, 150.0, 200.0]),
+        ("total_depth", [50.0] * 4),
+    ])
+    def test_named_values(self, collections, values, expected):
+        # The first density profile has no data
+        empty = SimpleNamespace(
+            variable=SimpleNamespace(code="density"), df=None
+        )
+        collections = [
+            ProfileDataCollection([empty, SimpleNamespace(
+                variable=SimpleNamespace(code="density"),
+                df=pd.DataFrame({"density": [1.0]}), mean=100.0 * (i + 1),
+                total_depth=50.0
+            )], c.metadata) for i, c in enumerate(collections)
+        ]
+        grid, _, _ = ProfileDataCollection.grid(
+            collections, values, crs=26913, resolution=50
+        )
+        np.testing.assert_allclose(
+            np.sort(grid[~np.isnan(grid)]), expected
+        )
+
+    def test_length(self, collections):
+        with pytest.raises(ValueError):
+            ProfileDataCollection.grid(
+                collections, [1.0], crs=26913, resolution=1
+            )
+
+
+def test_bin_no_points():
+    grid, x_axis, y_axis = bin_points(
+        np.array([np.nan]), np.array([0.0]), np.array([1.0]), 1.0
+    )
+    assert grid.shape == (0, 0)
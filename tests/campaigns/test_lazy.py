@@ -0,0 +1,44 @@
+from unittest.mock import MagicMock
+
+from insitupy.campaigns.lazy import CsvProfileLoader, ResidentProfiles
+
+
+class TestResidentProfiles:
+    def test_evicts_least_recently_used(self):
+        resident = ResidentProfiles(max_resident=2)
+        profiles = [MagicMock(last_access=i) for i in range(3)]
+        resident.touch(profiles[0])
+        resident.touch(profiles[1])
+        # The first profile is accessed again after loading the second
+        profiles[0].last_access = 3
+        resident.touch(profiles[2])
+
+        assert len(resident) == 2
+        assert profiles[1] not in resident
+        profiles[1].unload.assert_called_once()
+        profiles[0].unload.assert_not_called()
+
+    def test_clear(self):
+        resident = ResidentProfiles()
+        profile = MagicMock(last_access=0)
+        resident.touch(profile)
+        resident.clear()
+        assert len(resident) == 0
+        profile.unload.assert_called_once()
+
+
+class TestCsvProfileLoader:
+    def test_loads_once(self):
+        resident = ResidentProfiles()
+        loader = CsvProfileLoader("file.csv", ["a", "b"], 3, [1], resident)
+        profile = MagicMock(is_loaded=False, last_access=0)
+
+        loader(profile)
+        profile.read_csv_dataframe.assert_called_once_with(
+            "file.csv", ["a", "b"], 3, usecols=[1]
+        )
+        assert profile in resident
+
+        profile.is_loaded = True
+        loader(profile)
+        profile.read_csv_dataframe.assert_called_once()
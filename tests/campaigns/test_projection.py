@@ -0,0 +1,80 @@
+import numpy as np
+import pandas as pd
+import pytest
+import utm
+
+from insitupy.campaigns import projection
+from insitupy.campaigns.projection import crs_key, project, utm_crs
+from insitupy.profiles.metadata import ProfileMetaData
+
+
+def _metadata(latitude, longitude, utm_epsg=None, site_name="site"):
+    return ProfileMetaData(
+        site_name=site_name, date_time=pd.Timestamp("2020-01-01"),
+        latitude=latitude, longitude=longitude, utm_epsg=utm_epsg
+    )
+
+
+@pytest.mark.parametrize("crs, expected", [
+    (26912, "EPSG:26912"),
+    ("26912", "EPSG:26912"),
+    ("epsg:32612", "EPSG:32612"),
+    ("+proj=longlat", "+proj=longlat"),
+])
+def test_crs_key(crs, expected):
+    assert crs_key(crs) == expected
+
+
+@pytest.mark.parametrize("metadata, expected", [
+    (_metadata(39.0, -108.0, utm_epsg="26913"), "EPSG:26913"),
+    (_metadata(39.0, -109.0, utm_epsg="None"), "EPSG:26912"),
+    (_metadata(39.0, -105.0), "EPSG:26913"),
+    (_metadata(None, None), None),
+])
+def test_utm_crs(metadata, expected):
+    assert utm_crs(metadata) == expected
+
+
+class TestProject:
+    @pytest.fixture(autouse=True)
+    def clear_cache(self):
+        projection.transformer.cache_clear()
+
+    def test_utm(self):
+        metadata = [
+            _metadata(39.0, -109.0, site_name="a"),
+            _metadata(39.0, -105.0, site_name="b"),
+        ]
+        df = project(metadata)
+        assert df.columns.tolist() == projection.XY_COLUMNS
+        assert df["crs"].tolist() == ["EPSG:26912", "EPSG:26913"]
+        for (_, row), m in zip(df.iterrows(), metadata):
+            x, y, _, _ = utm.from_latlon(m.latitude, m.longitude)
+            np.testing.assert_allclose([row["x"], row["y"]], [x, y], atol=2)
+
+    def test_transformers_are_cached(self, mocker):
+        spy = mocker.spy(projection.Transformer, "from_crs")
+        metadata = [_metadata(39.0, -108.0), _metadata(39.1, -108.1)] * 50
+        project(metadata, crs=26912)
+        project(metadata, crs="EPSG:26912")
+        assert spy.call_count == 1
+
+    def test_unique_locations(self, mocker):
+        # Same site, many pits
+        metadata = [_metadata(39.0, -108.0)] * 10 + [_metadata(39.5, -108.0)]
+        transform = projection.transformer("EPSG:4326", "EPSG:26912")
+        spy = mocker.spy(type(transform), "transform")
+        df = project(metadata, crs=26912)
+        assert spy.call_count == 1
+        assert len(spy.call_args.args[1]) == 2
+        assert df["x"].iloc[:10].nunique() == 1
+
+    def test_no_location(self):
+        df = project(
+            [_metadata(None, None), _metadata(39.0, -108.0)], crs=26912
+        )
+        assert np.isnan(df["x"].iloc[0])
+        assert not np.isnan(df["x"].iloc[1])
+
+    def test_empty(self):
+        assert project([]).empty
@@ -0,0 +1,90 @@
+import multiprocessing
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from insitupy.campaigns import SharedCollections
+from insitupy.campaigns.snowex import SnowExProfileDataCollection
+
+PIT_FILES = [
+    "SNEX20_TS_SP_20200427_0845_COERAP_data_density_v01.csv",
+    "SNEX20_TS_SP_20200427_0845_COERAP_data_temperature_v01.csv",
+]
+
+
+def _worker_means(path):
+    with SharedCollections.attach(path) as shared:
+        collections = shared.collections(SnowExProfileDataCollection)
+        return [p.mean for c in collections for p in c.profiles]
+
+
+class TestSharedCollections:
+    @pytest.fixture
+    def collections(self, data_path):
+        return [
+            SnowExProfileDataCollection.from_csv(data_path.joinpath(f))
+            for f in PIT_FILES
+        ]
+
+    @pytest.fixture
+    def shared(self, collections, tmp_path):
+        with SharedCollections.publish(
+            collections, tmp_path.joinpath("pits.arrows")
+        ) as shared:
+            yield shared
+
+    def test_views(self, collections, shared):
+        attached = SharedCollections.attach(shared.path)
+        result = attached.collections(SnowExProfileDataCollection)
+        for expected, collection in zip(collections, result):
+            assert collection.metadata == expected.metadata
+            for e, p in zip(expected.profiles, collection.profiles):
+                assert p.variable is e.variable
+                pd.testing.assert_frame_equal(p.df, e.df)
+                assert not p.df[p.variable.code].to_numpy().flags.writeable
+                assert not p.df["depth"].to_numpy().flags.owndata
+
+    def test_mixed_types(self, mixed_pit, tmp_path):
+        collection = SnowExProfileDataCollection.from_csv(mixed_pit)
+        with SharedCollections.publish(
+            [collection], tmp_path.joinpath("mixed.arrows")
+        ) as shared:
+            with SharedCollections.attach(shared.path) as attached:
+                result = attached.collections(SnowExProfileDataCollection)
+                for e, p in zip(collection.profiles, result[0].profiles):
+                    assert p.variable is e.variable
+                    pd.testing.assert_frame_equal(
+                        pd.DataFrame(p.df), pd.DataFrame(e.df)
+                    )
+
+    def test_values_are_mapped(self, shared):
+        table = shared.tables()[0]
+        collection = SnowExProfileDataCollection.from_arrow(
+            table, zero_copy=True
+        )
+        values = collection.profiles[0].df["density"].to_numpy()
+        buffer = table.column("value").chunk(0).buffers()[1]
+        assert values.ctypes.data == buffer.address
+
+    def test_default_path(self, collections):
+        shared = SharedCollections.publish(collections)
+        path = shared.path
+        assert str(path.parent) == SharedCollections.DEFAULT_DIRECTORY
+        assert path.exists()
+        shared.close()
+        shared.unlink()
+        assert not path.exists()
+
+    def test_attached_do_not_unlink(self, shared):
+        with SharedCollections.attach(shared.path):
+            pass
+        assert shared.path.exists()
+
+    def test_worker_processes(self, collections, shared):
+        context = multiprocessing.get_context("fork")
+        with context.Pool(2) as pool:
+            results = pool.map(_worker_means, [shared.path] * 2)
+        expected = [p.mean for c in collections for p in c.profiles]
+        for means in results:
+            np.testing.assert_allclose(means, expected)
@@ -0,0 +1,93 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from insitupy.campaigns import SpatialIndex
+from insitupy.campaigns.spatial import haversine
+from insitupy.profiles.metadata import ProfileMetaData
+
+
+def _metadata(latitude, longitude):
+    return ProfileMetaData(
+        site_name="site", date_time=pd.Timestamp("2020-01-01"),
+        latitude=latitude, longitude=longitude
+    )
+
+
+@pytest.fixture
+def index():
+    # Two pits at the first site, one without a location
+    locations = [
+        (39.0, -108.0), (39.0, -108.0), (39.01, -108.0), (39.1, -108.1),
+        (40.0, -107.0), (np.nan, np.nan),
+    ]
+    return SpatialIndex.from_metadata(
+        [_metadata(*location) for location in locations]
+    )
+
+
+class TestSpatialIndex:
+    def test_unique_locations(self, index):
+        assert len(index) == 6
+        assert index.n_locations == 4
+
+    def test_lazy_tree(self, index):
+        assert index._tree is None
+        index.bbox((-109, 38, -107, 40))
+        tree = index._tree
+        index.radius(39.0, -108.0, 100)
+        assert index._tree is tree
+
+    def test_bbox(self, index):
+        np.testing.assert_equal(
+            index.bbox((-108.05, 38.9, -107.95, 39.05)), [0, 1, 2]
+        )
+        np.testing.assert_equal(index.bbox((0, 0, 1, 1)), [])
+
+    def test_radius(self, index):
+        np.testing.assert_equal(index.radius(39.0, -108.0, 500), [0, 1])
+        np.testing.assert_equal(
+            index.radius(39.0, -108.0, 1200), [0, 1, 2]
+        )
+        np.testing.assert_equal(
+            index.radius(39.0, -108.0, 150000), [0, 1, 2, 3, 4]
+        )
+
+    def test_nearest(self, index):
+        np.testing.assert_equal(index.nearest(39.009, -108.0), [2])
+        np.testing.assert_equal(
+            index.nearest(39.009, -108.0, k=3), [2, 0, 1]
+        )
+        np.testing.assert_equal(
+            index.nearest(40.1, -107.0, k=10), [4, 3, 2, 0, 1]
+        )
+        np.testing.assert_equal(
+            index.nearest(40.1, -107.0, k=2, max_distance=20000), [4]
+        )
+
+    def test_antimeridian(self):
+        index = SpatialIndex([0.0, 0.0, 0.0], [179.9995, -179.9995, 170.0])
+        # The points are about 110 m apart across the antimeridian
+        np.testing.assert_equal(index.radius(0.0, 179.9995, 200), [0, 1])
+        np.testing.assert_equal(index.radius(0.0, -179.9995, 200), [0, 1])
+        np.testing.assert_equal(index.nearest(0.0, -179.9999, k=2), [1, 0])
+
+    def test_haversine(self):
+        # One degree of latitude
+        np.testing.assert_allclose(
+            haversine(0, 0, np.array([1.0]), np.array([0.0])),
+            [111195.08], rtol=1e-6
+        )
+
+    def test_from_collections(self, data_path):
+        from insitupy.campaigns.snowex import SnowExProfileDataCollection
+        collection = SnowExProfileDataCollection.from_csv(
+            data_path.joinpath(
+                "SNEX20_TS_SP_20200427_0845_COERAP_data_density_v01.csv"
+            )
+        )
+        index = SpatialIndex.from_collections([collection, collection])
+        assert index.n_locations == 1
+        np.testing.assert_equal(
+            index.nearest(*collection.profiles[0].latlon, k=2), [0, 1]
+        )
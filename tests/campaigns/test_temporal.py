@@ -0,0 +1,93 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from insitupy.campaigns import TemporalIndex
+from insitupy.profiles.metadata import ProfileMetaData
+
+
+def _metadata(site_name, date_time):
+    return ProfileMetaData(
+        site_name=site_name, date_time=date_time,
+        latitude=39.0, longitude=-108.0
+    )
+
+
+@pytest.fixture
+def metadata():
+    return [
+        _metadata("A", pd.Timestamp("2020-02-01 12:00", tz="UTC")),
+        _metadata("B", pd.Timestamp("2020-01-15 12:00", tz="UTC")),
+        # 2020-02-01 12:00 UTC
+        _metadata("A", pd.Timestamp("2020-02-01 05:00", tz="US/Mountain")),
+        _metadata("B", pd.Timestamp("2020-03-01 12:00")),
+        _metadata("A", None),
+        _metadata("A", pd.Timestamp("2020-01-01 12:00", tz="UTC")),
+    ]
+
+
+@pytest.fixture
+def index(metadata):
+    return TemporalIndex.from_metadata(metadata, items=metadata)
+
+
+class TestTemporalIndex:
+    def test_times(self, index):
+        assert len(index) == 6
+        times = index.times()
+        assert times.is_monotonic_increasing
+        assert len(times) == 5
+        assert str(times.tz) == "UTC"
+
+    @pytest.mark.parametrize("start, end, expected", [
+        (None, None, [5, 1, 0, 2, 3]),
+        ("2020-01-15 12:00", "2020-02-01 12:00", [1, 0, 2]),
+        ("2020-01-15 06:00-06:00", None, [1, 0, 2, 3]),
+        (None, "2020-01-01", []),
+        ("2020-02-02", "2020-01-01", []),
+    ])
+    def test_slice(self, index, start, end, expected):
+        np.testing.assert_equal(index.slice(start, end), expected)
+
+    def test_window_is_a_view(self, index, metadata):
+        window = index.window("2020-02-01", "2020-02-02")
+        assert len(window) == 2
+        assert all(a is b for a, b in zip(window, [metadata[0], metadata[2]]))
+
+    def test_positions_without_items(self, metadata):
+        index = TemporalIndex([m.date_time for m in metadata])
+        assert index.window("2020-03-01") == [3]
+
+    @pytest.mark.parametrize("site, start, end, expected", [
+        ("A", None, None, [5, 0, 2]),
+        ("A", "2020-01-15", None, [0, 2]),
+        ("B", "2020-01-01", "2020-02-01", [1]),
+        ("C", None, None, []),
+    ])
+    def test_site_slice(self, index, site, start, end, expected):
+        np.testing.assert_equal(index.site_slice(site, start, end), expected)
+
+    def test_site_window(self, index, metadata):
+        assert index.window(site="B") == [metadata[1], metadata[3]]
+
+    @pytest.mark.parametrize("time, site, expected", [
+        ("2019-01-01", None, 5),
+        ("2021-01-01", None, 3),
+        ("2020-01-20", None, 1),
+        # Tie between 2020-01-01 and 2020-02-01 goes to the earlier
+        ("2020-01-17", "A", 5),
+        ("2020-02-10", "B", 3),
+        ("2020-02-10", "C", None),
+    ])
+    def test_nearest(self, index, time, site, expected):
+        assert index.nearest(time, site=site) == expected
+
+    def test_no_sites(self, metadata):
+        index = TemporalIndex([m.date_time for m in metadata])
+        with pytest.raises(ValueError):
+            index.site_slice("A")
+
+    def test_empty(self):
+        index = TemporalIndex([])
+        assert len(index.slice()) == 0
+        assert index.nearest("2020-01-01") is None
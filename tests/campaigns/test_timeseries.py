@@ -0,0 +1,96 @@
+from types import SimpleNamespace
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from insitupy.campaigns import ProfileDataCollection
+from insitupy.campaigns.timeseries import bulk_swe, site_series, total_depth
+from insitupy.profiles.metadata import ProfileMetaData
+
+
+def _profile(code, mean, depth):
+    return SimpleNamespace(
+        variable=SimpleNamespace(code=code), df=pd.DataFrame({"a": [1]}),
+        mean=mean, total_depth=depth
+    )
+
+
+def _collection(site_name, date_time, profiles, latitude=39.0):
+    return ProfileDataCollection(profiles, ProfileMetaData(
+        site_name=site_name, date_time=pd.Timestamp(date_time, tz="UTC"),
+        latitude=latitude, longitude=-108.0
+    ))
+
+
+@pytest.fixture
+def collections():
+    return [
+        _collection("B", "2020-01-15", [_profile("density", 300.0, 100.0)]),
+        _collection("A", "2020-01-22", [_profile("density", 250.0, 80.0)]),
+        _collection("A", "2020-01-08", [_profile("density", 200.0, 90.0)]),
+        # Second file of the same visit
+        _collection("A", "2020-01-08", [
+            _profile("snow_temperature", -5.0, 85.0)
+        ]),
+        _collection("A", "2020-01-09", [_profile("density", 220.0, 95.0)]),
+    ]
+
+
+class TestDerivedValues:
+    def test_total_depth(self, collections):
+        assert total_depth(collections[0]) == 100.0
+        assert np.isnan(total_depth(_collection("C", "2020-01-01", [])))
+
+    def test_bulk_swe(self, collections):
+        assert bulk_swe(collections[0]) == 300.0
+        assert np.isnan(bulk_swe(collections[3]))
+
+
+class TestSiteSeries:
+    def test_sorted_per_site(self, collections):
+        df = site_series(collections)
+        assert df.index.names == ["site", "datetime"]
+        assert df.columns.tolist() == ["density", "swe", "total_depth"]
+        assert df.index.get_level_values("site").tolist() == [
+            "A", "A", "A", "B"
+        ]
+        assert df.loc["A"].index.is_monotonic_increasing
+        # The files of a visit are combined
+        visit = df.loc[("A", pd.Timestamp("2020-01-08", tz="UTC"))]
+        assert visit["density"] == 200.0
+        assert visit["total_depth"] == 90.0
+
+    def test_values(self, collections):
+        df = site_series(
+            collections,
+            values={"temperature": "snow_temperature", "one": lambda c: 1.0}
+        )
+        assert df["temperature"].dropna().tolist() == [-5.0]
+        assert (df["one"] == 1.0).all()
+
+    def test_resample(self, collections):
+        df = site_series(collections, values=["density"], resample="7D")
+        a = df.loc["A", "density"]
+        np.testing.assert_allclose(a.tolist(), [210.0, np.nan, 250.0])
+        assert df.loc["B", "density"].tolist() == [300.0]
+
+    def test_by_site_id(self, collections):
+        ProfileDataCollection.cluster_sites(collections)
+        df = ProfileDataCollection.time_series(
+            collections, values=["density"], by="site_id"
+        )
+        # All pits are at the same location
+        assert df.index.get_level_values("site").nunique() == 1
+        assert len(df) == 4
+
+
+class TestSiteTimeArray:
+    def test_array(self, collections):
+        ds = ProfileDataCollection.time_series_array(collections)
+        assert ds["density"].dims == ("site", "time")
+        assert ds["density"].shape == (2, 4)
+        assert ds["time"].dtype == np.dtype("datetime64[ns]")
+        np.testing.assert_allclose(
+            ds["density"].sel(site="B").values, [np.nan, np.nan, 300.0, np.nan]
+        )
@@ -0,0 +1,200 @@
+import os
+import sqlite3
+
+import pandas as pd
+import pytest
+
+from insitupy.campaigns.snowex import SnowExProfileDataCollection
+from insitupy.catalog import ProfileCatalog, file_hash, profile_summary
+
+PIT_FILES = [
+    "SNEX20_TS_SP_20200427_0845_COERAP_data_density_v01.csv",
+    "SNEX20_TS_SP_20200427_0845_COERAP_data_LWC_v01.csv",
+    "SNEX20_TS_SP_20200427_0845_COERAP_data_temperature_v01.csv",
+]
+
+
+@pytest.fixture
+def pit_files(data_path):
+    return [data_path.joinpath(f) for f in PIT_FILES]
+
+
+@pytest.fixture
+def catalog(tmp_path, pit_files):
+    with ProfileCatalog(
+        tmp_path / "catalog.db",
+        collection_class=SnowExProfileDataCollection
+    ) as catalog:
+        catalog.ingest(pit_files, allow_map_failure=True)
+        yield catalog
+
+
+class TestProfileSummary:
+    def test_density(self, data_path):
+        collection = SnowExProfileDataCollection.from_csv(
+            data_path.joinpath(PIT_FILES[0]), allow_map_failure=True
+        )
+        result = profile_summary(collection.profiles[0])
+        assert result["variable"] == "density"
+        assert result["n_layers"] == 9
+        assert result["depth_min"] == 5.0
+        assert result["depth_max"] == 95.0
+        assert result["total_depth"] == 95.0
+        assert result["mean"] == pytest.approx(397.8888888)
+
+    def test_without_variable(self, data_path):
+        profile = SnowExProfileDataCollection.from_csv(
+            data_path.joinpath(PIT_FILES[0]), allow_map_failure=True
+        ).profiles[0]
+        profile.variable = None
+        result = profile_summary(profile)
+        assert result["variable"] is None
+        assert result["mean"] is None
+        assert result["n_layers"] == 9
+
+
+class TestProfileCatalog:
+    def test_file_hash(self, pit_files):
+        assert file_hash(pit_files[0]) == file_hash(pit_files[0])
+        assert file_hash(pit_files[0]) != file_hash(pit_files[1])
+
+    def test_files(self, catalog, pit_files):
+        result = catalog.files()
+        assert result["path"].tolist() == sorted(
+            str(f.resolve()) for f in pit_files
+        )
+        assert result["size"].tolist() == [
+            f.stat().st_size for f in sorted(pit_files)
+        ]
+
+    def test_query_all(self, catalog):
+        result = catalog.query()
+        # 3 density + 5 LWC + 1 temperature profiles
+        assert len(result) == 9
+        assert (result["site_name"] == "COERAP_20200427_0845").all()
+        assert result["date_time"].iloc[0] == pd.to_datetime(
+            "2020-04-27T14:45:00+0000"
+        )
+
+    @pytest.mark.parametrize("kwargs, expected", [
+        ({"variable": "density"}, 4),
+        ({"variable": ["density", "snow_temperature"]}, 5),
+        ({"site_name": "COERAP_20200427_0845"}, 9),
+        ({"site_name": "other"}, 0),
+        ({"start": "2020-04-27", "end": "2020-04-28"}, 9),
+        ({"start": "2020-04-28"}, 0),
+        ({"bbox": (-107.0, 38.9, -106.9, 39.0)}, 9),
+        ({"bbox": (-106.0, 38.9, -105.0, 39.0)}, 0),
+        ({"variable": "density", "start": "2020-04-28"}, 0),
+    ])
+    def test_query_filters(self, catalog, kwargs, expected):
+        assert len(catalog.query(**kwargs)) == expected
+
+    def test_query_summary(self, catalog):
+        result = catalog.query(variable="snow_temperature")
+        assert result["n_layers"].tolist() == [11]
+        assert result["mean"].tolist() == [0.0]
+        assert catalog.query(variable="permittivity")["mean"].isna().all()
+
+    def test_persistent(self, catalog, tmp_path):
+        catalog.close()
+        with ProfileCatalog(tmp_path / "catalog.db") as reopened:
+            assert len(reopened.query()) == 9
+
+    def test_from_csv_adds_to_catalog(self, tmp_path, pit_files):
+        with ProfileCatalog(tmp_path / "hook.db") as catalog:
+            SnowExProfileDataCollection.from_csv(
+                pit_files[0], allow_map_failure=True, catalog=catalog
+            )
+            result = catalog.query()
+        assert set(result["variable"]) == {"density"}
+        assert result["path"].iloc[0] == str(pit_files[0].resolve())
+
+    def test_reingest_replaces(self, catalog, pit_files):
+        catalog.ingest(pit_files[:1], allow_map_failure=True)
+        assert len(catalog.files()) == 3
+        assert len(catalog.query()) == 9
+
+    def test_profiles_removed_with_file(self, catalog):
+        with catalog.connection:
+            catalog.connection.execute("DELETE FROM files")
+        assert len(catalog.query()) == 0
+        assert isinstance(catalog.connection, sqlite3.Connection)
+
+
+class TestIncrementalIngest:
+    @pytest.fixture
+    def archive(self, tmp_path, pit_files):
+        archive = tmp_path / "archive"
+        archive.mkdir()
+        for f in pit_files:
+            archive.joinpath(f.name).write_bytes(f.read_bytes())
+        return archive
+
+    @pytest.fixture
+    def catalog(self, tmp_path, archive):
+        with ProfileCatalog(
+            tmp_path / "catalog.db",
+            collection_class=SnowExProfileDataCollection
+        ) as catalog:
+            catalog.refresh(sorted(archive.iterdir()), allow_map_failure=True)
+            yield catalog
+
+    def refresh(self, catalog, archive):
+        return catalog.refresh(
+            sorted(archive.iterdir()), allow_map_failure=True
+        )
+
+    def test_unchanged_files_are_not_read(self, catalog, archive, mocker):
+        from_csv = mocker.spy(SnowExProfileDataCollection, "from_csv")
+        hashed = mocker.patch(
+            "insitupy.catalog.catalog.file_hash", side_effect=file_hash
+        )
+        report = self.refresh(catalog, archive)
+
+        assert len(report.unchanged) == 3
+        assert report.added == report.updated == report.deleted == []
+        assert from_csv.call_count == 0
+        assert hashed.call_count == 0
+
+    def test_touched_file_is_not_parsed(self, catalog, archive, mocker):
+        touched = archive.joinpath(PIT_FILES[0])
+        mtime = touched.stat().st_mtime + 10
+        os.utime(touched, (mtime, mtime))
+        from_csv = mocker.spy(SnowExProfileDataCollection, "from_csv")
+
+        report = self.refresh(catalog, archive)
+
+        assert from_csv.call_count == 0
+        assert len(report.unchanged) == 3
+        assert catalog.manifest()[str(touched.resolve())][1] == mtime
+
+    def test_changed_and_new_files(self, catalog, archive, data_path):
+        changed = archive.joinpath(PIT_FILES[2])
+        changed.write_text(
+            changed.read_text().replace("PitID,COERAP_20200427_0845",
+                                        "PitID,COERAP_CHANGED")
+        )
+        new_file = archive.joinpath(PIT_FILES[0].replace("v01", "v02"))
+        new_file.write_bytes(data_path.joinpath(PIT_FILES[0]).read_bytes())
+
+        report = self.refresh(catalog, archive)
+
+        assert report.updated == [str(changed.resolve())]
+        assert report.added == [str(new_file.resolve())]
+        assert len(report.unchanged) == 2
+        assert len(catalog.query(site_name="COERAP_CHANGED")) == 1
+        assert len(catalog.query()) == 12
+
+    def test_deleted_files_are_tombstoned(self, catalog, archive):
+        deleted = archive.joinpath(PIT_FILES[1])
+        deleted.unlink()
+
+        report = self.refresh(catalog, archive)
+
+        assert report.deleted == [str(deleted.resolve())]
+        assert len(catalog.files()) == 2
+        files = catalog.files(include_deleted=True)
+        assert files["deleted"].notna().sum() == 1
+        # The LWC profiles are gone
+        assert len(catalog.query()) == 4
@@ -13,6 +13,27 @@ def data_path():
     ).expanduser().absolute()
 
 
+@pytest.fixture
+def mixed_pit(data_path, tmp_path):
+    """
+    Pit file with a numeric and a comments column
+    """
+    source = data_path.joinpath(
+        "SNEX20_TS_SP_20200427_0845_COERAP_data_density_v01.csv"
+    )
+    header, rows = source.read_text().split(
+        "# Top (cm),Bottom (cm),Density A (kg/m3),Density B (kg/m3),"
+        "Density C (kg/m3)\n"
+    )
+    lines = ["# Top (cm),Bottom (cm),Density A (kg/m3),Comments"]
+    for i, row in enumerate(rows.splitlines()):
+        comment = "wet" if i % 2 else ""
+        lines.append(",".join(row.split(",")[:3] + [comment]))
+    filename = tmp_path.joinpath(source.name.replace("density", "mixed"))
+    filename.write_text(header + "\n".join(lines) + "\n")
+    return filename
+
+
 @pytest.fixture(scope="session")
 def base_primary_variables():
     return ExtendableVariables(entries=[base_primary_variables_yaml])
@@ -0,0 +1,181 @@
+import pytest
+
+from insitupy.campaigns.snowex import SnowExMetaDataParser
+from insitupy.io.layouts import HeaderLayout, HeaderLayoutCache, \
+    LayoutDeclaration
+from insitupy.io.metadata import MetaDataParser
+
+HEADER_LINE = "# Top (cm),Bottom (cm),Density A (kg/m3)\n"
+
+
+@pytest.fixture
+def layout():
+    return HeaderLayout(columns=("depth",), columns_map={}, units={})
+
+
+class TestHeaderLayoutCache:
+    def test_get_miss_and_hit(self, layout):
+        cache = HeaderLayoutCache()
+        assert cache.get("key") is None
+        cache.put("key", layout)
+        assert cache.get("key") is layout
+        assert cache.stats == {
+            "hits": 1, "misses": 1, "size": 1, "hit_rate": 0.5
+        }
+
+    def test_evicts_least_recently_used(self, layout):
+        cache = HeaderLayoutCache(max_size=2)
+        cache.put("a", layout)
+        cache.put("b", layout)
+        cache.get("a")
+        cache.put("c", layout)
+        assert cache.get("b") is None
+        assert cache.get("a") is layout
+        assert len(cache) == 2
+
+    def test_clear(self, layout):
+        cache = HeaderLayoutCache()
+        cache.put("a", layout)
+        cache.get("a")
+        cache.clear()
+        assert cache.stats["size"] == 0
+        assert cache.stats["hits"] == 0
+
+
+class TestParserLayoutCache:
+    @pytest.fixture(autouse=True)
+    def clear_cache(self):
+        SnowExMetaDataParser.LAYOUT_CACHE.clear()
+        yield
+        SnowExMetaDataParser.LAYOUT_CACHE.clear()
+
+    def test_repeated_header_is_cached(self):
+        first = SnowExMetaDataParser("US/Mountain")
+        expected = first._parse_columns(HEADER_LINE)
+        # A new parser with the same variables shares the cached layout
+        second = SnowExMetaDataParser("US/Mountain")
+        result = second._parse_columns(HEADER_LINE)
+
+        assert result == expected
+        assert second.layout_cache_stats["hits"] == 1
+        assert second.layout_cache_stats["misses"] == 1
+
+    def test_units_override_applied_on_hit(self):
+        SnowExMetaDataParser("US/Mountain")._parse_columns(HEADER_LINE)
+        parser = SnowExMetaDataParser(
+            "US/Mountain", units_map={"density": "g/cm3"}
+        )
+        _, _, units = parser._parse_columns(HEADER_LINE)
+
+        assert units["density"] == "g/cm3"
+        assert units["depth"] == "cm"
+        assert parser.layout_cache_stats["hits"] == 1
+
+    def test_different_variables_miss(self, yaml_variable_file):
+        SnowExMetaDataParser("US/Mountain")._parse_columns(HEADER_LINE)
+        parser = SnowExMetaDataParser(
+            "US/Mountain",
+            primary_variable_file=yaml_variable_file("extra.yaml")
+        )
+        parser._parse_columns(HEADER_LINE)
+
+        assert parser.layout_cache_stats["misses"] == 2
+
+
+class TestLayoutDeclaration:
+    @pytest.fixture
+    def declaration(self):
+        return LayoutDeclaration(pattern="SNEX20_*_density_v*.csv",
+                                 header_position=2)
+
+    @pytest.mark.parametrize("filename, expected", [
+        ("/data/SNEX20_TS_SP_20200427_density_v01.csv", True),
+        ("SNEX20_TS_SP_20200427_density_v02.csv", True),
+        ("SNEX20_TS_SP_20200427_LWC_v01.csv", False),
+    ])
+    def test_matches_filename(self, declaration, filename, expected):
+        assert declaration.matches_filename(filename) is expected
+
+    @pytest.mark.parametrize("lines, expected", [
+        (["# a,1\n", "# b,2\n", "# top,bottom\n", "1,2\n"], True),
+        # Header only file
+        (["# a,1\n", "# b,2\n", "# top,bottom\n"], True),
+        # Header is longer than declared
+        (["# a,1\n", "# b,2\n", "# c,3\n", "# top,bottom\n"], False),
+        # Header is shorter than declared
+        (["# a,1\n", "# top,bottom\n", "1,2\n"], False),
+        (["# a,1\n"], False),
+    ])
+    def test_matches_lines(self, declaration, lines, expected):
+        assert declaration.matches_lines(lines, "#") is expected
+
+
+class TestParserLayoutDeclarations:
+    def test_register_layout_scoped_to_class(self):
+        class CustomParser(MetaDataParser):
+            pass
+
+        declaration = LayoutDeclaration(pattern="*.csv", header_position=1)
+        CustomParser.register_layout(declaration)
+
+        assert declaration in CustomParser.LAYOUT_DECLARATIONS
+        assert declaration not in MetaDataParser.LAYOUT_DECLARATIONS
+
+    def test_register_layout_reaches_subclass_declarations(self):
+        class BaseParser(MetaDataParser):
+            pass
+
+        class ProductParser(BaseParser):
+            LAYOUT_DECLARATIONS = (
+                LayoutDeclaration(pattern="*_product.csv", header_position=2),
+            )
+
+        declaration = LayoutDeclaration(pattern="*.csv", header_position=1)
+        BaseParser.register_layout(declaration)
+
+        # The subclass keeps its own declarations first
+        assert ProductParser.layout_declarations() == (
+            ProductParser.LAYOUT_DECLARATIONS[0], declaration
+        )
+        assert declaration not in MetaDataParser.layout_declarations()
+
+    def test_declared_layout_used(self, data_path):
+        parser = SnowExMetaDataParser("US/Mountain")
+        declaration, lines = parser._declared_layout(str(data_path.joinpath(
+            "SNEX20_TS_SP_20200427_0845_COERAP_data_density_v01.csv"
+        )))
+        assert declaration is SnowExMetaDataParser.LAYOUT_DECLARATIONS[0]
+        # Only the header and the first data line are read
+        assert len(lines) == 12
+
+    def test_declared_matches_heuristic(self, data_path, mocker):
+        filename = data_path.joinpath(
+            "SNEX20_TS_SP_20200427_0845_COERAP_data_LWC_v01.csv"
+        )
+        declared = SnowExMetaDataParser("US/Mountain").parse(filename)
+
+        mocker.patch.object(SnowExMetaDataParser, "LAYOUT_DECLARATIONS", ())
+        searched = SnowExMetaDataParser("US/Mountain").parse(filename)
+
+        assert declared == searched
+
+    def test_falls_back_on_mismatch(self, data_path, tmp_path, mocker):
+        # Same product name, but an extra header line
+        source = data_path.joinpath(
+            "SNEX20_TS_SP_20200427_0845_COERAP_data_density_v01.csv"
+        )
+        lines = source.read_text().splitlines(keepends=True)
+        filename = tmp_path.joinpath(source.name)
+        filename.write_text(
+            "".join(lines[:1] + ["# Extra,line\n"] + lines[1:])
+        )
+
+        parser = SnowExMetaDataParser(
+            "US/Mountain", allow_split_lines=True, allow_map_failures=True
+        )
+        search = mocker.spy(parser, "_find_header_position")
+        metadata, columns, _, header_pos = parser.parse(filename)
+
+        assert search.call_count == 1
+        assert header_pos == 11
+        assert columns[0] == "depth"
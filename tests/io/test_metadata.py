@@ -64,3 +64,32 @@ class TestMetaDataParser:
         assert result == META_LINES_PARSED, (
             "Lines without key-value pairs were not skipped."
         )
+
+
+class TestHeaderOnly:
+    @pytest.fixture
+    def csv_file(self, tmp_path):
+        file = tmp_path / "profile.csv"
+        file.write_text(
+            "# Pit ID,1234\n"
+            "# Date/Time,2025-10-08 12:34\n"
+            "continued header line\n"
+            "# Latitude,40.0\n"
+            "# Longitude,-105.0\n"
+            "# Depth (cm),Density (kg/m3)\n" +
+            "".join(f"{i},300\n" for i in range(1000))
+        )
+        return file
+
+    def test_read_header_lines(self, metadata_parser, csv_file):
+        lines = metadata_parser._read_header_lines(csv_file)
+        # Header plus the data lines that end the search
+        assert len(lines) == 6 + MetaDataParser.HEADER_SCAN_DATA_LINES
+
+    def test_header_only_matches_full_read(self, csv_file):
+        parser = MetaDataParser("UTC", allow_split_lines=True)
+        expected = parser.find_header_info(csv_file)
+        result = parser.find_header_info(csv_file, header_only=True)
+
+        assert result == expected
+        assert result[3] == 5
@@ -0,0 +1,94 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from insitupy.profiles.binning import bin_values
+
+
+@pytest.fixture
+def profile():
+    # Sub millimeter resolution over 1 m, in surface datum
+    rng = np.random.default_rng(0)
+    depths = -np.arange(0, 100, 0.04)
+    values = rng.gamma(2.0, size=len(depths))
+    values[::50] = np.nan
+    return depths, values
+
+
+def _expected(depths, values, lower, upper, function):
+    return np.array([
+        function(values[(depths >= lo) & (depths < up) & ~np.isnan(values)])
+        for lo, up in zip(lower, upper)
+    ])
+
+
+class TestBinValues:
+    @pytest.mark.parametrize("statistic, function", [
+        ("mean", np.mean),
+        ("sum", np.sum),
+        ("count", len),
+        ("median", np.median),
+        ("p10", lambda v: np.percentile(v, 10)),
+        ("p97.5", lambda v: np.percentile(v, 97.5)),
+        ("min", np.min),
+        ("max", np.max),
+    ])
+    def test_matches_numpy(self, profile, statistic, function):
+        depths, values = profile
+        lower = np.arange(-100, 0, 10.0)
+        upper = lower + 10
+        df = bin_values(depths, values, lower, upper, statistics=[statistic])
+        np.testing.assert_allclose(
+            df[statistic], _expected(depths, values, lower, upper, function)
+        )
+
+    def test_overlapping_and_empty(self, profile):
+        depths, values = profile
+        lower = np.array([-30.0, -25.0, -500.0, 10.0])
+        upper = np.array([-20.0, -15.0, -400.0, 20.0])
+        df = bin_values(depths, values, lower, upper)
+        np.testing.assert_allclose(
+            df["mean"][:2],
+            _expected(depths, values, lower[:2], upper[:2], np.mean)
+        )
+        assert df["count"].tolist()[2:] == [0, 0]
+        assert df["median"][2:].isna().all()
+
+    def test_edges_beyond_the_profile(self, profile):
+        depths, values = profile
+        df = bin_values(depths, values, [-1000], [1000], statistics=["count"])
+        assert df["count"].iloc[0] == np.sum(~np.isnan(values))
+
+    def test_groups(self, profile):
+        depths, values = profile
+        lower = np.array([-50.0, -50.0, -10.0])
+        upper = np.array([0.0, 0.0, 0.0])
+        df = bin_values(
+            np.concatenate([depths, depths]),
+            np.concatenate([values, values * 2]),
+            lower, upper, statistics=["mean", "median"],
+            groups=np.repeat([0, 1], len(depths)),
+            interval_groups=np.array([0, 1, 1])
+        )
+        np.testing.assert_allclose(df["mean"][1], df["mean"][0] * 2)
+        np.testing.assert_allclose(df["median"][1], df["median"][0] * 2)
+        np.testing.assert_allclose(
+            df["mean"][2],
+            _expected(depths, values * 2, [-10.0], [0.0], np.mean)[0]
+        )
+
+    @pytest.mark.parametrize("statistic", ["mode", "p101", "q50"])
+    def test_invalid(self, profile, statistic):
+        with pytest.raises(ValueError):
+            bin_values(*profile, [0.0], [1.0], statistics=[statistic])
+
+    def test_missing_interval_groups(self, profile):
+        with pytest.raises(ValueError):
+            bin_values(
+                *profile, [0.0], [1.0], groups=np.zeros(len(profile[0]))
+            )
+
+    def test_frame(self):
+        df = bin_values([], [], [0.0], [1.0])
+        assert df.columns.tolist() == ["mean", "median", "count"]
+        assert isinstance(df, pd.DataFrame)
@@ -0,0 +1,48 @@
+import numpy as np
+import pytest
+
+from insitupy.profiles.windows import aggregate_layers
+
+
+@pytest.fixture
+def layers():
+    """
+    Two layered profiles and one of point measurements
+    """
+    return dict(
+        profile_index=np.array([0, 0, 0, 1, 1, 2, 2, 2]),
+        lower=np.array([20.0, 10.0, 0.0, 10.0, 0.0, 25.0, 15.0, 5.0]),
+        upper=np.array([30.0, 20.0, 10.0, 20.0, 10.0, 25.0, 15.0, 5.0]),
+        values=np.array([100.0, 200.0, 300.0, 1.0, np.nan, 5.0, 7.0, 9.0]),
+        band_lower=np.array([5.0, 0.0, 10.0]),
+        band_upper=np.array([25.0, 10.0, 30.0]),
+        n_profiles=4,
+    )
+
+
+class TestAggregateLayers:
+    @pytest.mark.parametrize("how, expected", [
+        # Overlaps of 5, 10 and 5 in the first profile, the layer with
+        # a value in the second profile is outside of the band
+        ("mean", [200.0, np.nan, 6.0, np.nan]),
+        ("sum", [4000.0, np.nan, 12.0, np.nan]),
+        ("min", [100.0, np.nan, 5.0, np.nan]),
+        ("max", [300.0, np.nan, 7.0, np.nan]),
+        ("count", [3, 0, 2, 0]),
+        ("thickness", [20.0, 0.0, 0.0, 0.0]),
+    ])
+    def test_aggregations(self, layers, how, expected):
+        np.testing.assert_allclose(
+            aggregate_layers(**layers, how=how), expected
+        )
+
+    def test_touching_layers(self, layers):
+        # The band ends where the last layer starts
+        layers["band_lower"] = np.array([10.0, 0.0, 0.0])
+        np.testing.assert_allclose(
+            aggregate_layers(**layers, how="count"), [2, 0, 3, 0]
+        )
+
+    def test_invalid(self, layers):
+        with pytest.raises(ValueError):
+            aggregate_layers(**layers, how="mode")
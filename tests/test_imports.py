@@ -0,0 +1,33 @@
+import subprocess
+import sys
+import textwrap
+
+import pytest
+
+OPTIONAL_MODULES = ["pyarrow", "xarray", "scipy"]
+
+
+@pytest.mark.parametrize("module", [
+    "insitupy",
+    "insitupy.campaigns",
+    "insitupy.campaigns.snowex",
+    "insitupy.catalog",
+])
+def test_imports_without_optional_dependencies(module):
+    # A fresh interpreter where the optional dependencies fail to import,
+    # as the test session already imported them
+    code = textwrap.dedent(f"""
+        import sys
+
+        class Missing:
+            def find_spec(self, name, path=None, target=None):
+                if name.split(".")[0] in {OPTIONAL_MODULES}:
+                    raise ImportError(name)
+
+        sys.meta_path.insert(0, Missing())
+        import {module}
+    """)
+    result = subprocess.run(
+        [sys.executable, "-c", code], capture_output=True, text=True
+    )
+    assert result.returncode == 0, result.stderr
@@ -1,5 +1,8 @@
 # tests/test_base_variables.py
 
+import pickle
+
+import attrs
 import pytest
 
 from insitupy.variables import ExtendableVariables, MeasurementDescription, \
@@ -156,3 +159,40 @@ class TestMeasurementDescription:
     def test_invalid_map_from_type(self):
         with pytest.raises(TypeError):
             MeasurementDescription(map_from="not a list")
+
+    def test_identity_equality(self):
+        a = MeasurementDescription(code="DEPTH", map_from=["depth"])
+        b = MeasurementDescription(code="DEPTH", map_from=["depth"])
+        assert a == a
+        assert a != b
+        assert len({a, b}) == 2
+
+    def test_intern_returns_canonical_object(self):
+        a = MeasurementDescription.intern(code="DEPTH", map_from=["depth"])
+        b = MeasurementDescription.intern(code="DEPTH", map_from=["depth"])
+        c = MeasurementDescription.intern(code="DEPTH", map_from=["top"])
+        assert a is b
+        assert a is not c
+
+    def test_registries_share_entries(self):
+        first = ExtendableVariables(entries=[base_primary_variables_yaml])
+        second = ExtendableVariables(entries=[base_primary_variables_yaml])
+        assert first.entries["DEPTH"] is second.entries["DEPTH"]
+        assert first.entries["DENSITY"] in set(second.variables)
+
+    def test_unpickles_to_canonical_object(self):
+        description = MeasurementDescription.intern(
+            code="DEPTH", map_from=["depth"]
+        )
+        assert pickle.loads(pickle.dumps(description)) is description
+
+    def test_dict_entries_are_interned(self):
+        from_yaml = ExtendableVariables(entries=[base_primary_variables_yaml])
+        depth = from_yaml.entries["DEPTH"]
+        from_dict = ExtendableVariables(entries={
+            "DEPTH": attrs.asdict(depth),
+            "COPY": MeasurementDescription(**attrs.asdict(depth)),
+        })
+        assert from_dict.entries["DEPTH"] is depth
+        assert from_dict.entries["COPY"] is depth
+        assert from_dict.entries["DEPTH"] in set(from_yaml.variables)